@@ -0,0 +1,187 @@
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import and_, case, delete, extract, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .models import ArchivedTask, Task, TaskEvent, TaskEventType, TaskStatus, TaskStatusRollup
+
+ROLLUP_COUNTERS = ("entered_count", "exited_count", "dwell_seconds", "wip_delta")
+ROLLUP_COLUMNS = ("project_id", "day", "status", *ROLLUP_COUNTERS)
+
+
+def _rollup_upsert(bind):
+    # Rows for an existing (project, day, status) add to its counters.
+    insert = postgresql_insert if bind.dialect.name == "postgresql" else sqlite_insert
+    statement = insert(TaskStatusRollup)
+    return statement.on_conflict_do_update(
+        index_elements=["project_id", "day", "status"],
+        set_={name: getattr(TaskStatusRollup, name) + statement.excluded[name] for name in ROLLUP_COUNTERS},
+    )
+
+
+class RollupBatch:
+    """Accumulates rollup deltas for one transaction and flushes them as a single upsert."""
+
+    def __init__(self):
+        self._deltas: dict[tuple, dict[str, float]] = defaultdict(lambda: dict.fromkeys(ROLLUP_COUNTERS, 0))
+
+    def add(self, project_id: int, at: datetime, status: TaskStatus, **counters) -> None:
+        delta = self._deltas[(project_id, at.date(), status)]
+        for name, value in counters.items():
+            delta[name] += value
+
+    def created(self, task: Task, at: datetime) -> None:
+        self.add(task.project_id, at, task.status, entered_count=1, wip_delta=1)
+
+    def status_changed(self, task: Task, previous_status: TaskStatus, previous_since: datetime | None, at: datetime) -> None:
+        dwell = (at - previous_since).total_seconds() if previous_since else 0
+        self.add(task.project_id, at, previous_status, exited_count=1, dwell_seconds=dwell, wip_delta=-1)
+        self.add(task.project_id, at, task.status, entered_count=1, wip_delta=1)
+
+    def deleted(self, task: Task, at: datetime) -> None:
+        self.add(task.project_id, at, task.status, wip_delta=-1)
+
+    def restored(self, task: Task, at: datetime) -> None:
+        self.add(task.project_id, at, task.status, wip_delta=1)
+
+    def flush(self, db: Session) -> int:
+        if not self._deltas:
+            return 0
+
+        rows = [
+            {"project_id": project_id, "day": day, "status": status, **counters}
+            for (project_id, day, status), counters in self._deltas.items()
+        ]
+        db.execute(_rollup_upsert(db.get_bind()), rows)
+        self._deltas.clear()
+        return len(rows)
+
+
+def _seconds_between(bind, later, earlier):
+    if bind.dialect.name == "postgresql":
+        return extract("epoch", later - earlier)
+    return (func.julianday(later) - func.julianday(earlier)) * 86400.0
+
+
+def _history_with_runs():
+    # Each event with the status before it and, on a status change, when the
+    # previous status began. A "run" is a stretch of consecutive events with
+    # the same status; window functions cannot nest, hence the layers.
+    # Archived tasks keep their history, so the project comes from whichever
+    # table holds the task.
+    task_project_id = func.coalesce(Task.project_id, ArchivedTask.project_id)
+    history = (
+        select(
+            TaskEvent.id,
+            TaskEvent.task_id,
+            task_project_id.label("project_id"),
+            TaskEvent.event_type,
+            TaskEvent.status,
+            TaskEvent.created_at,
+            func.lag(TaskEvent.status)
+            .over(partition_by=TaskEvent.task_id, order_by=(TaskEvent.created_at, TaskEvent.id))
+            .label("previous_status"),
+        )
+        .outerjoin(Task, Task.id == TaskEvent.task_id)
+        .outerjoin(ArchivedTask, ArchivedTask.id == TaskEvent.task_id)
+        .where(task_project_id.is_not(None))
+        .subquery("history")
+    )
+
+    starts_run = or_(history.c.previous_status.is_(None), history.c.status != history.c.previous_status)
+    numbered = select(
+        *history.c,
+        func.sum(case((starts_run, 1), else_=0))
+        .over(partition_by=history.c.task_id, order_by=(history.c.created_at, history.c.id))
+        .label("run"),
+    ).subquery("numbered")
+
+    started = select(
+        *numbered.c,
+        func.min(numbered.c.created_at)
+        .over(partition_by=(numbered.c.task_id, numbered.c.run))
+        .label("run_started_at"),
+    ).subquery("started")
+
+    events = select(
+        started.c.project_id,
+        started.c.event_type,
+        started.c.status,
+        started.c.previous_status,
+        started.c.created_at,
+        func.date(started.c.created_at).label("day"),
+        func.lag(started.c.run_started_at)
+        .over(partition_by=started.c.task_id, order_by=(started.c.created_at, started.c.id))
+        .label("previous_started_at"),
+    ).subquery("events")
+    return events
+
+
+def backfill_task_rollups(engine: Engine) -> int:
+    """Rebuild every rollup from task history, entirely inside the database.
+
+    Events of tasks that were hard-deleted (in neither `tasks` nor
+    `archived_tasks`) are skipped on purpose: their project is no longer
+    known, so a rebuild drops whatever they once contributed.
+    """
+    events = _history_with_runs()
+    transition = and_(
+        events.c.event_type != TaskEventType.CREATED,
+        events.c.previous_status.is_not(None),
+        events.c.status != events.c.previous_status,
+    )
+    visibility_change = case((events.c.event_type == TaskEventType.DELETED, -1), else_=1)
+
+    # One INSERT ... SELECT per kind of contribution; the upsert adds kinds
+    # that land on the same (project, day, status).
+    rollup_kinds = (
+        # A status is entered by creation or by a transition into it.
+        select(
+            events.c.project_id,
+            events.c.day,
+            events.c.status,
+            func.count(),
+            literal(0),
+            literal(0.0),
+            func.count(),
+        )
+        .where(or_(events.c.event_type == TaskEventType.CREATED, transition))
+        .group_by(events.c.project_id, events.c.day, events.c.status),
+        # A transition leaves the previous status after dwelling in it since
+        # its run began.
+        select(
+            events.c.project_id,
+            events.c.day,
+            events.c.previous_status,
+            literal(0),
+            func.count(),
+            func.sum(_seconds_between(engine, events.c.created_at, events.c.previous_started_at)),
+            -func.count(),
+        )
+        .where(transition)
+        .group_by(events.c.project_id, events.c.day, events.c.previous_status),
+        # Deleting and restoring move a task out of and back into WIP.
+        select(
+            events.c.project_id,
+            events.c.day,
+            events.c.status,
+            literal(0),
+            literal(0),
+            literal(0.0),
+            func.sum(visibility_change),
+        )
+        .where(events.c.event_type.in_((TaskEventType.DELETED, TaskEventType.RESTORED)))
+        .group_by(events.c.project_id, events.c.day, events.c.status),
+    )
+
+    with Session(bind=engine) as db:
+        db.execute(delete(TaskStatusRollup))
+        for query in rollup_kinds:
+            db.execute(_rollup_upsert(engine).from_select(ROLLUP_COLUMNS, query))
+        rollup_rows = db.scalar(select(func.count()).select_from(TaskStatusRollup))
+        db.commit()
+        return rollup_rows
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import delete, exists, insert, literal, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from .leader import HostLeaderLock
+from .models import ArchivedProject, ArchivedTask, Project, ProjectMember, ProjectRole, Task, TaskLabel
+from .task_tree import forget_tasks, link_task
+
+logger = logging.getLogger(__name__)
+
+TASK_COLUMN_NAMES = tuple(column.name for column in Task.__table__.columns)
+PROJECT_COLUMN_NAMES = tuple(column.name for column in Project.__table__.columns)
+
+
+@dataclass
+class ArchiveResult:
+    tasks: int = 0
+    projects: int = 0
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _claim_batch(connection: Connection, query, batch_size: int) -> list[int]:
+    # SKIP LOCKED lets several workers run the job at once without fighting
+    # over the same rows; SQLite ignores the locking clause.
+    return connection.execute(query.limit(batch_size).with_for_update(skip_locked=True)).scalars().all()
+
+
+def _move_rows(connection: Connection, source, archive, column_names, ids: list[int], mode: str, archived_at) -> None:
+    if mode == "archive":
+        source_columns = [source.__table__.c[name] for name in column_names]
+        connection.execute(
+            insert(archive).from_select(
+                [*column_names, "archived_at"],
+                select(*source_columns, literal(archived_at)).where(source.id.in_(ids)),
+            )
+        )
+    connection.execute(delete(source).where(source.id.in_(ids)))
+
+
+def archive_tombstones(
+    engine: Engine,
+    retention_days: int,
+    mode: str = "archive",
+    batch_size: int = 500,
+    now: datetime | None = None,
+) -> ArchiveResult:
+    now = now or _utcnow()
+    cutoff = now - timedelta(days=retention_days)
+    result = ArchiveResult()
+
+    # Each batch is its own short transaction so the hot tables are never
+    # locked for longer than one batch takes.
+    expired_tasks = select(Task.id).where(Task.deleted_at < cutoff).order_by(Task.id)
+    while True:
+        with engine.begin() as connection:
+            task_ids = _claim_batch(connection, expired_tasks, batch_size)
+            if task_ids:
+                # Label links, tree rows and dependencies are not archived.
+                # SQLite does not enforce the cascades, so they are removed
+                # explicitly, as are memberships below.
+                connection.execute(delete(TaskLabel).where(TaskLabel.task_id.in_(task_ids)))
+                forget_tasks(connection, task_ids)
+                _move_rows(connection, Task, ArchivedTask, TASK_COLUMN_NAMES, task_ids, mode, now)
+        result.tasks += len(task_ids)
+        if len(task_ids) < batch_size:
+            break
+
+    expired_projects = (
+        select(Project.id)
+        .where(Project.deleted_at < cutoff, ~exists().where(Task.project_id == Project.id))
+        .order_by(Project.id)
+    )
+    while True:
+        with engine.begin() as connection:
+            project_ids = _claim_batch(connection, expired_projects, batch_size)
+            if project_ids:
+                connection.execute(delete(ProjectMember).where(ProjectMember.project_id.in_(project_ids)))
+                _move_rows(connection, Project, ArchivedProject, PROJECT_COLUMN_NAMES, project_ids, mode, now)
+        result.projects += len(project_ids)
+        if len(project_ids) < batch_size:
+            break
+
+    return result
+
+
+async def run_archive_job_periodically(
+    engine: Engine,
+    interval_seconds: int,
+    *,
+    leader: HostLeaderLock | None = None,
+    **options,
+) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        if leader is not None and not leader.acquire():
+            continue
+        try:
+            result = await asyncio.to_thread(archive_tombstones, engine, **options)
+        except Exception:
+            logger.exception("Archiving tombstoned rows failed.")
+            continue
+        if result.tasks or result.projects:
+            logger.info("Archived %s tasks and %s projects.", result.tasks, result.projects)
+
+
+def _link_restored_tasks(db: Session, tasks: list[Task]) -> None:
+    # Parents are linked before their subtasks. A parent that did not come
+    # back with the batch (and is not live) turns the task into a root.
+    restored_ids = {task.id for task in tasks}
+    outside_parent_ids = {task.parent_id for task in tasks if task.parent_id not in restored_ids} - {None}
+    live_parent_ids = set()
+    if outside_parent_ids:
+        live_parent_ids = set(db.scalars(select(Task.id).where(Task.id.in_(outside_parent_ids))))
+
+    linked_ids: set[int] = set()
+    pending = list(tasks)
+    while pending:
+        waiting = []
+        for task in pending:
+            if task.parent_id in restored_ids and task.parent_id not in linked_ids:
+                waiting.append(task)
+                continue
+            if task.parent_id is not None and task.parent_id not in restored_ids | live_parent_ids:
+                task.parent_id = None
+            link_task(db, task.id, task.parent_id)
+            linked_ids.add(task.id)
+        if len(waiting) == len(pending):
+            for task in waiting:
+                task.parent_id = None
+        pending = waiting
+
+
+def restore_archived_project(db: Session, archived_project: ArchivedProject) -> tuple[Project, list[Task]]:
+    project = Project(**{name: getattr(archived_project, name) for name in PROJECT_COLUMN_NAMES})
+    project.deleted_at = None
+    db.add(project)
+    db.flush()
+    db.add(ProjectMember(user_id=project.owner_id, project_id=project.id, role=ProjectRole.OWNER))
+
+    archived_tasks = db.scalars(select(ArchivedTask).where(ArchivedTask.project_id == archived_project.id)).all()
+    reactivated_tasks = []
+    restored_tasks = []
+    for archived_task in archived_tasks:
+        task = Task(**{name: getattr(archived_task, name) for name in TASK_COLUMN_NAMES})
+        # Tasks removed together with the project come back with it; tasks the
+        # user had deleted earlier stay soft-deleted.
+        if archived_task.deleted_at == archived_project.deleted_at:
+            task.deleted_at = None
+            reactivated_tasks.append(task)
+        db.add(task)
+        restored_tasks.append(task)
+        db.delete(archived_task)
+
+    db.delete(archived_project)
+    db.flush()
+    _link_restored_tasks(db, restored_tasks)
+    db.flush()
+    return project, reactivated_tasks
+
+
+def restore_archived_task(db: Session, archived_task: ArchivedTask) -> Task:
+    task = Task(**{name: getattr(archived_task, name) for name in TASK_COLUMN_NAMES})
+    task.deleted_at = None
+    db.add(task)
+    db.delete(archived_task)
+    db.flush()
+    _link_restored_tasks(db, [task])
+    db.flush()
+    return task
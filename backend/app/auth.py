@@ -1,9 +1,19 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
-from .config import ACCESS_TOKEN_EXPIRE_MINUTES, SECRET_KEY
+from .config import ACCESS_TOKEN_EXPIRE_MINUTES, JWT_BACKEND, SECRET_KEY, TOKEN_CACHE_MAX_ENTRIES
+
+# PyJWT is optional and only needed for JWT_BACKEND=pyjwt.
+try:
+    import jwt as pyjwt
+except ImportError:
+    pyjwt = None
 
 ALGORITHM = "HS256"
 
@@ -12,6 +22,95 @@ ALGORITHM = "HS256"
 pwd_context = CryptContext(schemes=["pbkdf2_sha256", "bcrypt"], deprecated="auto")
 
 
+def _decode_with_jose(token: str) -> dict:
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+
+def _decode_with_pyjwt(token: str) -> dict:
+    return pyjwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+
+# Each backend maps to its decoder and the base error it raises for
+# malformed, forged or expired tokens.
+JWT_DECODERS = {"jose": (_decode_with_jose, JWTError)}
+if pyjwt is not None:
+    JWT_DECODERS["pyjwt"] = (_decode_with_pyjwt, pyjwt.PyJWTError)
+
+if JWT_BACKEND == "pyjwt" and pyjwt is None:
+    raise RuntimeError("JWT_BACKEND=pyjwt requires PyJWT; install it with `pip install PyJWT`.")
+if JWT_BACKEND not in JWT_DECODERS:
+    raise RuntimeError(f"JWT_BACKEND must be one of: jose, pyjwt (got {JWT_BACKEND!r}).")
+jwt_backend = JWT_BACKEND
+
+
+class VerifiedTokenCache:
+    # Per-process LRU of tokens that already passed signature verification,
+    # mapped to their subject. Keys are SHA-256 digests so raw bearer tokens
+    # are not kept in memory, and each entry expires at the token's own
+    # `exp`, so a cached token is never accepted after a full decode would
+    # reject it. Failed decodes are not cached.
+    def __init__(self, max_entries: int = 10_000, clock=time.time):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[bytes, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, token: str) -> str | None:
+        if not self.enabled:
+            return None
+
+        key = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, token: str, subject: str, expires_at: float) -> None:
+        if not self.enabled:
+            return
+
+        key = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            self._entries[key] = (expires_at, subject)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": jwt_backend,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+token_cache = VerifiedTokenCache(TOKEN_CACHE_MAX_ENTRIES)
+
+
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
@@ -30,14 +129,31 @@ def create_access_token(subject: str, expires_minutes: int | None = None) -> str
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def decode_access_token(token: str) -> str | None:
+def verify_access_token(token: str, backend: str | None = None) -> dict | None:
+    # Full signature and claims check, bypassing the cache.
+    decode, error = JWT_DECODERS[backend or jwt_backend]
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    except JWTError:
+        return decode(token)
+    except error:
+        return None
+
+
+def decode_access_token(token: str) -> str | None:
+    # Active sessions resolve with one dictionary lookup; only unseen or
+    # expired tokens pay for a full verification.
+    subject = token_cache.get(token)
+    if subject is not None:
+        return subject
+
+    payload = verify_access_token(token)
+    if payload is None:
         return None
 
     subject = payload.get("sub")
     if not subject:
         return None
 
+    expires_at = payload.get("exp")
+    if isinstance(expires_at, int | float):
+        token_cache.set(token, subject, expires_at)
     return subject
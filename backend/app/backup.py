@@ -0,0 +1,164 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import zlib
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+from .migrations import run_migrations
+
+CHUNK_SIZE = 1024 * 1024
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+@dataclass
+class BackupResult:
+    path: Path
+    pages: int = 0
+    steps: int = 0
+    restarts: int = 0
+    longest_step_ms: float = 0.0
+
+
+def sqlite_database_path(bind: Engine) -> Path:
+    database = bind.url.database
+    if bind.dialect.name != "sqlite" or not database or database == ":memory:":
+        raise ValueError("Online backups are only available for file-backed SQLite databases.")
+    return Path(database).resolve()
+
+
+def snapshot_sqlite(
+    bind: Engine,
+    destination: Path,
+    *,
+    pages_per_step: int = 256,
+    pause_seconds: float = 0.005,
+    max_restarts: int = 20,
+) -> BackupResult:
+    # Copies the live database with SQLite's backup API, `pages_per_step`
+    # pages at a time, while the app keeps writing.
+    #
+    # In WAL mode the copy runs inside one read transaction. Readers never
+    # block WAL writers, and the pinned snapshot keeps concurrent commits
+    # from restarting the copy. In rollback-journal mode each step briefly
+    # holds a shared lock that blocks commits, so steps stay small and pause
+    # in between; a commit in between makes SQLite restart the copy, which
+    # is given up after `max_restarts`.
+    source_path = sqlite_database_path(bind)
+    result = BackupResult(path=destination)
+    source = sqlite3.connect(f"{source_path.as_uri()}?mode=ro", uri=True)
+    target = sqlite3.connect(destination)
+    try:
+        wal = source.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+        if wal:
+            source.execute("BEGIN")
+            source.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+
+        previous_remaining = None
+        step_started = time.perf_counter()
+
+        def progress(_status, remaining, total):
+            nonlocal previous_remaining, step_started
+            result.steps += 1
+            result.pages = total
+            result.longest_step_ms = max(result.longest_step_ms, (time.perf_counter() - step_started) * 1000)
+            if previous_remaining is not None and remaining > previous_remaining:
+                result.restarts += 1
+                if result.restarts > max_restarts:
+                    raise RuntimeError("The database changed too often during the backup; try again when it is quieter.")
+            previous_remaining = remaining
+            if not wal and remaining:
+                time.sleep(pause_seconds)
+            step_started = time.perf_counter()
+
+        source.backup(target, pages=pages_per_step, progress=progress)
+        # The copy inherits WAL mode from the page header; a snapshot file
+        # should open on its own without -wal/-shm companions.
+        target.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        source.close()
+        target.close()
+    return result
+
+
+def iter_gzip(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    with path.open("rb") as snapshot:
+        while chunk := snapshot.read(chunk_size):
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+    yield compressor.flush()
+
+
+def stream_compressed_snapshot(bind: Engine, **options) -> tuple[BackupResult, Iterator[bytes]]:
+    # The snapshot is staged next to the database, which is where the disk
+    # space is, and removed once the stream is consumed or closed.
+    directory = Path(tempfile.mkdtemp(prefix=".backup-", dir=sqlite_database_path(bind).parent))
+    try:
+        result = snapshot_sqlite(bind, directory / "snapshot.db", **options)
+    except BaseException:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+
+    def chunks() -> Iterator[bytes]:
+        try:
+            yield from iter_gzip(result.path)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    return result, chunks()
+
+
+def write_compressed_snapshot(bind: Engine, destination: Path, **options) -> BackupResult:
+    result, chunks = stream_compressed_snapshot(bind, **options)
+    partial = destination.with_name(f"{destination.name}.partial")
+    with partial.open("wb") as output:
+        for chunk in chunks:
+            output.write(chunk)
+    os.replace(partial, destination)
+    result.path = destination
+    return result
+
+
+def restore_snapshot(snapshot: Path, target: Path, *, overwrite: bool = False) -> None:
+    # Restores into a fresh file that is integrity-checked and migrated
+    # before it atomically replaces `target`. Stop the API first when
+    # `target` is the live database.
+    if target.exists() and not overwrite:
+        raise FileExistsError(f"{target} already exists.")
+
+    with snapshot.open("rb") as probe:
+        compressed = probe.read(2) == GZIP_MAGIC
+    partial = target.with_name(f"{target.name}.restoring")
+    with (gzip.open(snapshot, "rb") if compressed else snapshot.open("rb")) as source, partial.open("wb") as output:
+        shutil.copyfileobj(source, output, CHUNK_SIZE)
+
+    try:
+        connection = sqlite3.connect(partial)
+        try:
+            integrity = connection.execute("PRAGMA integrity_check").fetchone()[0]
+        finally:
+            connection.close()
+        if integrity != "ok":
+            raise ValueError(f"The snapshot failed SQLite's integrity check: {integrity}")
+
+        restored_engine = create_engine(f"sqlite:///{partial}")
+        try:
+            run_migrations(restored_engine)
+        finally:
+            restored_engine.dispose()
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+
+    for suffix in ("-wal", "-shm"):
+        Path(f"{target}{suffix}").unlink(missing_ok=True)
+    os.replace(partial, target)
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .config import DASHBOARD_CACHE_TTL_SECONDS
+from .models import ProjectMember
+
+
+class UserViewCache:
+    # Small per-process LRU for rendered per-user views. Entries expire after
+    # `ttl_seconds`, and every write a user makes drops all of their entries.
+    def __init__(self, ttl_seconds: float, max_entries: int = 10_000, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[tuple[int, Hashable], tuple[float, object]] = OrderedDict()
+        self._keys_by_user: dict[int, set[tuple[int, Hashable]]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, user_id: int, key: Hashable):
+        if not self.enabled:
+            return None
+
+        entry_key = (user_id, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                self._discard(entry_key)
+                return None
+            self._entries.move_to_end(entry_key)
+            return value
+
+    def set(self, user_id: int, key: Hashable, value) -> None:
+        if not self.enabled:
+            return
+
+        entry_key = (user_id, key)
+        with self._lock:
+            self._entries[entry_key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(entry_key)
+            self._keys_by_user.setdefault(user_id, set()).add(entry_key)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate(self, *user_ids: int) -> None:
+        with self._lock:
+            for user_id in user_ids:
+                for entry_key in self._keys_by_user.pop(user_id, set()):
+                    self._entries.pop(entry_key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _discard(self, entry_key: tuple[int, Hashable]) -> None:
+        self._entries.pop(entry_key, None)
+        user_keys = self._keys_by_user.get(entry_key[0])
+        if user_keys is not None:
+            user_keys.discard(entry_key)
+            if not user_keys:
+                del self._keys_by_user[entry_key[0]]
+
+
+dashboard_cache = UserViewCache(DASHBOARD_CACHE_TTL_SECONDS)
+
+
+def invalidate_project_views(db: Session, project_id: int, *extra_user_ids: int) -> None:
+    # A shared project shows up on every member's dashboard, so a write to it
+    # drops all of their cached views. Skipped entirely when caching is off.
+    if not dashboard_cache.enabled:
+        return
+    member_ids = db.scalars(select(ProjectMember.user_id).where(ProjectMember.project_id == project_id)).all()
+    dashboard_cache.invalidate(*member_ids, *extra_user_ids)
@@ -0,0 +1,100 @@
+import argparse
+from pathlib import Path
+
+from .analytics import backfill_task_rollups
+from .archive import archive_tombstones
+from .backup import restore_snapshot, sqlite_database_path, write_compressed_snapshot
+from .config import (
+    ARCHIVE_BATCH_SIZE,
+    ARCHIVE_MODE,
+    ARCHIVE_RETENTION_DAYS,
+    BACKUP_PAGES_PER_STEP,
+    BACKUP_STEP_PAUSE_SECONDS,
+    TASK_EVENT_RETENTION_DAYS,
+)
+from .database import engine
+from .migrations import run_migrations
+from .task_events import prune_task_events
+
+
+def _prune_task_events(args: argparse.Namespace) -> None:
+    deleted = prune_task_events(engine, args.retention_days)
+    print(f"Removed {deleted} task events older than {args.retention_days} days.")
+
+
+def _backfill_analytics(_: argparse.Namespace) -> None:
+    rollup_rows = backfill_task_rollups(engine)
+    print(f"Rebuilt {rollup_rows} analytics rollup rows from task history.")
+
+
+def _archive_tombstones(args: argparse.Namespace) -> None:
+    result = archive_tombstones(engine, args.retention_days, mode=args.mode, batch_size=args.batch_size)
+    verb = "Archived" if args.mode == "archive" else "Deleted"
+    print(f"{verb} {result.tasks} tasks and {result.projects} projects deleted over {args.retention_days} days ago.")
+
+
+def _backup_sqlite(args: argparse.Namespace) -> None:
+    result = write_compressed_snapshot(
+        engine,
+        args.destination,
+        pages_per_step=args.pages_per_step,
+        pause_seconds=args.pause_seconds,
+    )
+    print(
+        f"Wrote {result.pages} pages to {result.path} in {result.steps} steps "
+        f"({result.restarts} restarts, longest step {result.longest_step_ms:.1f} ms)."
+    )
+
+
+def _restore_sqlite(args: argparse.Namespace) -> None:
+    target = args.target or sqlite_database_path(engine)
+    engine.dispose()
+    try:
+        restore_snapshot(args.snapshot, target, overwrite=args.force)
+    except FileExistsError as exc:
+        raise SystemExit(f"{exc} Pass --force to replace it.") from exc
+    print(f"Restored {args.snapshot} to {target}.")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Maintenance commands for the focus tracker API.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    prune_parser = subparsers.add_parser("prune-task-events", help="Apply the task history retention window.")
+    prune_parser.add_argument("--retention-days", type=int, default=TASK_EVENT_RETENTION_DAYS)
+    prune_parser.set_defaults(handler=_prune_task_events)
+
+    backfill_parser = subparsers.add_parser("backfill-analytics", help="Rebuild analytics rollups from task history.")
+    backfill_parser.set_defaults(handler=_backfill_analytics)
+
+    archive_parser = subparsers.add_parser("archive-tombstones", help="Move expired soft-deleted rows out of hot tables.")
+    archive_parser.add_argument("--retention-days", type=int, default=ARCHIVE_RETENTION_DAYS)
+    archive_parser.add_argument("--mode", choices=("archive", "delete"), default=ARCHIVE_MODE)
+    archive_parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    archive_parser.set_defaults(handler=_archive_tombstones)
+
+    backup_parser = subparsers.add_parser("backup-sqlite", help="Write a gzipped online snapshot of the SQLite database.")
+    backup_parser.add_argument("destination", type=Path)
+    backup_parser.add_argument("--pages-per-step", type=int, default=BACKUP_PAGES_PER_STEP)
+    backup_parser.add_argument("--pause-seconds", type=float, default=BACKUP_STEP_PAUSE_SECONDS)
+    backup_parser.set_defaults(handler=_backup_sqlite)
+
+    restore_parser = subparsers.add_parser("restore-sqlite", help="Replace the SQLite database with a snapshot. Stop the API first.")
+    restore_parser.add_argument("snapshot", type=Path)
+    restore_parser.add_argument("--target", type=Path, help="Defaults to the configured database file.")
+    restore_parser.add_argument("--force", action="store_true", help="Overwrite an existing target.")
+    # Restores migrate the snapshot itself, and must not open the target first.
+    restore_parser.set_defaults(handler=_restore_sqlite, migrate=False)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    if getattr(args, "migrate", True):
+        run_migrations(engine)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
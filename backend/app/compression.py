@@ -0,0 +1,232 @@
+import zlib
+
+from fastapi import Request, Response
+from starlette.concurrency import run_in_threadpool
+
+from .config import (
+    COMPRESSION_ENABLED,
+    COMPRESSION_ENCODINGS,
+    COMPRESSION_LEVELS,
+    COMPRESSION_MINIMUM_SIZE,
+    COMPRESSION_THREADPOOL_MINIMUM_SIZE,
+)
+
+# brotli and zstandard are optional; without them only gzip is offered.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_LEVELS = {"zstd": 3, "br": 4, "gzip": 6}
+COMPRESSIBLE_CONTENT_TYPES = (b"application/json", b"text/")
+
+
+def _gzip(body: bytes, level: int) -> bytes:
+    # wbits=31 writes a gzip header without the filename/mtime gzip.compress adds.
+    return zlib.compress(body, level, wbits=31)
+
+
+CODECS = {"gzip": _gzip}
+if brotli is not None:
+    CODECS["br"] = lambda body, level: brotli.compress(body, quality=level)
+if zstandard is not None:
+    CODECS["zstd"] = lambda body, level: zstandard.ZstdCompressor(level=level).compress(body)
+
+
+def _parse_accept_encoding(header: str) -> dict[str, float]:
+    qualities = {}
+    for part in header.split(","):
+        name, _, parameters = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        key, _, value = parameters.strip().partition("=")
+        if key.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        qualities[name] = quality
+    return qualities
+
+
+class ResponseCompressor:
+    # `encodings` is the server's order of preference; the client's q-values
+    # decide first and this order breaks ties.
+    def __init__(
+        self,
+        encodings: tuple[str, ...] = ("zstd", "br", "gzip"),
+        *,
+        minimum_size: int = 1024,
+        levels: dict[str, int] | None = None,
+        threadpool_minimum_size: int = 65536,
+    ):
+        self.encodings = tuple(encoding for encoding in encodings if encoding in CODECS)
+        self.minimum_size = minimum_size
+        self.threadpool_minimum_size = threadpool_minimum_size
+        self.levels = {**DEFAULT_LEVELS, **(levels or {})}
+
+    def negotiate(self, accept_encoding: str) -> str | None:
+        if not self.encodings or not accept_encoding:
+            return None
+        qualities = _parse_accept_encoding(accept_encoding)
+        best, best_quality = None, 0.0
+        for encoding in self.encodings:
+            quality = qualities.get(encoding, qualities.get("*", 0.0))
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def choose(self, accept_encoding: str, size: int) -> str | None:
+        if size < self.minimum_size:
+            return None
+        return self.negotiate(accept_encoding)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        return CODECS[encoding](body, self.levels[encoding])
+
+    async def compress_async(self, body: bytes, encoding: str) -> bytes:
+        # For callers on the event loop: small bodies compress faster than a
+        # thread hand-off, large ones would stall every other request.
+        if len(body) < self.threadpool_minimum_size:
+            return self.compress(body, encoding)
+        return await run_in_threadpool(self.compress, body, encoding)
+
+
+class CompressibleBody:
+    # A rendered response body that keeps each compressed form it has been
+    # served in. Caches store these, so a repeated hit is never compressed
+    # again; a race only means one redundant compression. `variant` blocks and
+    # is for sync endpoints, which already run in the threadpool; async code
+    # uses `variant_async`.
+    __slots__ = ("body", "_variants")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self._variants: dict[str, bytes] = {}
+
+    def variant(self, compressor: ResponseCompressor, encoding: str) -> bytes:
+        compressed = self._variants.get(encoding)
+        if compressed is None:
+            compressed = compressor.compress(self.body, encoding)
+            self._variants[encoding] = compressed
+        return compressed
+
+    async def variant_async(self, compressor: ResponseCompressor, encoding: str) -> bytes:
+        compressed = self._variants.get(encoding)
+        if compressed is None:
+            compressed = await compressor.compress_async(self.body, encoding)
+            self._variants[encoding] = compressed
+        return compressed
+
+
+response_compressor = ResponseCompressor(
+    COMPRESSION_ENCODINGS if COMPRESSION_ENABLED else (),
+    minimum_size=COMPRESSION_MINIMUM_SIZE,
+    levels=COMPRESSION_LEVELS,
+    threadpool_minimum_size=COMPRESSION_THREADPOOL_MINIMUM_SIZE,
+)
+
+
+def compressed_response(
+    request: Request,
+    payload: CompressibleBody,
+    media_type: str = "application/json",
+    compressor: ResponseCompressor = response_compressor,
+) -> Response:
+    headers = {"vary": "Accept-Encoding"}
+    encoding = compressor.choose(request.headers.get("accept-encoding", ""), len(payload.body))
+    if encoding is not None:
+        compressed = payload.variant(compressor, encoding)
+        if len(compressed) < len(payload.body):
+            return Response(compressed, media_type=media_type, headers={**headers, "content-encoding": encoding})
+    return Response(payload.body, media_type=media_type, headers=headers)
+
+
+def _header(headers, name: bytes) -> bytes | None:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _with_vary(headers: list[tuple[bytes, bytes]]) -> list[tuple[bytes, bytes]]:
+    vary = _header(headers, b"vary")
+    if vary is None:
+        return [*headers, (b"vary", b"Accept-Encoding")]
+    if b"accept-encoding" in vary.lower() or vary.strip() == b"*":
+        return headers
+    return [(key, value) for key, value in headers if key.lower() != b"vary"] + [(b"vary", vary + b", Accept-Encoding")]
+
+
+class CompressionMiddleware:
+    # Compresses complete JSON and text responses of at least `minimum_size`
+    # bytes with the best encoding the client accepts. Responses that already
+    # carry a Content-Encoding (such as precompressed cached views) and
+    # streamed responses pass through untouched.
+    def __init__(self, app, *, compressor: ResponseCompressor):
+        self.app = app
+        self.compressor = compressor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = (_header(scope.get("headers", ()), b"accept-encoding") or b"").decode("latin-1")
+        if self.compressor.negotiate(accept_encoding) is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def compressing_send(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                content_type = _header(headers, b"content-type") or b""
+                if _header(headers, b"content-encoding") is not None or not content_type.startswith(
+                    COMPRESSIBLE_CONTENT_TYPES
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                start = {**message, "headers": _with_vary(headers)}
+                return
+
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            encoding = self.compressor.choose(accept_encoding, len(body))
+            if encoding is not None:
+                compressed = await self.compressor.compress_async(body, encoding)
+                if len(compressed) < len(body):
+                    body = compressed
+                    start["headers"] = [
+                        *(item for item in start["headers"] if item[0].lower() != b"content-length"),
+                        (b"content-encoding", encoding.encode()),
+                        (b"content-length", str(len(body)).encode()),
+                    ]
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, compressing_send)
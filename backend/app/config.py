@@ -11,6 +11,16 @@ load_dotenv(ENV_PATH)
 
 APP_ENV = os.getenv("APP_ENV", "development").strip().lower()
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./task_tracking.db")
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+# gunicorn.conf.py migrates once in the master and names a lock file that
+# elects the worker running periodic maintenance.
+RUN_MIGRATIONS_ON_STARTUP = os.getenv("RUN_MIGRATIONS_ON_STARTUP", "true").strip().lower() in {"1", "true", "yes", "on"}
+MAINTENANCE_LOCK_PATH = os.getenv("MAINTENANCE_LOCK_PATH", "").strip()
+READY_MAX_POOL_USAGE = float(os.getenv("READY_MAX_POOL_USAGE", "0.9"))
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "wal").strip().lower()
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+BACKUP_STEP_PAUSE_SECONDS = float(os.getenv("BACKUP_STEP_PAUSE_SECONDS", "0.005"))
 raw_secret_key = os.getenv("SECRET_KEY", "").strip()
 
 if not raw_secret_key:
@@ -24,6 +34,50 @@ if raw_secret_key == "dev-secret-change-me" and APP_ENV not in {"development", "
 
 SECRET_KEY = raw_secret_key
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "480"))
+JWT_BACKEND = os.getenv("JWT_BACKEND", "jose").strip().lower()
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
 default_cors_origins = "http://localhost:5173,http://127.0.0.1:5173"
 
 CORS_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ORIGINS", default_cors_origins).split(",") if origin.strip()]
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "").strip()
+RATE_LIMIT_USER_CAPACITY = float(os.getenv("RATE_LIMIT_USER_CAPACITY", "120"))
+RATE_LIMIT_USER_REFILL_PER_SECOND = float(os.getenv("RATE_LIMIT_USER_REFILL_PER_SECOND", "20"))
+RATE_LIMIT_AUTH_CAPACITY = float(os.getenv("RATE_LIMIT_AUTH_CAPACITY", "10"))
+RATE_LIMIT_AUTH_REFILL_PER_SECOND = float(os.getenv("RATE_LIMIT_AUTH_REFILL_PER_SECOND", "0.2"))
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "64"))
+
+IDEMPOTENCY_ENABLED = os.getenv("IDEMPOTENCY_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+IDEMPOTENCY_STORE = os.getenv("IDEMPOTENCY_STORE", "").strip()
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+COMPRESSION_THREADPOOL_MINIMUM_SIZE = int(os.getenv("COMPRESSION_THREADPOOL_MINIMUM_SIZE", "65536"))
+COMPRESSION_ENCODINGS = tuple(
+    encoding.strip().lower() for encoding in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if encoding.strip()
+)
+COMPRESSION_LEVELS = {
+    encoding.strip().lower(): int(level)
+    for encoding, _, level in (item.partition(":") for item in os.getenv("COMPRESSION_LEVELS", "").split(","))
+    if encoding.strip() and level.strip()
+}
+
+TASK_EVENT_RETENTION_DAYS = int(os.getenv("TASK_EVENT_RETENTION_DAYS", "365"))
+TASK_EVENT_PARTITION_INTERVAL_SECONDS = int(os.getenv("TASK_EVENT_PARTITION_INTERVAL_SECONDS", "86400"))
+DASHBOARD_CACHE_TTL_SECONDS = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "0"))
+
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "30"))
+ARCHIVE_MODE = os.getenv("ARCHIVE_MODE", "archive").strip().lower()
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", "0"))
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+SCHEDULER_RELOAD_SECONDS = float(os.getenv("SCHEDULER_RELOAD_SECONDS", "30"))
+SCHEDULER_BATCH_SIZE = int(os.getenv("SCHEDULER_BATCH_SIZE", "1000"))
+
+if ARCHIVE_MODE not in {"archive", "delete"}:
+    raise RuntimeError("ARCHIVE_MODE must be either 'archive' or 'delete'.")
+
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
@@ -1,11 +1,26 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import QueuePool
 
-from .config import DATABASE_URL
+from .config import DATABASE_MAX_OVERFLOW, DATABASE_POOL_SIZE, DATABASE_URL, SQLITE_JOURNAL_MODE
 
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+if DATABASE_URL.startswith("sqlite"):
+    engine_options = {"connect_args": {"check_same_thread": False}}
+else:
+    # pool_pre_ping replaces connections a database restart or failover
+    # closed underneath an idle worker.
+    engine_options = {"pool_size": DATABASE_POOL_SIZE, "max_overflow": DATABASE_MAX_OVERFLOW, "pool_pre_ping": True}
+
+engine = create_engine(DATABASE_URL, **engine_options)
+
+if engine.dialect.name == "sqlite" and SQLITE_JOURNAL_MODE:
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_journal_mode(dbapi_connection, _):
+        # WAL lets readers, including online backups, run alongside writers.
+        dbapi_connection.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
 
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -16,3 +31,12 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def pool_usage(bind: Engine) -> tuple[int, int] | None:
+    # (checked out, capacity) for pools with a fixed capacity; None for pools
+    # such as SQLite's in-memory SingletonThreadPool that cannot saturate.
+    pool = bind.pool
+    if not isinstance(pool, QueuePool) or pool._max_overflow < 0:
+        return None
+    return pool.checkedout(), pool.size() + pool._max_overflow
@@ -1,15 +1,26 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
 
 from .auth import decode_access_token
+from .config import ADMIN_EMAILS
 from .database import get_db
-from .models import User
+from .models import Project, ProjectMember, ProjectRole, Task, User
 
 
 security = HTTPBearer(auto_error=False)
 
 
+def get_read_db(db: Session = Depends(get_db)) -> Session:
+    # Read-only endpoints share the request session (and its connection) but
+    # never flush or expire, and select plain column rows so nothing is added
+    # to the identity map.
+    db.autoflush = False
+    db.expire_on_commit = False
+    return db
+
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials | None = Depends(security),
     db: Session = Depends(get_db),
@@ -35,3 +46,80 @@ def get_current_user(
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User no longer exists.")
 
     return user
+
+
+def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    if current_user.email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Administrator access is required.")
+    return current_user
+
+
+ROLE_RANK = {ProjectRole.VIEWER: 0, ProjectRole.EDITOR: 1, ProjectRole.OWNER: 2}
+
+
+class ProjectAccess:
+    # Per-request ACL cache. Each project's role is one primary-key lookup on
+    # project_members, remembered for the rest of the request, so repeated
+    # checks (task, neighbours, assignee) never re-query or join for access.
+    def __init__(self, db: Session, user: User):
+        self.db = db
+        self.user = user
+        self._roles: dict[int, ProjectRole | None] = {}
+
+    def role_for(self, project_id: int) -> ProjectRole | None:
+        if project_id not in self._roles:
+            self._roles[project_id] = self.db.scalar(
+                select(ProjectMember.role).where(
+                    ProjectMember.user_id == self.user.id,
+                    ProjectMember.project_id == project_id,
+                )
+            )
+        return self._roles[project_id]
+
+    def require(self, project_id: int, minimum_role: ProjectRole, *, detail: str = "Project not found.") -> ProjectRole:
+        role = self.role_for(project_id)
+        # Non-members get a 404 so project ids do not leak.
+        if role is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+        if ROLE_RANK[role] < ROLE_RANK[minimum_role]:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"This action requires the {minimum_role.value} role on the project.",
+            )
+        return role
+
+    def get_project(self, project_id: int, minimum_role: ProjectRole = ProjectRole.VIEWER) -> Project:
+        self.require(project_id, minimum_role)
+        project = self.db.scalar(select(Project).where(Project.id == project_id, Project.deleted_at.is_(None)))
+        if not project:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found.")
+        return project
+
+    def get_task(
+        self,
+        task_id: int,
+        minimum_role: ProjectRole = ProjectRole.VIEWER,
+        *,
+        include_deleted: bool = False,
+    ) -> Task:
+        filters = [Task.id == task_id, Project.deleted_at.is_(None)]
+        if not include_deleted:
+            filters.append(Task.deleted_at.is_(None))
+
+        task = self.db.scalar(
+            select(Task)
+            .join(Project, Task.project_id == Project.id)
+            .where(*filters)
+            .options(joinedload(Task.project), joinedload(Task.assignee))
+        )
+        if not task:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found.")
+        self.require(task.project_id, minimum_role, detail="Task not found.")
+        return task
+
+
+def get_project_access(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> ProjectAccess:
+    return ProjectAccess(db, current_user)
@@ -0,0 +1,310 @@
+import asyncio
+import hashlib
+import importlib
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from .database import engine as default_engine
+from .models import IdempotencyRecord
+from .rate_limit import bearer_subject
+
+MAX_KEY_LENGTH = 255
+# Conflicts and throttling mean "try again", so a retry must not replay them;
+# 5xx responses are never stored for the same reason.
+RETRYABLE_STATUS_CODES = frozenset({409, 429})
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    fingerprint: str
+    status_code: int
+    headers: tuple[tuple[bytes, bytes], ...]
+    body: bytes
+
+
+class IdempotencyStore(ABC):
+    # Stores whose methods block on I/O are called from the threadpool.
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str) -> StoredResponse | None:
+        pass
+
+    @abstractmethod
+    def put(self, key: str, response: StoredResponse, ttl_seconds: float) -> None:
+        pass
+
+    def reset(self) -> None:
+        pass
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    def __init__(self, max_entries: int = 10_000, clock=time.monotonic):
+        self._entries: OrderedDict[str, tuple[float, StoredResponse]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        self._clock = clock
+
+    def get(self, key: str) -> StoredResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, response = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return response
+
+    def put(self, key: str, response: StoredResponse, ttl_seconds: float) -> None:
+        now = self._clock()
+        with self._lock:
+            self._entries[key] = (now + ttl_seconds, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+class DatabaseIdempotencyStore(IdempotencyStore):
+    # Shares stored responses across workers through the idempotency_keys
+    # table. Expired rows are swept every `prune_every` writes.
+    blocking = True
+
+    def __init__(self, engine: Engine | None = None, prune_every: int = 500, clock=_utcnow):
+        self.engine = engine or default_engine
+        self.prune_every = prune_every
+        self._clock = clock
+        self._writes = 0
+
+    def get(self, key: str) -> StoredResponse | None:
+        with self.engine.connect() as connection:
+            row = connection.execute(
+                select(
+                    IdempotencyRecord.fingerprint,
+                    IdempotencyRecord.status_code,
+                    IdempotencyRecord.headers,
+                    IdempotencyRecord.body,
+                ).where(IdempotencyRecord.key == key, IdempotencyRecord.expires_at > self._clock())
+            ).first()
+        if row is None:
+            return None
+        headers = tuple((name.encode("latin-1"), value.encode("latin-1")) for name, value in row.headers)
+        return StoredResponse(row.fingerprint, row.status_code, headers, row.body)
+
+    def put(self, key: str, response: StoredResponse, ttl_seconds: float) -> None:
+        now = self._clock()
+        try:
+            with self.engine.begin() as connection:
+                # Only an expired row may be replaced; a live one belongs to
+                # the request that stored it first.
+                connection.execute(
+                    delete(IdempotencyRecord).where(IdempotencyRecord.key == key, IdempotencyRecord.expires_at <= now)
+                )
+                connection.execute(
+                    insert(IdempotencyRecord).values(
+                        key=key,
+                        fingerprint=response.fingerprint,
+                        status_code=response.status_code,
+                        headers=[[name.decode("latin-1"), value.decode("latin-1")] for name, value in response.headers],
+                        body=response.body,
+                        expires_at=now + timedelta(seconds=ttl_seconds),
+                    )
+                )
+                self._writes += 1
+                if self._writes % self.prune_every == 0:
+                    connection.execute(delete(IdempotencyRecord).where(IdempotencyRecord.expires_at <= now))
+        except IntegrityError:
+            # Another worker stored the same key first; its response wins.
+            pass
+
+    def reset(self) -> None:
+        with self.engine.begin() as connection:
+            connection.execute(delete(IdempotencyRecord))
+
+
+def build_idempotency_store(dotted_path: str = "") -> IdempotencyStore:
+    # Same convention as RATE_LIMIT_STORE, e.g.
+    # "app.idempotency:DatabaseIdempotencyStore" for multi-worker deployments.
+    if not dotted_path:
+        return InMemoryIdempotencyStore()
+
+    module_name, _, class_name = dotted_path.partition(":")
+    store_class = getattr(importlib.import_module(module_name), class_name)
+    store = store_class()
+    if not isinstance(store, IdempotencyStore):
+        raise RuntimeError(f"{dotted_path} is not an IdempotencyStore.")
+    return store
+
+
+async def _send_error(send, status_code: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _replay(send, response: StoredResponse) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": response.status_code,
+            "headers": [*response.headers, (b"idempotent-replayed", b"true")],
+        }
+    )
+    await send({"type": "http.response.body", "body": response.body})
+
+
+def _idempotency_key(scope) -> str | None:
+    for name, value in scope.get("headers", ()):
+        if name == b"idempotency-key":
+            return value.decode("latin-1").strip()
+    return None
+
+
+class IdempotencyMiddleware:
+    # Retried writes carrying the same Idempotency-Key get the first
+    # response's bytes back from one store lookup, without touching the
+    # database session. Keys are scoped to the caller's JWT subject, and
+    # concurrent duplicates within a worker wait for the first request instead
+    # of running again.
+    def __init__(
+        self,
+        app,
+        store: IdempotencyStore,
+        *,
+        ttl_seconds: float,
+        methods: tuple[str, ...] = ("POST", "PUT", "PATCH", "DELETE"),
+        max_response_bytes: int = 256 * 1024,
+    ):
+        self.app = app
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.methods = methods
+        self.max_response_bytes = max_response_bytes
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in self.methods:
+            await self.app(scope, receive, send)
+            return
+
+        client_key = _idempotency_key(scope)
+        subject = bearer_subject(scope) if client_key else None
+        if not client_key or not subject:
+            await self.app(scope, receive, send)
+            return
+
+        if len(client_key) > MAX_KEY_LENGTH:
+            await _send_error(send, 400, f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters.")
+            return
+
+        body, receive = await self._buffer_request_body(receive)
+        fingerprint = hashlib.sha256(
+            b"\n".join([scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body])
+        ).hexdigest()
+        key = f"{subject}:{client_key}"
+
+        while True:
+            pending = self._in_flight.get(key)
+            if pending is None:
+                break
+            stored = await asyncio.shield(pending)
+            if stored is not None:
+                await self._replay_or_reject(send, stored, fingerprint)
+                return
+            # The first request produced nothing replayable; try again.
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        stored = None
+        try:
+            stored = await self._call_store(self.store.get, key)
+            if stored is not None:
+                await self._replay_or_reject(send, stored, fingerprint)
+                return
+            stored = await self._forward(scope, receive, send, fingerprint)
+            if stored is not None:
+                await self._call_store(self.store.put, key, stored, self.ttl_seconds)
+        finally:
+            del self._in_flight[key]
+            future.set_result(stored)
+
+    async def _call_store(self, method, *args):
+        if self.store.blocking:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
+
+    async def _replay_or_reject(self, send, stored: StoredResponse, fingerprint: str) -> None:
+        if stored.fingerprint != fingerprint:
+            await _send_error(send, 422, "Idempotency-Key was already used for a different request.")
+            return
+        await _replay(send, stored)
+
+    async def _buffer_request_body(self, receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+        replayed = False
+
+        async def replay_receive():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return body, replay_receive
+
+    async def _forward(self, scope, receive, send, fingerprint: str) -> StoredResponse | None:
+        status_code = 500
+        headers: list[tuple[bytes, bytes]] = []
+        chunks: list[bytes] = []
+        size = 0
+
+        async def capture(message):
+            nonlocal status_code, headers, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", ()))
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if size <= self.max_response_bytes:
+                    chunks.append(chunk)
+            await send(message)
+
+        await self.app(scope, receive, capture)
+
+        if status_code >= 500 or status_code in RETRYABLE_STATUS_CODES or size > self.max_response_bytes:
+            return None
+        return StoredResponse(fingerprint, status_code, tuple(headers), b"".join(chunks))
@@ -0,0 +1,31 @@
+import os
+
+
+class HostLeaderLock:
+    # Elects one process per host to run periodic maintenance. Under
+    # gunicorn every worker runs the app lifespan; the first to lock `path`
+    # holds it until it exits, and the OS then frees it for another worker's
+    # next tick. Without a path every process leads.
+    def __init__(self, path: str = ""):
+        self.path = path
+        self._fd: int | None = None
+
+    def acquire(self) -> bool:
+        if not self.path or self._fd is not None:
+            return True
+
+        import fcntl
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -1,19 +1,88 @@
+import asyncio
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
 
-from .config import CORS_ORIGINS
-from .database import engine
+from .archive import run_archive_job_periodically
+from .config import (
+    ARCHIVE_BATCH_SIZE,
+    ARCHIVE_INTERVAL_SECONDS,
+    ARCHIVE_MODE,
+    ARCHIVE_RETENTION_DAYS,
+    COMPRESSION_ENABLED,
+    CORS_ORIGINS,
+    IDEMPOTENCY_ENABLED,
+    IDEMPOTENCY_STORE,
+    IDEMPOTENCY_TTL_SECONDS,
+    MAINTENANCE_LOCK_PATH,
+    MAX_CONCURRENT_REQUESTS,
+    RATE_LIMIT_AUTH_CAPACITY,
+    RATE_LIMIT_AUTH_REFILL_PER_SECOND,
+    RATE_LIMIT_ENABLED,
+    RATE_LIMIT_STORE,
+    RATE_LIMIT_USER_CAPACITY,
+    RATE_LIMIT_USER_REFILL_PER_SECOND,
+    READY_MAX_POOL_USAGE,
+    RUN_MIGRATIONS_ON_STARTUP,
+    SCHEDULER_ENABLED,
+    TASK_EVENT_PARTITION_INTERVAL_SECONDS,
+)
+from .compression import CompressionMiddleware, response_compressor
+from .database import engine, get_db, pool_usage
+from .idempotency import IdempotencyMiddleware, build_idempotency_store
+from .leader import HostLeaderLock
 from .migrations import run_migrations
-from .routers import auth, projects, tasks
+from .rate_limit import LoadSheddingMiddleware, RateLimitMiddleware, build_rate_limit_store
+from .routers import admin, analytics, auth, dashboard, labels, projects, tasks
+from .scheduler import run_scheduler_periodically, task_scheduler
+from .task_events import run_partition_maintenance_periodically
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
-    run_migrations(engine)
+    if RUN_MIGRATIONS_ON_STARTUP:
+        run_migrations(engine)
+
+    # Archiving and partition upkeep run in one worker per host; each
+    # worker keeps its own scheduler, whose claims are already exclusive.
+    maintenance_leader = HostLeaderLock(MAINTENANCE_LOCK_PATH)
+    background_jobs = []
+    if ARCHIVE_INTERVAL_SECONDS > 0:
+        background_jobs.append(
+            asyncio.create_task(
+                run_archive_job_periodically(
+                    engine,
+                    ARCHIVE_INTERVAL_SECONDS,
+                    retention_days=ARCHIVE_RETENTION_DAYS,
+                    mode=ARCHIVE_MODE,
+                    batch_size=ARCHIVE_BATCH_SIZE,
+                    leader=maintenance_leader,
+                )
+            )
+        )
+    if engine.dialect.name == "postgresql" and TASK_EVENT_PARTITION_INTERVAL_SECONDS > 0:
+        background_jobs.append(
+            asyncio.create_task(
+                run_partition_maintenance_periodically(engine, TASK_EVENT_PARTITION_INTERVAL_SECONDS, maintenance_leader)
+            )
+        )
+    if SCHEDULER_ENABLED:
+        background_jobs.append(asyncio.create_task(run_scheduler_periodically(task_scheduler)))
+
     yield
 
+    # By now the server has stopped accepting connections and in-flight
+    # requests have finished, so pooled connections can be closed cleanly.
+    for job in background_jobs:
+        job.cancel()
+    await asyncio.gather(*background_jobs, return_exceptions=True)
+    maintenance_leader.release()
+    engine.dispose()
+
 
 app = FastAPI(
     title="ADHD Focus Tracking System API",
@@ -21,6 +90,34 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+rate_limit_store = build_rate_limit_store(RATE_LIMIT_STORE)
+idempotency_store = build_idempotency_store(IDEMPOTENCY_STORE)
+
+# Middleware added later wraps earlier middleware, so CORS stays outermost and
+# 429/503 rejections still carry the headers browsers need to read them.
+if RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        store=rate_limit_store,
+        user_capacity=RATE_LIMIT_USER_CAPACITY,
+        user_refill_per_second=RATE_LIMIT_USER_REFILL_PER_SECOND,
+        auth_capacity=RATE_LIMIT_AUTH_CAPACITY,
+        auth_refill_per_second=RATE_LIMIT_AUTH_REFILL_PER_SECOND,
+    )
+
+if MAX_CONCURRENT_REQUESTS > 0:
+    app.add_middleware(LoadSheddingMiddleware, max_concurrent_requests=MAX_CONCURRENT_REQUESTS)
+
+# Replays are answered before load shedding and rate limiting: a retry costs a
+# single store lookup.
+if IDEMPOTENCY_ENABLED:
+    app.add_middleware(IdempotencyMiddleware, store=idempotency_store, ttl_seconds=IDEMPOTENCY_TTL_SECONDS)
+
+# Compression wraps the idempotency store, which keeps identity bodies so a
+# replay is encoded for whatever the retrying client accepts.
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, compressor=response_compressor)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=CORS_ORIGINS,
@@ -32,8 +129,33 @@ app.add_middleware(
 app.include_router(auth.router)
 app.include_router(projects.router)
 app.include_router(tasks.router)
+app.include_router(labels.router)
+app.include_router(analytics.router)
+app.include_router(dashboard.router)
+app.include_router(admin.router)
 
 
 @app.get("/health", tags=["health"])
 def health_check():
     return {"status": "ok"}
+
+
+@app.get("/ready", tags=["health"])
+def readiness_check(db: Session = Depends(get_db)):
+    # Liveness stays on /health; this tells a load balancer whether the
+    # worker can serve traffic right now.
+    usage = pool_usage(db.get_bind())
+    if usage is not None:
+        checked_out, capacity = usage
+        if checked_out >= capacity * READY_MAX_POOL_USAGE:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database connection pool is saturated."
+            )
+
+    try:
+        db.execute(text("SELECT 1"))
+    except SQLAlchemyError as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database is unreachable.") from exc
+
+    checked_out, capacity = usage or (None, None)
+    return {"status": "ready", "pool": {"checked_out": checked_out, "capacity": capacity}}
@@ -1,9 +1,42 @@
 from datetime import UTC, datetime
 
-from sqlalchemy import inspect, text
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    UniqueConstraint,
+    inspect,
+    text,
+)
 from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateTable
 
 from .database import Base
+from .models import (
+    DUE_TASK_PREDICATE,
+    PENDING_DUE_TASK_PREDICATE,
+    ArchivedProject,
+    ArchivedTask,
+    IdempotencyRecord,
+    Label,
+    Project,
+    ProjectMember,
+    ProjectRole,
+    Task,
+    TaskClosure,
+    TaskDependency,
+    TaskEvent,
+    TaskLabel,
+    TaskStatusRollup,
+)
+from .ranking import evenly_spaced_keys
+from .task_events import create_postgres_task_events_table
 
 
 def _utcnow() -> datetime:
@@ -38,8 +71,50 @@ def _record_version(connection, version: str) -> None:
     )
 
 
+# The schema as first released, frozen here so later model changes cannot
+# alter what 0001 creates; every column and index added since is owned by
+# the migration that introduced it.
+INITIAL_SCHEMA = MetaData()
+
+Table(
+    "users",
+    INITIAL_SCHEMA,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String(255), unique=True, index=True, nullable=False),
+    Column("name", String(255), nullable=False),
+    Column("hashed_password", String(255), nullable=False),
+    Column("created_at", DateTime, nullable=False),
+)
+
+Table(
+    "projects",
+    INITIAL_SCHEMA,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String(255), nullable=False),
+    Column("description", Text, nullable=True),
+    Column("owner_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("created_at", DateTime, nullable=False),
+    Column("deleted_at", DateTime, nullable=True, index=True),
+    UniqueConstraint("owner_id", "name", name="uq_project_owner_name"),
+)
+
+Table(
+    "tasks",
+    INITIAL_SCHEMA,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String(255), nullable=False),
+    Column("description", Text, nullable=True),
+    Column("status", Enum("TODO", "IN_PROGRESS", "DONE", name="taskstatus"), nullable=False, index=True),
+    Column("project_id", Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("assignee_id", Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+    Column("deleted_at", DateTime, nullable=True, index=True),
+)
+
+
 def _migration_0001_initial_schema(connection) -> None:
-    Base.metadata.create_all(bind=connection)
+    INITIAL_SCHEMA.create_all(bind=connection)
 
 
 def _migration_0002_soft_delete_columns(connection) -> None:
@@ -56,9 +131,273 @@ def _migration_0002_soft_delete_columns(connection) -> None:
             connection.execute(text("ALTER TABLE tasks ADD COLUMN deleted_at TIMESTAMP NULL"))
 
 
+def _migration_0003_task_positions(connection) -> None:
+    inspector = inspect(connection)
+    task_columns = {column["name"] for column in inspector.get_columns("tasks")}
+    if "position" not in task_columns:
+        connection.execute(text("ALTER TABLE tasks ADD COLUMN position VARCHAR(255) NOT NULL DEFAULT ''"))
+
+    rows = connection.execute(
+        text("SELECT id, project_id FROM tasks WHERE position = '' ORDER BY project_id, created_at, id")
+    ).fetchall()
+    task_ids_by_project: dict[int, list[int]] = {}
+    for task_id, project_id in rows:
+        task_ids_by_project.setdefault(project_id, []).append(task_id)
+
+    for task_ids in task_ids_by_project.values():
+        connection.execute(
+            text("UPDATE tasks SET position = :position WHERE id = :task_id"),
+            [
+                {"position": position, "task_id": task_id}
+                for task_id, position in zip(task_ids, evenly_spaced_keys(len(task_ids)))
+            ],
+        )
+
+    connection.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_tasks_project_position ON tasks (project_id, position, id)")
+    )
+
+
+def _migration_0004_task_events(connection) -> None:
+    if connection.dialect.name == "postgresql":
+        create_postgres_task_events_table(connection)
+    else:
+        TaskEvent.__table__.create(bind=connection, checkfirst=True)
+
+
+def _migration_0005_task_status_rollups(connection) -> None:
+    inspector = inspect(connection)
+    task_columns = {column["name"] for column in inspector.get_columns("tasks")}
+    if "status_changed_at" not in task_columns:
+        connection.execute(text("ALTER TABLE tasks ADD COLUMN status_changed_at TIMESTAMP NULL"))
+        connection.execute(text("UPDATE tasks SET status_changed_at = updated_at"))
+
+    TaskStatusRollup.__table__.create(bind=connection, checkfirst=True)
+
+
+def _rebuild_sqlite_projects_without_unique_constraint(connection) -> None:
+    # SQLite cannot drop a table constraint, so the table is rebuilt. Foreign
+    # key enforcement is off on these connections, so tasks keep pointing at
+    # "projects" across the swap.
+    connection.execute(
+        text(
+            """
+            CREATE TABLE projects_rebuild (
+                id INTEGER NOT NULL,
+                name VARCHAR(255) NOT NULL,
+                description TEXT,
+                owner_id INTEGER NOT NULL,
+                created_at DATETIME NOT NULL,
+                deleted_at DATETIME,
+                PRIMARY KEY (id),
+                FOREIGN KEY(owner_id) REFERENCES users (id) ON DELETE CASCADE
+            )
+            """
+        )
+    )
+    connection.execute(
+        text(
+            """
+            INSERT INTO projects_rebuild (id, name, description, owner_id, created_at, deleted_at)
+            SELECT id, name, description, owner_id, created_at, deleted_at FROM projects
+            """
+        )
+    )
+    connection.execute(text("DROP TABLE projects"))
+    connection.execute(text("ALTER TABLE projects_rebuild RENAME TO projects"))
+    connection.execute(text("CREATE INDEX ix_projects_id ON projects (id)"))
+    connection.execute(text("CREATE INDEX ix_projects_owner_id ON projects (owner_id)"))
+    connection.execute(text("CREATE INDEX ix_projects_deleted_at ON projects (deleted_at)"))
+
+
+def _migration_0006_case_insensitive_active_project_names(connection) -> None:
+    if connection.dialect.name == "sqlite":
+        projects_sql = connection.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'projects'")
+        ).scalar_one()
+        if "uq_project_owner_name" in projects_sql:
+            _rebuild_sqlite_projects_without_unique_constraint(connection)
+    else:
+        connection.execute(text("ALTER TABLE projects DROP CONSTRAINT IF EXISTS uq_project_owner_name"))
+
+    connection.execute(
+        text(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS uq_projects_owner_active_name
+            ON projects (owner_id, lower(name))
+            WHERE deleted_at IS NULL
+            """
+        )
+    )
+
+
+def _migration_0007_archive_tables(connection) -> None:
+    ArchivedProject.__table__.create(bind=connection, checkfirst=True)
+    ArchivedTask.__table__.create(bind=connection, checkfirst=True)
+
+
+def _migration_0008_project_members(connection) -> None:
+    ProjectMember.__table__.create(bind=connection, checkfirst=True)
+    # Every existing project is shared with nobody yet: its owner becomes the
+    # only member. Roles are stored by enum name.
+    connection.execute(
+        text(
+            """
+            INSERT INTO project_members (user_id, project_id, role, created_at)
+            SELECT projects.owner_id, projects.id, :role, projects.created_at
+            FROM projects
+            WHERE NOT EXISTS (
+                SELECT 1 FROM project_members
+                WHERE project_members.user_id = projects.owner_id
+                AND project_members.project_id = projects.id
+            )
+            """
+        ),
+        {"role": ProjectRole.OWNER.name},
+    )
+
+
+def _migration_0009_idempotency_keys(connection) -> None:
+    IdempotencyRecord.__table__.create(bind=connection, checkfirst=True)
+
+
+def _migration_0010_labels(connection) -> None:
+    Label.__table__.create(bind=connection, checkfirst=True)
+    TaskLabel.__table__.create(bind=connection, checkfirst=True)
+
+
+def _migration_0011_subtasks_and_dependencies(connection) -> None:
+    inspector = inspect(connection)
+    task_columns = {column["name"] for column in inspector.get_columns("tasks")}
+    if "parent_id" not in task_columns:
+        connection.execute(
+            text("ALTER TABLE tasks ADD COLUMN parent_id INTEGER NULL REFERENCES tasks (id) ON DELETE SET NULL")
+        )
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_tasks_parent_id ON tasks (parent_id)"))
+
+    archived_task_columns = {column["name"] for column in inspector.get_columns("archived_tasks")}
+    if "parent_id" not in archived_task_columns:
+        connection.execute(text("ALTER TABLE archived_tasks ADD COLUMN parent_id INTEGER NULL"))
+
+    TaskClosure.__table__.create(bind=connection, checkfirst=True)
+    TaskDependency.__table__.create(bind=connection, checkfirst=True)
+
+    # Existing tasks are all top-level: each is only its own ancestor.
+    connection.execute(
+        text(
+            """
+            INSERT INTO task_closure (ancestor_id, descendant_id, depth)
+            SELECT id, id, 0 FROM tasks
+            WHERE NOT EXISTS (
+                SELECT 1 FROM task_closure
+                WHERE task_closure.ancestor_id = tasks.id AND task_closure.descendant_id = tasks.id
+            )
+            """
+        )
+    )
+
+
+def _migration_0012_task_filter_indexes(connection) -> None:
+    # GET /tasks walks tasks project by project; these serve status and
+    # assignee filters and return rows already ordered by updated_at.
+    connection.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_tasks_project_status_updated ON tasks (project_id, status, updated_at)")
+    )
+    connection.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_tasks_project_assignee_updated ON tasks (project_id, assignee_id, updated_at)"
+        )
+    )
+
+
+SCHEDULE_COLUMNS = (
+    ("due_at", "TIMESTAMP NULL"),
+    ("recurrence", "VARCHAR(16) NULL"),
+    ("reminded_at", "TIMESTAMP NULL"),
+)
+
+
+def _migration_0013_task_schedules(connection) -> None:
+    inspector = inspect(connection)
+    for table_name in ("tasks", "archived_tasks"):
+        existing_columns = {column["name"] for column in inspector.get_columns(table_name)}
+        for name, definition in SCHEDULE_COLUMNS:
+            if name not in existing_columns:
+                connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {name} {definition}"))
+
+    connection.execute(
+        text(f"CREATE INDEX IF NOT EXISTS ix_tasks_project_due ON tasks (project_id, due_at) WHERE {DUE_TASK_PREDICATE}")
+    )
+    connection.execute(
+        text(f"CREATE INDEX IF NOT EXISTS ix_tasks_due_pending ON tasks (due_at) WHERE {PENDING_DUE_TASK_PREDICATE}")
+    )
+
+
+def _migration_0014_sqlite_autoincrement_ids(connection) -> None:
+    # Without AUTOINCREMENT SQLite hands the highest id out again once that
+    # row is archived, and the new row inherits the old one's history.
+    # Postgres sequences never reuse ids. SQLite cannot add the keyword in
+    # place, so each table is rebuilt and its sequence starts past every
+    # archived id.
+    if connection.dialect.name != "sqlite":
+        return
+
+    # The copies live in scratch metadata that also holds the tables their
+    # foreign keys point at.
+    scratch = MetaData()
+    for table_name in ("users", "projects", "tasks"):
+        Base.metadata.tables[table_name].to_metadata(scratch)
+
+    for model, archive in ((Project, ArchivedProject), (Task, ArchivedTask)):
+        table_name = model.__tablename__
+        table_sql = connection.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": table_name}
+        ).scalar_one()
+        if "AUTOINCREMENT" in table_sql.upper():
+            continue
+
+        rebuilt = model.__table__.to_metadata(scratch, name=f"_{table_name}_rebuild")
+        connection.execute(CreateTable(rebuilt))
+        existing_columns = {column["name"] for column in inspect(connection).get_columns(table_name)}
+        column_list = ", ".join(column.name for column in model.__table__.columns if column.name in existing_columns)
+        connection.execute(
+            text(f"INSERT INTO {rebuilt.name} ({column_list}) SELECT {column_list} FROM {table_name}")
+        )
+        connection.execute(text(f"DROP TABLE {table_name}"))
+        connection.execute(text(f"ALTER TABLE {rebuilt.name} RENAME TO {table_name}"))
+        # The old table's indexes went with it, so the model's set is
+        # recreated as is.
+        for index in model.__table__.indexes:
+            index.create(bind=connection)
+
+        high_water = connection.execute(
+            text(
+                f"SELECT MAX(id) FROM (SELECT MAX(id) AS id FROM {table_name} "
+                f"UNION ALL SELECT MAX(id) FROM {archive.__tablename__})"
+            )
+        ).scalar()
+        connection.execute(text("DELETE FROM sqlite_sequence WHERE name = :name"), {"name": table_name})
+        connection.execute(
+            text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+            {"name": table_name, "seq": high_water or 0},
+        )
+
+
 MIGRATIONS = (
     ("0001_initial_schema", _migration_0001_initial_schema),
     ("0002_soft_delete_columns", _migration_0002_soft_delete_columns),
+    ("0003_task_positions", _migration_0003_task_positions),
+    ("0004_task_events", _migration_0004_task_events),
+    ("0005_task_status_rollups", _migration_0005_task_status_rollups),
+    ("0006_case_insensitive_active_project_names", _migration_0006_case_insensitive_active_project_names),
+    ("0007_archive_tables", _migration_0007_archive_tables),
+    ("0008_project_members", _migration_0008_project_members),
+    ("0009_idempotency_keys", _migration_0009_idempotency_keys),
+    ("0010_labels", _migration_0010_labels),
+    ("0011_subtasks_and_dependencies", _migration_0011_subtasks_and_dependencies),
+    ("0012_task_filter_indexes", _migration_0012_task_filter_indexes),
+    ("0013_task_schedules", _migration_0013_task_schedules),
+    ("0014_sqlite_autoincrement_ids", _migration_0014_sqlite_autoincrement_ids),
 )
 
 
@@ -1,7 +1,23 @@
 import enum
-from datetime import UTC, datetime
+from datetime import UTC, date, datetime
 
-from sqlalchemy import DateTime, Enum, ForeignKey, String, Text, UniqueConstraint
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Date,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    UniqueConstraint,
+    func,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .database import Base
@@ -17,13 +33,36 @@ class TaskStatus(str, enum.Enum):
     DONE = "done"
 
 
+class TaskEventType(str, enum.Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    MOVED = "moved"
+    DELETED = "deleted"
+    RESTORED = "restored"
+    REMINDED = "reminded"
+
+
+class TaskRecurrence(str, enum.Enum):
+    DAILY = "daily"
+    WEEKDAYS = "weekdays"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+
+
+class ProjectRole(str, enum.Enum):
+    OWNER = "owner"
+    EDITOR = "editor"
+    VIEWER = "viewer"
+
+
 class User(Base):
     __tablename__ = "users"
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
-    hashed_password: Mapped[str] = mapped_column(String(255), nullable=False)
+    # Only the login flow may read the hash; every other query leaves it unloaded.
+    hashed_password: Mapped[str] = mapped_column(String(255), nullable=False, deferred=True, deferred_raiseload=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=_utcnow, nullable=False)
 
     owned_projects = relationship("Project", back_populates="owner", cascade="all, delete-orphan")
@@ -32,7 +71,8 @@ class User(Base):
 
 class Project(Base):
     __tablename__ = "projects"
-    __table_args__ = (UniqueConstraint("owner_id", "name", name="uq_project_owner_name"),)
+    # Archived ids must never be handed out again; see migration 0014.
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -45,8 +85,63 @@ class Project(Base):
     tasks = relationship("Task", back_populates="project", cascade="all, delete-orphan")
 
 
+class ProjectMember(Base):
+    # Access-control list for projects. The (user_id, project_id) primary key
+    # serves both "which projects can this user see" and single-project checks.
+    __tablename__ = "project_members"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    project_id: Mapped[int] = mapped_column(
+        ForeignKey("projects.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    )
+    role: Mapped[ProjectRole] = mapped_column(Enum(ProjectRole, native_enum=False, length=16), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=_utcnow, nullable=False)
+
+    user = relationship("User")
+
+
+# Active project names are unique per owner regardless of case; soft-deleted
+# rows are excluded so a name can be reused after deletion.
+Index(
+    "uq_projects_owner_active_name",
+    Project.owner_id,
+    func.lower(Project.name),
+    unique=True,
+    sqlite_where=Project.deleted_at.is_(None),
+    postgresql_where=Project.deleted_at.is_(None),
+)
+
+
+DUE_TASK_PREDICATE = "deleted_at IS NULL AND due_at IS NOT NULL"
+PENDING_DUE_TASK_PREDICATE = f"{DUE_TASK_PREDICATE} AND reminded_at IS NULL"
+
+
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_project_position", "project_id", "position", "id"),
+        Index("ix_tasks_project_status_updated", "project_id", "status", "updated_at"),
+        Index("ix_tasks_project_assignee_updated", "project_id", "assignee_id", "updated_at"),
+        # Both indexes only hold live rows with a due date. The pending one
+        # shrinks as reminders fire, so the scheduler's range scan stays
+        # proportional to outstanding work rather than to the table.
+        Index(
+            "ix_tasks_project_due",
+            "project_id",
+            "due_at",
+            sqlite_where=text(DUE_TASK_PREDICATE),
+            postgresql_where=text(DUE_TASK_PREDICATE),
+        ),
+        Index(
+            "ix_tasks_due_pending",
+            "due_at",
+            sqlite_where=text(PENDING_DUE_TASK_PREDICATE),
+            postgresql_where=text(PENDING_DUE_TASK_PREDICATE),
+        ),
+        {"sqlite_autoincrement": True},
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -54,6 +149,15 @@ class Task(Base):
     status: Mapped[TaskStatus] = mapped_column(Enum(TaskStatus), default=TaskStatus.TODO, nullable=False, index=True)
     project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
     assignee_id: Mapped[int | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    parent_id: Mapped[int | None] = mapped_column(ForeignKey("tasks.id", ondelete="SET NULL"), nullable=True, index=True)
+    position: Mapped[str] = mapped_column(String(255), nullable=False, default="")
+    due_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # Only the newest instance of a routine carries its rule; the scheduler
+    # moves it forward when it creates the next instance.
+    recurrence: Mapped[TaskRecurrence | None] = mapped_column(
+        Enum(TaskRecurrence, native_enum=False, length=16), nullable=True
+    )
+    reminded_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=_utcnow, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime,
@@ -61,7 +165,130 @@ class Task(Base):
         onupdate=_utcnow,
         nullable=False,
     )
+    status_changed_at: Mapped[datetime | None] = mapped_column(DateTime, default=_utcnow, nullable=True)
     deleted_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True, index=True)
 
     project = relationship("Project", back_populates="tasks")
     assignee = relationship("User", back_populates="assigned_tasks")
+
+
+class TaskClosure(Base):
+    # One row per (ancestor, descendant) pair, including each task with
+    # itself at depth 0, so a whole subtree is one primary-key range scan.
+    __tablename__ = "task_closure"
+    __table_args__ = (Index("ix_task_closure_descendant", "descendant_id", "ancestor_id"),)
+
+    ancestor_id: Mapped[int] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id: Mapped[int] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class TaskDependency(Base):
+    # "task_id is blocked by blocked_by_id". Edges never form a cycle.
+    __tablename__ = "task_dependencies"
+    __table_args__ = (Index("ix_task_dependencies_blocked_by", "blocked_by_id", "task_id"),)
+
+    task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    blocked_by_id: Mapped[int] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=_utcnow, nullable=False)
+
+
+class Label(Base):
+    # Labels are personal: each user keeps their own vocabulary, even on tasks
+    # in projects shared with others.
+    __tablename__ = "labels"
+    __table_args__ = (UniqueConstraint("owner_id", "name", name="uq_labels_owner_name"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    owner_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    name: Mapped[str] = mapped_column(String(64), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=_utcnow, nullable=False)
+
+
+class TaskLabel(Base):
+    # The primary key answers "labels of this task"; ix_task_labels_label_task
+    # is the inverted index ("tasks with this label") used for filtering.
+    __tablename__ = "task_labels"
+    __table_args__ = (Index("ix_task_labels_label_task", "label_id", "task_id"),)
+
+    task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    label_id: Mapped[int] = mapped_column(ForeignKey("labels.id", ondelete="CASCADE"), primary_key=True)
+
+
+class TaskEvent(Base):
+    # Append-only history. task_id deliberately has no foreign key so history
+    # outlives the task row, and Postgres can range-partition the table.
+    __tablename__ = "task_events"
+    __table_args__ = (Index("ix_task_events_task_created", "task_id", "created_at"),)
+
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    task_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    actor_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    event_type: Mapped[TaskEventType] = mapped_column(Enum(TaskEventType, native_enum=False, length=32), nullable=False)
+    status: Mapped[TaskStatus] = mapped_column(Enum(TaskStatus, native_enum=False, length=32), nullable=False)
+    changes: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=_utcnow, nullable=False)
+
+
+class TaskStatusRollup(Base):
+    # Daily per-project counters maintained alongside every status transition,
+    # so analytics queries scale with days x projects instead of tasks.
+    __tablename__ = "task_status_rollups"
+
+    project_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    status: Mapped[TaskStatus] = mapped_column(Enum(TaskStatus, native_enum=False, length=32), primary_key=True)
+    entered_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    exited_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    dwell_seconds: Mapped[float] = mapped_column(Float, default=0, nullable=False)
+    wip_delta: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class ArchivedProject(Base):
+    # Cold storage for projects whose soft-delete retention window has passed.
+    __tablename__ = "archived_projects"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    owner_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, default=_utcnow, nullable=False)
+
+
+class ArchivedTask(Base):
+    # Mirrors every column of `tasks` so rows can be copied in either direction.
+    __tablename__ = "archived_tasks"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    title: Mapped[str] = mapped_column(String(255), nullable=False)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    status: Mapped[TaskStatus] = mapped_column(Enum(TaskStatus), nullable=False)
+    project_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    assignee_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    parent_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    position: Mapped[str] = mapped_column(String(255), nullable=False, default="")
+    due_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    recurrence: Mapped[TaskRecurrence | None] = mapped_column(
+        Enum(TaskRecurrence, native_enum=False, length=16), nullable=True
+    )
+    reminded_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    status_changed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, default=_utcnow, nullable=False)
+
+
+class IdempotencyRecord(Base):
+    # Stored responses for retried writes, shared by every API worker when the
+    # database idempotency store is configured.
+    __tablename__ = "idempotency_keys"
+
+    key: Mapped[str] = mapped_column(String(320), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[int] = mapped_column(Integer, nullable=False)
+    headers: Mapped[list] = mapped_column(JSON, nullable=False)
+    body: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
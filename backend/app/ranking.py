@@ -0,0 +1,57 @@
+# Lexicographic rank keys for manual task ordering.
+#
+# Keys are strings over a lowercase base-36 alphabet, which sorts identically
+# under SQLite's binary collation and the locale collations Postgres uses by
+# default. A key never ends in the lowest digit, so there is always room to
+# generate another key between any two distinct keys.
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+REBALANCE_KEY_LENGTH = 32
+
+
+def _digit(key: str | None, index: int, default: int) -> int:
+    if key is None or index >= len(key):
+        return default
+    return DIGITS.index(key[index])
+
+
+def key_between(lower: str | None, upper: str | None) -> str:
+    if lower is not None and upper is not None and lower >= upper:
+        raise ValueError("Lower rank key must sort before the upper rank key.")
+
+    prefix = []
+    index = 0
+    while True:
+        low_digit = _digit(lower, index, 0)
+        high_digit = _digit(upper, index, BASE)
+
+        if high_digit - low_digit > 1:
+            prefix.append(DIGITS[(low_digit + high_digit) // 2])
+            return "".join(prefix)
+
+        prefix.append(DIGITS[low_digit])
+        if low_digit < high_digit:
+            # The prefix now sorts below `upper`, so only `lower` still constrains us.
+            upper = None
+        index += 1
+
+
+def evenly_spaced_keys(count: int) -> list[str]:
+    width = 1
+    while BASE**width < 2 * (count + 1):
+        width += 1
+
+    step = BASE**width // (count + 1)
+    keys = []
+    for offset in range(1, count + 1):
+        value = offset * step
+        if value % BASE == 0:
+            value += 1
+
+        digits = []
+        for _ in range(width):
+            value, remainder = divmod(value, BASE)
+            digits.append(DIGITS[remainder])
+        keys.append("".join(reversed(digits)))
+    return keys
@@ -0,0 +1,170 @@
+import importlib
+import json
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from .auth import decode_access_token
+
+
+class RateLimitStore(ABC):
+    @abstractmethod
+    def consume(self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0) -> float:
+        """Take `cost` tokens from the bucket for `key`.
+
+        Returns 0 when the request is admitted, otherwise the number of seconds
+        until enough tokens will have refilled.
+        """
+
+    def reset(self) -> None:
+        pass
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    def __init__(self, max_keys: int = 100_000, clock=time.monotonic):
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+        self._clock = clock
+
+    def consume(self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0) -> float:
+        now = self._clock()
+
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                retry_after = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                retry_after = (cost - tokens) / refill_per_second if refill_per_second > 0 else math.inf
+
+            if len(self._buckets) > self._max_keys:
+                self._evict_full_buckets(now, capacity, refill_per_second)
+
+        return retry_after
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def _evict_full_buckets(self, now: float, capacity: float, refill_per_second: float) -> None:
+        # A bucket that would have refilled completely carries no state worth keeping.
+        idle_seconds = capacity / refill_per_second if refill_per_second > 0 else math.inf
+        stale_keys = [key for key, (_, updated_at) in self._buckets.items() if now - updated_at >= idle_seconds]
+        for key in stale_keys:
+            del self._buckets[key]
+
+
+def build_rate_limit_store(dotted_path: str = "") -> RateLimitStore:
+    # Shared backends (Redis, memcached, ...) plug in as "package.module:ClassName".
+    if not dotted_path:
+        return InMemoryRateLimitStore()
+
+    module_name, _, class_name = dotted_path.partition(":")
+    store_class = getattr(importlib.import_module(module_name), class_name)
+    store = store_class()
+    if not isinstance(store, RateLimitStore):
+        raise RuntimeError(f"{dotted_path} is not a RateLimitStore.")
+    return store
+
+
+async def _send_rejection(send, status_code: int, detail: str, retry_after: float) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def bearer_subject(scope) -> str | None:
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return decode_access_token(token.strip())
+            return None
+    return None
+
+
+class RateLimitMiddleware:
+    def __init__(
+        self,
+        app,
+        store: RateLimitStore,
+        *,
+        user_capacity: float,
+        user_refill_per_second: float,
+        auth_capacity: float,
+        auth_refill_per_second: float,
+        exempt_paths: tuple[str, ...] = ("/health", "/ready"),
+        credential_paths: tuple[str, ...] = ("/auth/login", "/auth/register"),
+    ):
+        self.app = app
+        self.store = store
+        self.user_capacity = user_capacity
+        self.user_refill_per_second = user_refill_per_second
+        self.auth_capacity = auth_capacity
+        self.auth_refill_per_second = auth_refill_per_second
+        self.exempt_paths = exempt_paths
+        self.credential_paths = credential_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        client_host = scope["client"][0] if scope.get("client") else "unknown"
+
+        # Only endpoints that check a password get the strict per-IP bucket;
+        # authenticated ones such as /auth/me use the caller's own bucket.
+        if scope["path"] in self.credential_paths:
+            key = f"ip:auth:{client_host}"
+            capacity, refill = self.auth_capacity, self.auth_refill_per_second
+        else:
+            subject = bearer_subject(scope)
+            key = f"user:{subject}" if subject else f"ip:{client_host}"
+            capacity, refill = self.user_capacity, self.user_refill_per_second
+
+        retry_after = self.store.consume(key, capacity, refill)
+        if retry_after > 0:
+            await _send_rejection(send, 429, "Too many requests. Slow down and try again shortly.", retry_after)
+            return
+
+        await self.app(scope, receive, send)
+
+
+class LoadSheddingMiddleware:
+    # Requests beyond the in-flight limit are rejected immediately instead of
+    # queueing behind the worker threadpool, which keeps tail latency bounded.
+    def __init__(self, app, *, max_concurrent_requests: int, exempt_paths: tuple[str, ...] = ("/health", "/ready")):
+        self.app = app
+        self.max_concurrent_requests = max_concurrent_requests
+        self.exempt_paths = exempt_paths
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if self.in_flight >= self.max_concurrent_requests:
+            await _send_rejection(send, 503, "The server is busy. Please retry shortly.", 1)
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
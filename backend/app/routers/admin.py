@@ -0,0 +1,157 @@
+from datetime import UTC, datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..analytics import RollupBatch
+from ..archive import restore_archived_project, restore_archived_task
+from ..auth import token_cache
+from ..backup import stream_compressed_snapshot
+from ..cache import invalidate_project_views
+from ..config import BACKUP_PAGES_PER_STEP, BACKUP_STEP_PAUSE_SECONDS
+from ..database import get_db
+from ..dependencies import get_current_admin
+from ..models import ArchivedProject, ArchivedTask, Project, Task, TaskEvent, TaskEventType, User
+from ..schemas import ArchivedProjectRead, ProjectRead, TaskRead
+from ..task_events import task_event_row
+
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _record_reactivated_tasks(db: Session, tasks, actor_id: int) -> None:
+    if not tasks:
+        return
+
+    restored_at = _utcnow()
+    db.execute(
+        insert(TaskEvent),
+        [task_event_row(task, TaskEventType.RESTORED, actor_id, created_at=restored_at) for task in tasks],
+    )
+    rollups = RollupBatch()
+    for task in tasks:
+        rollups.restored(task, restored_at)
+    rollups.flush(db)
+
+
+@router.get("/archive/projects", response_model=list[ArchivedProjectRead])
+def list_archived_projects(
+    owner_id: int | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    _: User = Depends(get_current_admin),
+):
+    query = select(ArchivedProject).order_by(ArchivedProject.archived_at.desc()).limit(limit)
+    if owner_id is not None:
+        query = query.where(ArchivedProject.owner_id == owner_id)
+    return [ArchivedProjectRead.model_validate(project) for project in db.scalars(query)]
+
+
+@router.post("/archive/projects/{project_id}/restore", response_model=ProjectRead)
+def restore_project_from_archive(
+    project_id: int,
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin),
+):
+    archived_project = db.get(ArchivedProject, project_id)
+    if not archived_project:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Archived project not found.")
+
+    # Ids reused before SQLite tables used AUTOINCREMENT belong to other rows now.
+    archived_task_ids = select(ArchivedTask.id).where(ArchivedTask.project_id == project_id)
+    if db.get(Project, project_id) or db.scalar(select(Task.id).where(Task.id.in_(archived_task_ids)).limit(1)):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The archived project's id, or one of its tasks' ids, now belongs to another row.",
+        )
+
+    try:
+        project, reactivated_tasks = restore_archived_project(db, archived_project)
+    except IntegrityError as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The owner already has an active project with that name.",
+        ) from exc
+
+    _record_reactivated_tasks(db, reactivated_tasks, current_admin.id)
+    restored_project = ProjectRead.model_validate(project)
+    db.commit()
+    invalidate_project_views(db, project.id)
+    return restored_project
+
+
+@router.post("/archive/tasks/{task_id}/restore", response_model=TaskRead)
+def restore_task_from_archive(
+    task_id: int,
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin),
+):
+    archived_task = db.get(ArchivedTask, task_id)
+    if not archived_task:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Archived task not found.")
+
+    project = db.scalar(
+        select(Project).where(Project.id == archived_task.project_id, Project.deleted_at.is_(None))
+    )
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Restore the task's project before restoring the task.",
+        )
+    if db.get(Task, task_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The archived task's id now belongs to another task.",
+        )
+
+    task = restore_archived_task(db, archived_task)
+    _record_reactivated_tasks(db, [task], current_admin.id)
+    restored_task = TaskRead.model_validate(task)
+    db.commit()
+    invalidate_project_views(db, project.id)
+    return restored_task
+
+
+@router.get("/token-cache")
+def token_cache_stats(_: User = Depends(get_current_admin)):
+    # Per-process counters; each worker reports its own cache.
+    return token_cache.stats()
+
+
+@router.get("/backup")
+def download_backup(
+    db: Session = Depends(get_db),
+    _: User = Depends(get_current_admin),
+):
+    # The snapshot is taken before the response starts, so a failed backup is
+    # a clean error rather than a truncated download.
+    try:
+        result, chunks = stream_compressed_snapshot(
+            db.get_bind(),
+            pages_per_step=BACKUP_PAGES_PER_STEP,
+            pause_seconds=BACKUP_STEP_PAUSE_SECONDS,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    except RuntimeError as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)) from exc
+
+    filename = f"focus-tracker-{_utcnow():%Y%m%dT%H%M%SZ}.db.gz"
+    return StreamingResponse(
+        chunks,
+        media_type="application/gzip",
+        headers={
+            "content-disposition": f'attachment; filename="{filename}"',
+            "x-backup-pages": str(result.pages),
+            "x-backup-steps": str(result.steps),
+            "x-backup-restarts": str(result.restarts),
+        },
+    )
@@ -0,0 +1,134 @@
+from datetime import UTC, date, datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..dependencies import get_current_user
+from ..models import Project, ProjectMember, TaskStatus, TaskStatusRollup, User
+from ..schemas import DailyCount, StatusCycleTime
+
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+DEFAULT_RANGE_DAYS = 30
+MAX_RANGE_DAYS = 366
+
+
+def _resolve_range(start: date | None, end: date | None) -> tuple[date, date]:
+    end = end or datetime.now(UTC).date()
+    start = start or end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must not be after end.")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date ranges are limited to {MAX_RANGE_DAYS} days.",
+        )
+    return start, end
+
+
+def _rollup_scope(user_id: int, project_id: int | None) -> list:
+    visible_projects = (
+        select(ProjectMember.project_id)
+        .join(Project, ProjectMember.project_id == Project.id)
+        .where(ProjectMember.user_id == user_id, Project.deleted_at.is_(None))
+    )
+    filters = [TaskStatusRollup.project_id.in_(visible_projects)]
+    if project_id is not None:
+        filters.append(TaskStatusRollup.project_id == project_id)
+    return filters
+
+
+def _daily_series(start: date, end: date, counts: dict[date, int]) -> list[DailyCount]:
+    return [
+        DailyCount(day=start + timedelta(days=offset), count=counts.get(start + timedelta(days=offset), 0))
+        for offset in range((end - start).days + 1)
+    ]
+
+
+@router.get("/throughput", response_model=list[DailyCount])
+def read_throughput(
+    project_id: int | None = Query(default=None),
+    start: date | None = Query(default=None),
+    end: date | None = Query(default=None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    start, end = _resolve_range(start, end)
+    rows = db.execute(
+        select(TaskStatusRollup.day, func.sum(TaskStatusRollup.entered_count))
+        .where(
+            *_rollup_scope(current_user.id, project_id),
+            TaskStatusRollup.status == TaskStatus.DONE,
+            TaskStatusRollup.day.between(start, end),
+        )
+        .group_by(TaskStatusRollup.day)
+    ).all()
+    return _daily_series(start, end, {day: int(total) for day, total in rows})
+
+
+@router.get("/cycle-time", response_model=list[StatusCycleTime])
+def read_cycle_time(
+    project_id: int | None = Query(default=None),
+    start: date | None = Query(default=None),
+    end: date | None = Query(default=None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    start, end = _resolve_range(start, end)
+    rows = db.execute(
+        select(
+            TaskStatusRollup.status,
+            func.sum(TaskStatusRollup.exited_count),
+            func.sum(TaskStatusRollup.dwell_seconds),
+        )
+        .where(*_rollup_scope(current_user.id, project_id), TaskStatusRollup.day.between(start, end))
+        .group_by(TaskStatusRollup.status)
+    ).all()
+    totals = {row_status: (int(exits or 0), float(seconds or 0)) for row_status, exits, seconds in rows}
+
+    results = []
+    for task_status in TaskStatus:
+        exits, seconds = totals.get(task_status, (0, 0.0))
+        results.append(
+            StatusCycleTime(
+                status=task_status,
+                transitions=exits,
+                average_seconds=seconds / exits if exits else None,
+            )
+        )
+    return results
+
+
+@router.get("/wip", response_model=list[DailyCount])
+def read_work_in_progress(
+    project_id: int | None = Query(default=None),
+    status_filter: TaskStatus = Query(default=TaskStatus.IN_PROGRESS, alias="status"),
+    start: date | None = Query(default=None),
+    end: date | None = Query(default=None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    start, end = _resolve_range(start, end)
+    scope = [*_rollup_scope(current_user.id, project_id), TaskStatusRollup.status == status_filter]
+
+    opening_count = db.scalar(
+        select(func.coalesce(func.sum(TaskStatusRollup.wip_delta), 0)).where(*scope, TaskStatusRollup.day < start)
+    )
+    deltas = dict(
+        db.execute(
+            select(TaskStatusRollup.day, func.sum(TaskStatusRollup.wip_delta))
+            .where(*scope, TaskStatusRollup.day.between(start, end))
+            .group_by(TaskStatusRollup.day)
+        ).all()
+    )
+
+    series = []
+    running_count = int(opening_count)
+    for offset in range((end - start).days + 1):
+        day = start + timedelta(days=offset)
+        running_count += int(deltas.get(day, 0))
+        series.append(DailyCount(day=day, count=running_count))
+    return series
@@ -0,0 +1,78 @@
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..cache import dashboard_cache
+from ..compression import CompressibleBody, compressed_response
+from ..dependencies import get_current_user, get_read_db
+from ..models import Task, TaskStatus, User
+from ..schemas import DashboardRead
+from .projects import accessible_projects_query
+from .tasks import TASK_READ_COLUMNS, attach_labels, task_row_to_dict
+
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+
+@router.get("", response_model=DashboardRead)
+def read_dashboard(
+    request: Request,
+    project_id: int | None = Query(default=None),
+    status_filter: TaskStatus | None = Query(default=None, alias="status"),
+    limit: int = Query(default=100, ge=1, le=500),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    cache_key = (project_id, status_filter, limit)
+    cached_body = dashboard_cache.get(current_user.id, cache_key)
+    if cached_body is not None:
+        return compressed_response(request, cached_body)
+
+    # Everything below runs on the request's single session/connection: one
+    # query each for projects, the first task page, and per-status counts.
+    projects = [row._asdict() for row in db.execute(accessible_projects_query(current_user.id))]
+
+    project_ids = {project["id"] for project in projects}
+    if project_id in project_ids:
+        selected_project_id = project_id
+    else:
+        selected_project_id = projects[0]["id"] if projects else None
+
+    tasks = []
+    status_counts = dict.fromkeys(TaskStatus, 0)
+    if selected_project_id is not None:
+        task_query = (
+            select(*TASK_READ_COLUMNS)
+            .outerjoin(User, Task.assignee_id == User.id)
+            .where(Task.project_id == selected_project_id, Task.deleted_at.is_(None))
+            .order_by(Task.updated_at.desc())
+            .limit(limit)
+        )
+        if status_filter is not None:
+            task_query = task_query.where(Task.status == status_filter)
+        tasks = attach_labels(db, current_user.id, [task_row_to_dict(row) for row in db.execute(task_query)])
+
+        status_counts.update(
+            db.execute(
+                select(Task.status, func.count())
+                .where(Task.project_id == selected_project_id, Task.deleted_at.is_(None))
+                .group_by(Task.status)
+            ).all()
+        )
+
+    body = CompressibleBody(
+        DashboardRead.model_validate(
+            {
+                "user": current_user,
+                "projects": projects,
+                "selected_project_id": selected_project_id,
+                "tasks": tasks,
+                "status_counts": status_counts,
+            }
+        )
+        .model_dump_json()
+        .encode()
+    )
+    # The cache entry keeps every compressed variant it is served in.
+    dashboard_cache.set(current_user.id, cache_key, body)
+    return compressed_response(request, body)
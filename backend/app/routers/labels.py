@@ -0,0 +1,78 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import and_, delete, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..cache import dashboard_cache
+from ..database import get_db
+from ..dependencies import get_current_user, get_read_db
+from ..models import Label, Project, ProjectMember, Task, TaskLabel, User
+from ..schemas import LabelCreate, LabelRead
+
+
+router = APIRouter(prefix="/labels", tags=["labels"])
+
+
+@router.get("", response_model=list[LabelRead])
+def list_labels(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    # Counts only include active tasks the user can still reach.
+    task_counts = (
+        select(TaskLabel.label_id, func.count().label("task_count"))
+        .join(Label, Label.id == TaskLabel.label_id)
+        .join(Task, Task.id == TaskLabel.task_id)
+        .join(
+            ProjectMember,
+            and_(ProjectMember.project_id == Task.project_id, ProjectMember.user_id == current_user.id),
+        )
+        .join(Project, Project.id == Task.project_id)
+        .where(Label.owner_id == current_user.id, Task.deleted_at.is_(None), Project.deleted_at.is_(None))
+        .group_by(TaskLabel.label_id)
+        .subquery()
+    )
+    rows = db.execute(
+        select(Label.id, Label.name, func.coalesce(task_counts.c.task_count, 0).label("task_count"))
+        .outerjoin(task_counts, task_counts.c.label_id == Label.id)
+        .where(Label.owner_id == current_user.id)
+        .order_by(Label.name)
+    )
+    return [row._asdict() for row in rows]
+
+
+@router.post("", response_model=LabelRead, status_code=status.HTTP_201_CREATED)
+def create_label(
+    payload: LabelCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    label = Label(owner_id=current_user.id, name=payload.name)
+    db.add(label)
+
+    try:
+        db.flush()
+    except IntegrityError as exc:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="You already have a label with that name.") from exc
+
+    created_label = LabelRead.model_validate(label)
+    db.commit()
+    return created_label
+
+
+@router.delete("/{label_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_label(
+    label_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    label = db.scalar(select(Label).where(Label.id == label_id, Label.owner_id == current_user.id))
+    if not label:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Label not found.")
+
+    # SQLite connections do not enforce the cascade, so links go explicitly.
+    db.execute(delete(TaskLabel).where(TaskLabel.label_id == label.id))
+    db.delete(label)
+    db.commit()
+    dashboard_cache.invalidate(current_user.id)
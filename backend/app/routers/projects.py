@@ -1,18 +1,39 @@
 from datetime import UTC, datetime
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func, select
+from sqlalchemy import and_, insert, select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
+from ..analytics import RollupBatch
+from ..cache import invalidate_project_views
 from ..database import get_db
-from ..dependencies import get_current_user
-from ..models import Project, Task, User
-from ..schemas import ProjectCreate, ProjectRead
+from ..dependencies import ProjectAccess, get_current_user, get_project_access, get_read_db
+from ..models import Project, ProjectMember, ProjectRole, Task, TaskEvent, TaskEventType, User
+from ..schemas import ProjectCreate, ProjectMemberCreate, ProjectMemberRead, ProjectMemberUpdate, ProjectRead
+from ..task_events import task_event_row
 
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
+PROJECT_READ_COLUMNS = (
+    Project.id,
+    Project.name,
+    Project.description,
+    Project.owner_id,
+    ProjectMember.role,
+    Project.created_at,
+)
+
+
+def accessible_projects_query(user_id: int):
+    return (
+        select(*PROJECT_READ_COLUMNS)
+        .join(ProjectMember, and_(ProjectMember.project_id == Project.id, ProjectMember.user_id == user_id))
+        .where(Project.deleted_at.is_(None))
+        .order_by(Project.created_at.desc())
+    )
+
 
 def _utcnow() -> datetime:
     return datetime.now(UTC).replace(tzinfo=None)
@@ -20,15 +41,10 @@ def _utcnow() -> datetime:
 
 @router.get("", response_model=list[ProjectRead])
 def list_projects(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    projects = db.scalars(
-        select(Project)
-        .where(Project.owner_id == current_user.id, Project.deleted_at.is_(None))
-        .order_by(Project.created_at.desc())
-    ).all()
-    return [ProjectRead.model_validate(project) for project in projects]
+    return [row._asdict() for row in db.execute(accessible_projects_query(current_user.id))]
 
 
 @router.post("", response_model=ProjectRead, status_code=status.HTTP_201_CREATED)
@@ -37,19 +53,8 @@ def create_project(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    existing_project = db.scalar(
-        select(Project).where(
-            Project.owner_id == current_user.id,
-            Project.deleted_at.is_(None),
-            func.lower(Project.name) == payload.name.lower(),
-        )
-    )
-    if existing_project:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="You already have a project with that name.",
-        )
-
+    # Case-insensitive uniqueness among active projects is enforced by the
+    # uq_projects_owner_active_name index, so the INSERT is the only check.
     project = Project(
         name=payload.name,
         description=payload.description,
@@ -58,7 +63,7 @@ def create_project(
     db.add(project)
 
     try:
-        db.commit()
+        db.flush()
     except IntegrityError as exc:
         db.rollback()
         raise HTTPException(
@@ -66,25 +71,21 @@ def create_project(
             detail="You already have a project with that name.",
         ) from exc
 
-    db.refresh(project)
-    return ProjectRead.model_validate(project)
+    db.add(ProjectMember(user_id=current_user.id, project_id=project.id, role=ProjectRole.OWNER))
+    created_project = ProjectRead.model_validate(project)
+    created_project.role = ProjectRole.OWNER
+    db.commit()
+    invalidate_project_views(db, project.id)
+    return created_project
 
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_project(
     project_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    access: ProjectAccess = Depends(get_project_access),
 ):
-    project = db.scalar(
-        select(Project).where(
-            Project.id == project_id,
-            Project.owner_id == current_user.id,
-            Project.deleted_at.is_(None),
-        )
-    )
-    if not project:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found.")
+    project = access.get_project(project_id, ProjectRole.OWNER)
 
     deleted_at = _utcnow()
     project.deleted_at = deleted_at
@@ -95,42 +96,43 @@ def delete_project(
     for task in active_tasks:
         task.deleted_at = deleted_at
 
+    if active_tasks:
+        db.execute(
+            insert(TaskEvent),
+            [task_event_row(task, TaskEventType.DELETED, access.user.id, created_at=deleted_at) for task in active_tasks],
+        )
+        rollups = RollupBatch()
+        for task in active_tasks:
+            rollups.deleted(task, deleted_at)
+        rollups.flush(db)
+
     db.add(project)
     db.commit()
+    invalidate_project_views(db, project.id)
 
 
 @router.post("/{project_id}/restore", response_model=ProjectRead)
 def restore_project(
     project_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    access: ProjectAccess = Depends(get_project_access),
 ):
-    project = db.scalar(
-        select(Project).where(
-            Project.id == project_id,
-            Project.owner_id == current_user.id,
-            Project.deleted_at.is_not(None),
-        )
-    )
+    access.require(project_id, ProjectRole.OWNER)
+    project = db.scalar(select(Project).where(Project.id == project_id, Project.deleted_at.is_not(None)))
     if not project:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found.")
 
-    active_duplicate = db.scalar(
-        select(Project).where(
-            Project.owner_id == current_user.id,
-            Project.deleted_at.is_(None),
-            Project.id != project.id,
-            func.lower(Project.name) == project.name.lower(),
-        )
-    )
-    if active_duplicate:
+    deleted_marker = project.deleted_at
+    project.deleted_at = None
+
+    try:
+        db.flush()
+    except IntegrityError as exc:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="A different active project already uses that name.",
-        )
-
-    deleted_marker = project.deleted_at
-    project.deleted_at = None
+        ) from exc
 
     if deleted_marker is not None:
         project_tasks = db.scalars(
@@ -139,7 +141,123 @@ def restore_project(
         for task in project_tasks:
             task.deleted_at = None
 
+        if project_tasks:
+            restored_at = _utcnow()
+            db.execute(
+                insert(TaskEvent),
+                [
+                    task_event_row(task, TaskEventType.RESTORED, access.user.id, created_at=restored_at)
+                    for task in project_tasks
+                ],
+            )
+            rollups = RollupBatch()
+            for task in project_tasks:
+                rollups.restored(task, restored_at)
+            rollups.flush(db)
+
     db.add(project)
     db.commit()
+    invalidate_project_views(db, project.id)
     db.refresh(project)
-    return ProjectRead.model_validate(project)
+    restored_project = ProjectRead.model_validate(project)
+    restored_project.role = ProjectRole.OWNER
+    return restored_project
+
+
+def _get_project_member(project_id: int, user_id: int, db: Session) -> ProjectMember:
+    member = db.scalar(
+        select(ProjectMember)
+        .where(ProjectMember.project_id == project_id, ProjectMember.user_id == user_id)
+        .options(joinedload(ProjectMember.user))
+    )
+    if not member:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project member not found.")
+    return member
+
+
+@router.get("/{project_id}/members", response_model=list[ProjectMemberRead])
+def list_project_members(
+    project_id: int,
+    db: Session = Depends(get_read_db),
+    access: ProjectAccess = Depends(get_project_access),
+):
+    access.get_project(project_id)
+    return db.scalars(
+        select(ProjectMember)
+        .where(ProjectMember.project_id == project_id)
+        .options(joinedload(ProjectMember.user))
+        .order_by(ProjectMember.created_at, ProjectMember.user_id)
+    ).all()
+
+
+@router.post("/{project_id}/members", response_model=ProjectMemberRead, status_code=status.HTTP_201_CREATED)
+def add_project_member(
+    project_id: int,
+    payload: ProjectMemberCreate,
+    db: Session = Depends(get_db),
+    access: ProjectAccess = Depends(get_project_access),
+):
+    access.get_project(project_id, ProjectRole.OWNER)
+
+    user = db.scalar(select(User).where(User.email == payload.email))
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
+
+    member = ProjectMember(user_id=user.id, project_id=project_id, role=payload.role)
+    db.add(member)
+
+    try:
+        db.flush()
+    except IntegrityError as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="That user is already a member of this project.",
+        ) from exc
+
+    member.user = user
+    created_member = ProjectMemberRead.model_validate(member)
+    db.commit()
+    invalidate_project_views(db, project_id)
+    return created_member
+
+
+@router.patch("/{project_id}/members/{user_id}", response_model=ProjectMemberRead)
+def update_project_member(
+    project_id: int,
+    user_id: int,
+    payload: ProjectMemberUpdate,
+    db: Session = Depends(get_db),
+    access: ProjectAccess = Depends(get_project_access),
+):
+    access.get_project(project_id, ProjectRole.OWNER)
+
+    member = _get_project_member(project_id, user_id, db)
+    if member.role == ProjectRole.OWNER:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The project owner's role cannot change.")
+
+    member.role = payload.role
+    updated_member = ProjectMemberRead.model_validate(member)
+    db.commit()
+    invalidate_project_views(db, project_id)
+    return updated_member
+
+
+@router.delete("/{project_id}/members/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+def remove_project_member(
+    project_id: int,
+    user_id: int,
+    db: Session = Depends(get_db),
+    access: ProjectAccess = Depends(get_project_access),
+):
+    # Owners manage the member list; any other member may leave on their own.
+    minimum_role = ProjectRole.VIEWER if user_id == access.user.id else ProjectRole.OWNER
+    access.get_project(project_id, minimum_role)
+
+    member = _get_project_member(project_id, user_id, db)
+    if member.role == ProjectRole.OWNER:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The project owner cannot be removed.")
+
+    db.delete(member)
+    db.commit()
+    invalidate_project_views(db, project_id, user_id)
@@ -1,93 +1,370 @@
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from sqlalchemy import and_, case, delete, func, insert, intersect, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
 
+from ..analytics import RollupBatch
+from ..cache import dashboard_cache, invalidate_project_views
 from ..database import get_db
-from ..dependencies import get_current_user
-from ..models import Project, Task, TaskStatus, User
-from ..schemas import TaskCreate, TaskRead, TaskUpdate
+from ..dependencies import ProjectAccess, get_current_user, get_project_access, get_read_db
+from ..models import (
+    Label,
+    Project,
+    ProjectMember,
+    ProjectRole,
+    Task,
+    TaskClosure,
+    TaskDependency,
+    TaskEvent,
+    TaskEventType,
+    TaskLabel,
+    TaskStatus,
+    User,
+)
+from ..ranking import REBALANCE_KEY_LENGTH, evenly_spaced_keys, key_between
+from ..scheduler import task_scheduler
+from ..schemas import (
+    TaskCreate,
+    TaskDependencyCreate,
+    TaskDependencyRead,
+    TaskHistoryPage,
+    TaskLabelsUpdate,
+    TaskMove,
+    TaskProgress,
+    TaskRead,
+    TaskUpdate,
+)
+from ..task_events import diff_changes, record_task_event, task_event_row
+from ..task_tree import (
+    creates_dependency_cycle,
+    is_in_subtree,
+    link_task,
+    lock_project_positions,
+    move_subtree,
+    next_position_in_project,
+    subtree_ids,
+)
 
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
+TRACKED_TASK_FIELDS = ("title", "description", "status", "assignee_id", "parent_id", "due_at", "recurrence")
+LABEL_LOOKUP_CHUNK_SIZE = 500
+
+# List endpoints select plain columns instead of hydrating Task/User objects.
+TASK_READ_COLUMNS = (
+    Task.id,
+    Task.title,
+    Task.description,
+    Task.status,
+    Task.project_id,
+    Task.assignee_id,
+    Task.parent_id,
+    Task.position,
+    Task.due_at,
+    Task.recurrence,
+    Task.created_at,
+    Task.updated_at,
+    User.email.label("assignee_email"),
+    User.name.label("assignee_name"),
+)
+TASK_SORT_COLUMNS = {
+    "updated_at": Task.updated_at,
+    "created_at": Task.created_at,
+    "position": Task.position,
+    "title": Task.title,
+}
+TASK_EVENT_READ_COLUMNS = (
+    TaskEvent.id,
+    TaskEvent.task_id,
+    TaskEvent.actor_id,
+    TaskEvent.event_type,
+    TaskEvent.status,
+    TaskEvent.changes,
+    TaskEvent.created_at,
+)
+
 
 def _utcnow() -> datetime:
     return datetime.now(UTC).replace(tzinfo=None)
 
 
-def _get_owned_project(project_id: int, user_id: int, db: Session) -> Project:
-    project = db.scalar(
-        select(Project).where(
-            Project.id == project_id,
-            Project.owner_id == user_id,
-            Project.deleted_at.is_(None),
+def _as_naive_utc(value: datetime) -> datetime:
+    # Timestamps are stored as naive UTC.
+    if value.tzinfo is not None:
+        value = value.astimezone(UTC).replace(tzinfo=None)
+    return value
+
+
+def _check_assignee(assignee_id: int | None, project_id: int, access: ProjectAccess, db: Session) -> None:
+    if assignee_id is None or assignee_id == access.user.id:
+        return
+    is_member = db.scalar(
+        select(ProjectMember.user_id).where(
+            ProjectMember.user_id == assignee_id,
+            ProjectMember.project_id == project_id,
         )
     )
-    if not project:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found.")
-    return project
+    if is_member is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assignee is not a member of this project.")
+
+
+def task_row_to_dict(row) -> dict:
+    task = row._asdict()
+    assignee_email = task.pop("assignee_email")
+    assignee_name = task.pop("assignee_name")
+    task["assignee"] = (
+        {"id": task["assignee_id"], "email": assignee_email, "name": assignee_name}
+        if assignee_email is not None
+        else None
+    )
+    return task
 
 
-def _get_owned_task(task_id: int, user_id: int, db: Session, *, include_deleted: bool = False) -> Task:
-    filters = [Task.id == task_id, Project.owner_id == user_id, Project.deleted_at.is_(None)]
-    if not include_deleted:
-        filters.append(Task.deleted_at.is_(None))
+def attach_labels(db: Session, user_id: int, tasks: list[dict]) -> list[dict]:
+    # One primary-key probe of task_labels per task, in chunks that stay well
+    # under the bind-parameter limits of every supported database.
+    task_ids = [task["id"] for task in tasks]
+    names_by_task: dict[int, list[str]] = {}
+    for start in range(0, len(task_ids), LABEL_LOOKUP_CHUNK_SIZE):
+        rows = db.execute(
+            select(TaskLabel.task_id, Label.name)
+            .join(Label, Label.id == TaskLabel.label_id)
+            .where(TaskLabel.task_id.in_(task_ids[start : start + LABEL_LOOKUP_CHUNK_SIZE]), Label.owner_id == user_id)
+            .order_by(Label.name)
+        )
+        for task_id, name in rows:
+            names_by_task.setdefault(task_id, []).append(name)
 
-    task = db.scalar(
-        select(Task)
-        .join(Project, Task.project_id == Project.id)
-        .where(*filters)
-        .options(joinedload(Task.project), joinedload(Task.assignee))
+    for task in tasks:
+        task["labels"] = names_by_task.get(task["id"], [])
+    return tasks
+
+
+def _read_task(db: Session, task: Task, user_id: int) -> TaskRead:
+    task_read = TaskRead.model_validate(task)
+    task_read.labels = attach_labels(db, user_id, [{"id": task.id}])[0]["labels"]
+    return task_read
+
+
+def _labelled_task_ids(label_ids: list[int], mode: str):
+    # Each branch is a range scan of ix_task_labels_label_task; "all" keeps
+    # only the task ids present in every scan.
+    per_label = [select(TaskLabel.task_id).where(TaskLabel.label_id == label_id) for label_id in label_ids]
+    if mode == "all" and len(per_label) > 1:
+        return intersect(*per_label)
+    return select(TaskLabel.task_id).where(TaskLabel.label_id.in_(label_ids))
+
+
+def _get_parent_task_id(parent_id: int, project_id: int, db: Session) -> int:
+    found = db.scalar(
+        select(Task.id).where(Task.id == parent_id, Task.project_id == project_id, Task.deleted_at.is_(None))
     )
-    if not task:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found.")
-    return task
+    if found is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Parent task not found in this project.")
+    return found
+
+
+def _set_subtree_deleted_at(db: Session, task: Task, current, new, actor_id: int) -> list[Task]:
+    # The whole subtree changes in one UPDATE; only rows still carrying
+    # `current` are touched, so subtasks deleted on their own stay deleted.
+    deleted_filter = Task.deleted_at.is_(None) if current is None else Task.deleted_at == current
+    in_subtree = (Task.id.in_(subtree_ids(task.id)), deleted_filter)
+    tasks = db.scalars(select(Task).where(*in_subtree)).all()
+    db.execute(update(Task).where(*in_subtree).values(deleted_at=new), execution_options={"synchronize_session": "fetch"})
+
+    changed_at = new or _utcnow()
+    event_type = TaskEventType.DELETED if new is not None else TaskEventType.RESTORED
+    db.execute(insert(TaskEvent), [task_event_row(item, event_type, actor_id, created_at=changed_at) for item in tasks])
+    rollups = RollupBatch()
+    for item in tasks:
+        if new is not None:
+            rollups.deleted(item, changed_at)
+        else:
+            rollups.restored(item, changed_at)
+    rollups.flush(db)
+    return tasks
+
+
+def _get_neighbor_position(task_id: int, project_id: int, db: Session) -> str:
+    position = db.scalar(
+        select(Task.position).where(
+            Task.id == task_id,
+            Task.project_id == project_id,
+            Task.deleted_at.is_(None),
+        )
+    )
+    if position is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Neighbor task not found in this project.")
+    return position
+
+
+def _respace_project_positions(db: Session, project_id: int) -> None:
+    task_ids = db.scalars(select(Task.id).where(Task.project_id == project_id).order_by(Task.position, Task.id)).all()
+    db.execute(
+        update(Task),
+        [{"id": task_id, "position": position} for task_id, position in zip(task_ids, evenly_spaced_keys(len(task_ids)))],
+    )
+
+
+def _rebalance_project_positions(bind: Engine, project_id: int) -> None:
+    with Session(bind=bind) as db:
+        _respace_project_positions(db, project_id)
+        db.commit()
 
 
 @router.get("", response_model=list[TaskRead])
 def list_tasks(
     project_id: int | None = Query(default=None),
-    status_filter: TaskStatus | None = Query(default=None, alias="status"),
-    db: Session = Depends(get_db),
+    statuses: list[TaskStatus] | None = Query(default=None, alias="status"),
+    assignee: str | None = Query(
+        default=None,
+        alias="assignee_id",
+        pattern=r"^(\d+|unassigned)$",
+        description="A user id, or `unassigned`.",
+    ),
+    created_after: datetime | None = Query(default=None),
+    created_before: datetime | None = Query(default=None),
+    updated_after: datetime | None = Query(default=None),
+    updated_before: datetime | None = Query(default=None),
+    sort: Literal["updated_at", "created_at", "position", "title"] = Query(default="updated_at"),
+    order: Literal["asc", "desc"] | None = Query(default=None, description="Defaults to desc for dates, asc otherwise."),
+    limit: int | None = Query(default=None, ge=1, le=500),
+    after: str | None = Query(default=None, description="Keyset cursor `{position}:{id}` for sort=position."),
+    labels: str | None = Query(default=None, description="Comma-separated label names."),
+    label_mode: Literal["any", "all"] = Query(default="any"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
+    # The membership primary key (user_id, project_id) yields the accessible
+    # projects; every filter below is a plain column predicate that the
+    # per-project composite indexes on tasks can serve.
     query = (
-        select(Task)
+        select(*TASK_READ_COLUMNS)
+        .join(
+            ProjectMember,
+            and_(ProjectMember.project_id == Task.project_id, ProjectMember.user_id == current_user.id),
+        )
         .join(Project, Task.project_id == Project.id)
+        .outerjoin(User, Task.assignee_id == User.id)
+        .where(Project.deleted_at.is_(None), Task.deleted_at.is_(None))
+    )
+
+    if project_id is not None:
+        query = query.where(Task.project_id == project_id)
+
+    if statuses:
+        query = query.where(Task.status.in_(set(statuses)))
+
+    if assignee == "unassigned":
+        query = query.where(Task.assignee_id.is_(None))
+    elif assignee is not None:
+        query = query.where(Task.assignee_id == int(assignee))
+
+    for column, lower, upper in (
+        (Task.created_at, created_after, created_before),
+        (Task.updated_at, updated_after, updated_before),
+    ):
+        if lower is not None:
+            query = query.where(column >= _as_naive_utc(lower))
+        if upper is not None:
+            query = query.where(column < _as_naive_utc(upper))
+
+    # An empty or all-blank value (`?labels=`) means no label filter.
+    label_names = {name.strip().lower() for name in (labels or "").split(",") if name.strip()}
+    if label_names:
+        label_ids = db.scalars(
+            select(Label.id).where(Label.owner_id == current_user.id, Label.name.in_(label_names))
+        ).all()
+        if not label_ids or (label_mode == "all" and len(label_ids) < len(label_names)):
+            return []
+        query = query.where(Task.id.in_(_labelled_task_ids(label_ids, label_mode)))
+
+    sort_column = TASK_SORT_COLUMNS[sort]
+    descending = (order or ("desc" if sort in {"updated_at", "created_at"} else "asc")) == "desc"
+    if descending:
+        query = query.order_by(sort_column.desc(), Task.id.desc())
+    else:
+        query = query.order_by(sort_column, Task.id)
+
+    if after is not None:
+        if sort != "position" or descending:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The after cursor is only supported with sort=position in ascending order.",
+            )
+        after_position, _, after_id = after.rpartition(":")
+        if not after_position or not after_id.isdigit():
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor.")
+        query = query.where(
+            or_(
+                Task.position > after_position,
+                and_(Task.position == after_position, Task.id > int(after_id)),
+            )
+        )
+
+    if limit is not None:
+        query = query.limit(limit)
+
+    return attach_labels(db, current_user.id, [task_row_to_dict(row) for row in db.execute(query)])
+
+
+@router.get("/upcoming", response_model=list[TaskRead])
+def list_upcoming_tasks(
+    project_id: int | None = Query(default=None),
+    within_hours: int = Query(default=168, ge=1, le=24 * 90),
+    include_overdue: bool = Query(default=False),
+    limit: int = Query(default=50, ge=1, le=500),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    # Per accessible project this is one range scan of the partial
+    # ix_tasks_project_due index, which holds only live tasks with a due date.
+    now = _utcnow()
+    query = (
+        select(*TASK_READ_COLUMNS)
+        .join(
+            ProjectMember,
+            and_(ProjectMember.project_id == Task.project_id, ProjectMember.user_id == current_user.id),
+        )
+        .join(Project, Task.project_id == Project.id)
+        .outerjoin(User, Task.assignee_id == User.id)
         .where(
-            Project.owner_id == current_user.id,
             Project.deleted_at.is_(None),
             Task.deleted_at.is_(None),
+            Task.due_at.is_not(None),
+            Task.due_at < now + timedelta(hours=within_hours),
+            Task.status != TaskStatus.DONE,
         )
-        .options(joinedload(Task.assignee))
-        .order_by(Task.updated_at.desc())
+        .order_by(Task.due_at, Task.id)
+        .limit(limit)
     )
 
     if project_id is not None:
         query = query.where(Task.project_id == project_id)
 
-    if status_filter is not None:
-        query = query.where(Task.status == status_filter)
+    if not include_overdue:
+        query = query.where(Task.due_at >= now)
 
-    tasks = db.scalars(query).all()
-    return [TaskRead.model_validate(task) for task in tasks]
+    return attach_labels(db, current_user.id, [task_row_to_dict(row) for row in db.execute(query)])
 
 
 @router.post("", response_model=TaskRead, status_code=status.HTTP_201_CREATED)
 def create_task(
     payload: TaskCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    access: ProjectAccess = Depends(get_project_access),
 ):
-    _get_owned_project(payload.project_id, current_user.id, db)
+    access.get_project(payload.project_id, ProjectRole.EDITOR)
 
     assignee_id = payload.assignee_id
-    if assignee_id is not None and assignee_id != current_user.id:
-        assignee = db.get(User, assignee_id)
-        if not assignee:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assignee not found.")
+    _check_assignee(assignee_id, payload.project_id, access, db)
+    if payload.parent_id is not None:
+        _get_parent_task_id(payload.parent_id, payload.project_id, db)
 
     task = Task(
         title=payload.title,
@@ -95,10 +372,22 @@ def create_task(
         status=payload.status,
         project_id=payload.project_id,
         assignee_id=assignee_id,
+        parent_id=payload.parent_id,
+        position=next_position_in_project(db, payload.project_id),
+        due_at=_as_naive_utc(payload.due_at) if payload.due_at is not None else None,
+        recurrence=payload.recurrence,
     )
     db.add(task)
+    db.flush()
+    link_task(db, task.id, task.parent_id)
+    record_task_event(db, task, TaskEventType.CREATED, access.user.id)
+    rollups = RollupBatch()
+    rollups.created(task, task.created_at)
+    rollups.flush(db)
     db.commit()
-    return TaskRead.model_validate(_get_owned_task(task.id, current_user.id, db))
+    invalidate_project_views(db, task.project_id)
+    task_scheduler.schedule(task.id, task.due_at)
+    return TaskRead.model_validate(access.get_task(task.id))
 
 
 @router.patch("/{task_id}", response_model=TaskRead)
@@ -106,9 +395,10 @@ def update_task(
     task_id: int,
     payload: TaskUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    access: ProjectAccess = Depends(get_project_access),
 ):
-    task = _get_owned_task(task_id, current_user.id, db)
+    task = access.get_task(task_id, ProjectRole.EDITOR)
+    before = {field: getattr(task, field) for field in TRACKED_TASK_FIELDS}
 
     update_data = payload.model_dump(exclude_unset=True)
 
@@ -118,45 +408,340 @@ def update_task(
     if "description" in update_data:
         task.description = update_data["description"]
 
-    if "status" in update_data and update_data["status"] is not None:
+    rollups = RollupBatch()
+    if "status" in update_data and update_data["status"] is not None and update_data["status"] != task.status:
+        changed_at = _utcnow()
+        previous_status, previous_since = task.status, task.status_changed_at or task.created_at
         task.status = update_data["status"]
+        task.status_changed_at = changed_at
+        rollups.status_changed(task, previous_status, previous_since, changed_at)
 
     if "assignee_id" in update_data:
         assignee_id = update_data["assignee_id"]
-        if assignee_id is not None and assignee_id != current_user.id:
-            assignee = db.get(User, assignee_id)
-            if not assignee:
-                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assignee not found.")
+        _check_assignee(assignee_id, task.project_id, access, db)
         task.assignee_id = assignee_id
 
+    if "parent_id" in update_data and update_data["parent_id"] != task.parent_id:
+        parent_id = update_data["parent_id"]
+        if parent_id is not None:
+            _get_parent_task_id(parent_id, task.project_id, db)
+            if is_in_subtree(db, task.id, parent_id):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A task cannot become a subtask of itself or of its own subtasks.",
+                )
+        move_subtree(db, task.id, parent_id)
+        task.parent_id = parent_id
+
+    # A new due date or rule makes the task pending for the scheduler again.
+    if "due_at" in update_data:
+        due_at = update_data["due_at"]
+        due_at = _as_naive_utc(due_at) if due_at is not None else None
+        if due_at != task.due_at:
+            task.due_at = due_at
+            task.reminded_at = None
+
+    if "recurrence" in update_data and update_data["recurrence"] != task.recurrence:
+        task.recurrence = update_data["recurrence"]
+        task.reminded_at = None
+
+    if task.recurrence is not None and task.due_at is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Recurring tasks need a due_at.")
+
+    changes = diff_changes(before, {field: getattr(task, field) for field in TRACKED_TASK_FIELDS})
+    if changes:
+        record_task_event(db, task, TaskEventType.UPDATED, access.user.id, changes)
+    rollups.flush(db)
+
+    db.add(task)
+    db.commit()
+    invalidate_project_views(db, task.project_id)
+    if task.reminded_at is None:
+        task_scheduler.schedule(task.id, task.due_at)
+    return _read_task(db, access.get_task(task.id), access.user.id)
+
+
+@router.post("/{task_id}/move", response_model=TaskRead)
+def move_task(
+    task_id: int,
+    payload: TaskMove,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    access: ProjectAccess = Depends(get_project_access),
+):
+    task = access.get_task(task_id, ProjectRole.EDITOR)
+    if task.id in {payload.after_task_id, payload.before_task_id}:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="A task cannot be moved next to itself.")
+
+    sibling_filters = [Task.project_id == task.project_id, Task.deleted_at.is_(None), Task.id != task.id]
+    lower = upper = None
+    lock_project_positions(db, task.project_id)
+
+    if payload.after_task_id is not None:
+        lower = _get_neighbor_position(payload.after_task_id, task.project_id, db)
+    if payload.before_task_id is not None:
+        upper = _get_neighbor_position(payload.before_task_id, task.project_id, db)
+
+    if payload.before_task_id is None:
+        upper = db.scalar(
+            select(Task.position).where(*sibling_filters, Task.position > lower).order_by(Task.position).limit(1)
+        )
+    elif payload.after_task_id is None:
+        lower = db.scalar(
+            select(Task.position)
+            .where(*sibling_filters, Task.position < upper)
+            .order_by(Task.position.desc())
+            .limit(1)
+        )
+
+    if lower is not None and upper is not None:
+        if lower > upper:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="after_task_id must come before before_task_id.",
+            )
+        if lower == upper:
+            # Neighbours sharing a key leave no room between them. They keep
+            # their listed (position, id) order when the project is respaced.
+            _respace_project_positions(db, task.project_id)
+            db.expire(task)
+            lower = _get_neighbor_position(payload.after_task_id, task.project_id, db)
+            upper = _get_neighbor_position(payload.before_task_id, task.project_id, db)
+
+    new_position = key_between(lower, upper)
+
+    record_task_event(db, task, TaskEventType.MOVED, access.user.id, {"position": [task.position, new_position]})
+    task.position = new_position
     db.add(task)
     db.commit()
-    return TaskRead.model_validate(_get_owned_task(task.id, current_user.id, db))
+    invalidate_project_views(db, task.project_id)
+
+    if len(new_position) >= REBALANCE_KEY_LENGTH:
+        background_tasks.add_task(_rebalance_project_positions, db.get_bind(), task.project_id)
+
+    return _read_task(db, access.get_task(task.id), access.user.id)
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_task(
     task_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    access: ProjectAccess = Depends(get_project_access),
 ):
-    task = _get_owned_task(task_id, current_user.id, db)
-    task.deleted_at = _utcnow()
-    db.add(task)
+    task = access.get_task(task_id, ProjectRole.EDITOR)
+    _set_subtree_deleted_at(db, task, None, _utcnow(), access.user.id)
     db.commit()
+    invalidate_project_views(db, task.project_id)
 
 
 @router.post("/{task_id}/restore", response_model=TaskRead)
 def restore_task(
     task_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    access: ProjectAccess = Depends(get_project_access),
 ):
-    task = _get_owned_task(task_id, current_user.id, db, include_deleted=True)
+    task = access.get_task(task_id, ProjectRole.EDITOR, include_deleted=True)
     if task.deleted_at is None:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Task is already active.")
+    if task.parent_id is not None:
+        parent_deleted_at = db.scalar(select(Task.deleted_at).where(Task.id == task.parent_id))
+        if parent_deleted_at is not None:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Restore the parent task first.")
+
+    # Subtasks deleted together with this task come back with it.
+    _set_subtree_deleted_at(db, task, task.deleted_at, None, access.user.id)
+    db.commit()
+    invalidate_project_views(db, task.project_id)
+    return _read_task(db, access.get_task(task.id), access.user.id)
+
+
+@router.put("/{task_id}/labels", response_model=TaskRead)
+def set_task_labels(
+    task_id: int,
+    payload: TaskLabelsUpdate,
+    db: Session = Depends(get_db),
+    access: ProjectAccess = Depends(get_project_access),
+):
+    # Labels are personal, so viewers may label shared tasks too; only the
+    # caller's own labels on the task are replaced.
+    task = access.get_task(task_id)
+    user_id = access.user.id
+
+    labels_by_name = {
+        label.name: label.id
+        for label in db.execute(
+            select(Label.id, Label.name).where(Label.owner_id == user_id, Label.name.in_(payload.labels))
+        )
+    }
+    missing_names = [name for name in payload.labels if name not in labels_by_name]
+    if missing_names:
+        created = db.execute(
+            insert(Label).returning(Label.id, Label.name),
+            [{"owner_id": user_id, "name": name} for name in missing_names],
+        )
+        labels_by_name.update({label.name: label.id for label in created})
+
+    wanted_ids = set(labels_by_name.values())
+    current_ids = set(
+        db.scalars(
+            select(TaskLabel.label_id)
+            .join(Label, Label.id == TaskLabel.label_id)
+            .where(TaskLabel.task_id == task.id, Label.owner_id == user_id)
+        )
+    )
+    if current_ids - wanted_ids:
+        db.execute(
+            delete(TaskLabel).where(TaskLabel.task_id == task.id, TaskLabel.label_id.in_(current_ids - wanted_ids))
+        )
+    if wanted_ids - current_ids:
+        db.execute(insert(TaskLabel), [{"task_id": task.id, "label_id": label_id} for label_id in wanted_ids - current_ids])
 
-    task.deleted_at = None
-    db.add(task)
     db.commit()
-    return TaskRead.model_validate(_get_owned_task(task.id, current_user.id, db))
+    dashboard_cache.invalidate(user_id)
+    return _read_task(db, access.get_task(task.id), user_id)
+
+
+@router.get("/{task_id}/subtree", response_model=list[TaskRead])
+def read_task_subtree(
+    task_id: int,
+    db: Session = Depends(get_read_db),
+    access: ProjectAccess = Depends(get_project_access),
+):
+    task = access.get_task(task_id)
+    rows = db.execute(
+        select(*TASK_READ_COLUMNS)
+        .join(TaskClosure, TaskClosure.descendant_id == Task.id)
+        .outerjoin(User, Task.assignee_id == User.id)
+        .where(TaskClosure.ancestor_id == task.id, Task.deleted_at.is_(None))
+        .order_by(TaskClosure.depth, Task.position, Task.id)
+    )
+    return attach_labels(db, access.user.id, [task_row_to_dict(row) for row in rows])
+
+
+@router.get("/{task_id}/progress", response_model=TaskProgress)
+def read_task_progress(
+    task_id: int,
+    db: Session = Depends(get_read_db),
+    access: ProjectAccess = Depends(get_project_access),
+):
+    task = access.get_task(task_id)
+    total, done = db.execute(
+        select(func.count(), func.coalesce(func.sum(case((Task.status == TaskStatus.DONE, 1), else_=0)), 0))
+        .join(TaskClosure, TaskClosure.descendant_id == Task.id)
+        .where(TaskClosure.ancestor_id == task.id, TaskClosure.depth > 0, Task.deleted_at.is_(None))
+    ).one()
+
+    # A task without subtasks is all-or-nothing.
+    if total:
+        percent_done = round(done * 100 / total, 1)
+    else:
+        percent_done = 100.0 if task.status == TaskStatus.DONE else 0.0
+    return {"task_id": task.id, "total": total, "done": done, "percent_done": percent_done}
+
+
+@router.get("/{task_id}/dependencies", response_model=list[TaskDependencyRead])
+def list_task_dependencies(
+    task_id: int,
+    db: Session = Depends(get_read_db),
+    access: ProjectAccess = Depends(get_project_access),
+):
+    task = access.get_task(task_id)
+    rows = db.execute(
+        select(TaskDependency.task_id, TaskDependency.blocked_by_id, TaskDependency.created_at)
+        .join(Task, Task.id == TaskDependency.blocked_by_id)
+        .where(TaskDependency.task_id == task.id, Task.deleted_at.is_(None))
+        .order_by(TaskDependency.created_at)
+    )
+    return [row._asdict() for row in rows]
+
+
+@router.post("/{task_id}/dependencies", response_model=TaskDependencyRead, status_code=status.HTTP_201_CREATED)
+def add_task_dependency(
+    task_id: int,
+    payload: TaskDependencyCreate,
+    db: Session = Depends(get_db),
+    access: ProjectAccess = Depends(get_project_access),
+):
+    task = access.get_task(task_id, ProjectRole.EDITOR)
+    if payload.blocked_by_id == task.id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="A task cannot block itself.")
+
+    blocker_project_id = db.scalar(
+        select(Task.project_id).where(Task.id == payload.blocked_by_id, Task.deleted_at.is_(None))
+    )
+    if blocker_project_id != task.project_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Blocking task not found in this project.")
+
+    if creates_dependency_cycle(db, task.id, payload.blocked_by_id):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="That dependency would create a cycle.")
+
+    dependency = TaskDependency(task_id=task.id, blocked_by_id=payload.blocked_by_id)
+    db.add(dependency)
+
+    try:
+        db.flush()
+    except IntegrityError as exc:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="That dependency already exists.") from exc
+
+    created_dependency = TaskDependencyRead.model_validate(dependency)
+    db.commit()
+    return created_dependency
+
+
+@router.delete("/{task_id}/dependencies/{blocked_by_id}", status_code=status.HTTP_204_NO_CONTENT)
+def remove_task_dependency(
+    task_id: int,
+    blocked_by_id: int,
+    db: Session = Depends(get_db),
+    access: ProjectAccess = Depends(get_project_access),
+):
+    task = access.get_task(task_id, ProjectRole.EDITOR)
+    removed = db.execute(
+        delete(TaskDependency).where(TaskDependency.task_id == task.id, TaskDependency.blocked_by_id == blocked_by_id)
+    )
+    if not removed.rowcount:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dependency not found.")
+    db.commit()
+
+
+@router.get("/{task_id}/history", response_model=TaskHistoryPage)
+def read_task_history(
+    task_id: int,
+    limit: int = Query(default=50, ge=1, le=200),
+    before: str | None = Query(default=None, description="Cursor returned as `next_cursor` by the previous page."),
+    db: Session = Depends(get_read_db),
+    access: ProjectAccess = Depends(get_project_access),
+):
+    # Access is checked on the task first, so the history query only ever
+    # touches this task's slice of the (task_id, created_at) index.
+    task = access.get_task(task_id, include_deleted=True)
+
+    query = (
+        select(*TASK_EVENT_READ_COLUMNS)
+        .where(TaskEvent.task_id == task.id)
+        .order_by(TaskEvent.created_at.desc(), TaskEvent.id.desc())
+        .limit(limit + 1)
+    )
+
+    if before is not None:
+        before_created_at, _, before_id = before.rpartition("_")
+        try:
+            cursor_created_at = datetime.fromisoformat(before_created_at)
+            cursor_id = int(before_id)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor.") from exc
+        query = query.where(
+            or_(
+                TaskEvent.created_at < cursor_created_at,
+                and_(TaskEvent.created_at == cursor_created_at, TaskEvent.id < cursor_id),
+            )
+        )
+
+    events = [row._asdict() for row in db.execute(query)]
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = f"{events[-1]['created_at'].isoformat()}_{events[-1]['id']}"
+
+    return {"items": events, "next_cursor": next_cursor}
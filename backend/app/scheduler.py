@@ -0,0 +1,237 @@
+import asyncio
+import calendar
+import heapq
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import insert, literal, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .analytics import RollupBatch
+from .cache import invalidate_project_views
+from .config import SCHEDULER_BATCH_SIZE, SCHEDULER_RELOAD_SECONDS
+from .database import engine as default_engine
+from .models import Task, TaskEventType, TaskLabel, TaskRecurrence, TaskStatus
+from .task_events import record_task_event
+from .task_tree import link_task, next_position_in_project
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SchedulerResult:
+    reminders: int = 0
+    created: int = 0
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _add_months(value: datetime, months: int) -> datetime:
+    month_index = value.year * 12 + value.month - 1 + months
+    year, month = month_index // 12, month_index % 12 + 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
+
+def next_occurrence(due_at: datetime, rule: TaskRecurrence, after: datetime) -> datetime:
+    # Steps are counted from the original due date so monthly routines keep
+    # their day of month. Occurrences missed while no scheduler ran are
+    # skipped rather than created as a backlog of stale copies.
+    step = 0
+    while True:
+        step += 1
+        if rule == TaskRecurrence.MONTHLY:
+            occurrence = _add_months(due_at, step)
+        elif rule == TaskRecurrence.WEEKLY:
+            occurrence = due_at + timedelta(weeks=step)
+        else:
+            occurrence = due_at + timedelta(days=step)
+        if occurrence <= after or (rule == TaskRecurrence.WEEKDAYS and occurrence.weekday() >= 5):
+            continue
+        return occurrence
+
+
+def _create_next_instance(db: Session, task: Task, rule: TaskRecurrence, due_at: datetime) -> Task:
+    parent_id = task.parent_id
+    if parent_id is not None:
+        parent_id = db.scalar(select(Task.id).where(Task.id == parent_id, Task.deleted_at.is_(None)))
+
+    instance = Task(
+        title=task.title,
+        description=task.description,
+        project_id=task.project_id,
+        assignee_id=task.assignee_id,
+        parent_id=parent_id,
+        position=next_position_in_project(db, task.project_id),
+        due_at=due_at,
+        recurrence=rule,
+    )
+    db.add(instance)
+    db.flush()
+    link_task(db, instance.id, parent_id)
+    db.execute(
+        insert(TaskLabel).from_select(
+            ["task_id", "label_id"],
+            select(literal(instance.id), TaskLabel.label_id).where(TaskLabel.task_id == task.id),
+        )
+    )
+    record_task_event(db, instance, TaskEventType.CREATED, None, {"recurrence_of": task.id})
+    rollups = RollupBatch()
+    rollups.created(instance, instance.created_at)
+    rollups.flush(db)
+    return instance
+
+
+def fire_due_task(engine: Engine, task_id: int, due_at: datetime, now: datetime | None = None) -> SchedulerResult:
+    now = now or _utcnow()
+    result = SchedulerResult()
+
+    with Session(engine) as db:
+        task = db.get(Task, task_id)
+        if task is None or task.due_at != due_at or task.reminded_at is not None or task.deleted_at is not None:
+            return result
+
+        # The conditional UPDATE is the claim. Every worker may hold the same
+        # entry in its heap, but only one of them matches the row; the others
+        # see a rowcount of 0 and move on. The rule moves to the new instance.
+        recurrence = task.recurrence
+        claimed = db.execute(
+            update(Task)
+            .where(
+                Task.id == task.id,
+                Task.due_at == due_at,
+                Task.reminded_at.is_(None),
+                Task.deleted_at.is_(None),
+                Task.recurrence.is_(None) if recurrence is None else Task.recurrence == recurrence,
+            )
+            .values(reminded_at=now, recurrence=None, updated_at=Task.updated_at),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        if not claimed:
+            db.rollback()
+            return result
+
+        if task.status != TaskStatus.DONE:
+            record_task_event(db, task, TaskEventType.REMINDED, None, {"due_at": due_at.isoformat()})
+            result.reminders += 1
+        if recurrence is not None:
+            _create_next_instance(db, task, recurrence, next_occurrence(due_at, recurrence, max(due_at, now)))
+            result.created += 1
+
+        db.commit()
+        invalidate_project_views(db, task.project_id)
+
+    return result
+
+
+class TaskScheduler:
+    # Keeps only the tasks due before the next reload in a min-heap, loaded
+    # with one range scan of the partial ix_tasks_due_pending index, so the
+    # cost per reload is bounded by `batch_size` however many tasks have due
+    # dates. Several workers can run a scheduler at once; fire_due_task makes
+    # sure each due task is handled exactly once.
+    def __init__(
+        self,
+        engine: Engine | None = None,
+        *,
+        reload_seconds: float = 30,
+        batch_size: int = 1000,
+        clock=_utcnow,
+    ):
+        self.engine = engine or default_engine
+        self.reload_seconds = reload_seconds
+        self.batch_size = batch_size
+        self._clock = clock
+        self._heap: list[tuple[datetime, int]] = []
+        self._reload_at: datetime | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def schedule(self, task_id: int, due_at: datetime | None) -> None:
+        # Lets the worker that saved a due date fire it without waiting for
+        # the next reload; other workers pick it up when they reload.
+        with self._lock:
+            if due_at is not None and self._reload_at is not None and due_at < self._reload_at:
+                heapq.heappush(self._heap, (due_at, task_id))
+
+    def load(self, now: datetime) -> None:
+        horizon = now + timedelta(seconds=self.reload_seconds)
+        with self.engine.connect() as connection:
+            rows = connection.execute(
+                select(Task.due_at, Task.id)
+                .where(
+                    Task.deleted_at.is_(None),
+                    Task.due_at.is_not(None),
+                    Task.reminded_at.is_(None),
+                    Task.due_at <= horizon,
+                )
+                .order_by(Task.due_at)
+                .limit(self.batch_size)
+            ).all()
+
+        with self._lock:
+            self._heap = [(due_at, task_id) for due_at, task_id in rows]
+            heapq.heapify(self._heap)
+            # A full batch may have left later rows behind; reload as soon as
+            # the last loaded entry is due.
+            self._reload_at = rows[-1].due_at if len(rows) == self.batch_size else horizon
+
+    def run_due(self, now: datetime) -> SchedulerResult:
+        result = SchedulerResult()
+        while True:
+            with self._lock:
+                if not self._heap or self._heap[0][0] > now:
+                    return result
+                due_at, task_id = heapq.heappop(self._heap)
+            try:
+                fired = fire_due_task(self.engine, task_id, due_at, now)
+            except Exception:
+                logger.exception("Firing due task %s failed.", task_id)
+                # The task stays pending; back off so it cannot spin.
+                with self._lock:
+                    self._reload_at = max(self._reload_at or now, now + timedelta(seconds=self.reload_seconds))
+                continue
+            result.reminders += fired.reminders
+            result.created += fired.created
+
+    def tick(self, now: datetime | None = None) -> SchedulerResult:
+        now = now or self._clock()
+        if self._reload_at is None or now >= self._reload_at:
+            self.load(now)
+        return self.run_due(now)
+
+    def seconds_until_next(self, now: datetime | None = None) -> float:
+        now = now or self._clock()
+        with self._lock:
+            wake_times = [self._reload_at or now]
+            if self._heap:
+                wake_times.append(self._heap[0][0])
+        return max(0.0, (min(wake_times) - now).total_seconds())
+
+    def reset(self) -> None:
+        with self._lock:
+            self._heap.clear()
+            self._reload_at = None
+
+
+task_scheduler = TaskScheduler(reload_seconds=SCHEDULER_RELOAD_SECONDS, batch_size=SCHEDULER_BATCH_SIZE)
+
+
+async def run_scheduler_periodically(scheduler: TaskScheduler, max_sleep_seconds: float = 1.0) -> None:
+    # Sleeps until the next due entry or reload, but wakes at least every
+    # `max_sleep_seconds` to notice entries added through schedule().
+    while True:
+        try:
+            result = await asyncio.to_thread(scheduler.tick)
+        except Exception:
+            logger.exception("Task scheduler tick failed.")
+        else:
+            if result.reminders or result.created:
+                logger.info("Sent %s reminders and created %s recurring tasks.", result.reminders, result.created)
+        await asyncio.sleep(min(scheduler.seconds_until_next(), max_sleep_seconds))
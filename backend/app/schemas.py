@@ -1,8 +1,8 @@
-from datetime import datetime
+from datetime import date, datetime
 
-from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator, model_validator
 
-from .models import TaskStatus
+from .models import ProjectRole, TaskEventType, TaskRecurrence, TaskStatus
 
 
 def _normalize_required_text(value: str, label: str, minimum_length: int = 2) -> str:
@@ -94,11 +94,90 @@ class ProjectCreate(ProjectBase):
 class ProjectRead(ProjectBase):
     id: int
     owner_id: int
+    role: ProjectRole | None = None
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class ProjectMemberCreate(BaseModel):
+    email: EmailStr
+    role: ProjectRole = ProjectRole.VIEWER
+
+    @field_validator("email")
+    @classmethod
+    def normalize_email(cls, value: EmailStr) -> str:
+        return str(value).strip().lower()
+
+    @field_validator("role")
+    @classmethod
+    def reject_owner_role(cls, value: ProjectRole) -> ProjectRole:
+        if value == ProjectRole.OWNER:
+            raise ValueError("A project has exactly one owner.")
+        return value
+
+
+class ProjectMemberUpdate(BaseModel):
+    role: ProjectRole
+
+    @field_validator("role")
+    @classmethod
+    def reject_owner_role(cls, value: ProjectRole) -> ProjectRole:
+        if value == ProjectRole.OWNER:
+            raise ValueError("A project has exactly one owner.")
+        return value
+
+
+class ProjectMemberRead(BaseModel):
+    user: UserSummary
+    role: ProjectRole
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+def _normalize_label_name(value: str) -> str:
+    normalized = value.strip().lower()
+    if not normalized:
+        raise ValueError("Label names must not be blank.")
+    if "," in normalized:
+        raise ValueError("Label names must not contain commas.")
+    return normalized
+
+
+class LabelCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=64)
+
+    @field_validator("name")
+    @classmethod
+    def normalize_name(cls, value: str) -> str:
+        return _normalize_label_name(value)
+
+
+class LabelRead(BaseModel):
+    id: int
+    name: str
+    task_count: int = 0
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TaskLabelsUpdate(BaseModel):
+    labels: list[str] = Field(default_factory=list, max_length=50)
+
+    @field_validator("labels")
+    @classmethod
+    def normalize_labels(cls, value: list[str]) -> list[str]:
+        names = []
+        for name in value:
+            normalized = _normalize_label_name(name)
+            if len(normalized) > 64:
+                raise ValueError("Label names must be at most 64 characters.")
+            if normalized not in names:
+                names.append(normalized)
+        return names
+
+
 class TaskBase(BaseModel):
     title: str = Field(min_length=2, max_length=255)
     description: str | None = Field(default=None, max_length=2000)
@@ -118,6 +197,15 @@ class TaskBase(BaseModel):
 class TaskCreate(TaskBase):
     project_id: int
     assignee_id: int | None = None
+    parent_id: int | None = None
+    due_at: datetime | None = None
+    recurrence: TaskRecurrence | None = None
+
+    @model_validator(mode="after")
+    def require_due_date_for_recurrence(self) -> "TaskCreate":
+        if self.recurrence is not None and self.due_at is None:
+            raise ValueError("Recurring tasks need a due_at.")
+        return self
 
 
 class TaskUpdate(BaseModel):
@@ -125,6 +213,9 @@ class TaskUpdate(BaseModel):
     description: str | None = Field(default=None, max_length=2000)
     status: TaskStatus | None = None
     assignee_id: int | None = None
+    parent_id: int | None = None
+    due_at: datetime | None = None
+    recurrence: TaskRecurrence | None = None
 
     @field_validator("title")
     @classmethod
@@ -139,12 +230,90 @@ class TaskUpdate(BaseModel):
         return _normalize_optional_text(value)
 
 
+class TaskMove(BaseModel):
+    after_task_id: int | None = None
+    before_task_id: int | None = None
+
+    @model_validator(mode="after")
+    def require_neighbor(self) -> "TaskMove":
+        if self.after_task_id is None and self.before_task_id is None:
+            raise ValueError("Provide after_task_id, before_task_id, or both.")
+        if self.after_task_id is not None and self.after_task_id == self.before_task_id:
+            raise ValueError("after_task_id and before_task_id must be different tasks.")
+        return self
+
+
 class TaskRead(TaskBase):
     id: int
     project_id: int
     assignee_id: int | None
+    parent_id: int | None = None
+    position: str
+    due_at: datetime | None = None
+    recurrence: TaskRecurrence | None = None
     assignee: UserSummary | None = None
+    labels: list[str] = Field(default_factory=list)
     created_at: datetime
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class TaskProgress(BaseModel):
+    task_id: int
+    total: int
+    done: int
+    percent_done: float
+
+
+class TaskDependencyCreate(BaseModel):
+    blocked_by_id: int
+
+
+class TaskDependencyRead(BaseModel):
+    task_id: int
+    blocked_by_id: int
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TaskEventRead(BaseModel):
+    id: int
+    task_id: int
+    actor_id: int | None
+    event_type: TaskEventType
+    status: TaskStatus
+    changes: dict | None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TaskHistoryPage(BaseModel):
+    items: list[TaskEventRead]
+    next_cursor: str | None = None
+
+
+class DailyCount(BaseModel):
+    day: date
+    count: int
+
+
+class StatusCycleTime(BaseModel):
+    status: TaskStatus
+    transitions: int
+    average_seconds: float | None
+
+
+class DashboardRead(BaseModel):
+    user: UserRead
+    projects: list[ProjectRead]
+    selected_project_id: int | None
+    tasks: list[TaskRead]
+    status_counts: dict[TaskStatus, int]
+
+
+class ArchivedProjectRead(ProjectRead):
+    deleted_at: datetime | None
+    archived_at: datetime
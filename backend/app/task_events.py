@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import re
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from .leader import HostLeaderLock
+from .models import Task, TaskEvent, TaskEventType
+
+PARTITION_NAME_PATTERN = re.compile(r"^task_events_p(\d{4})_(\d{2})$")
+PRUNE_BATCH_SIZE = 5000
+# Serialises partition DDL across API workers and the CLI.
+PARTITION_LOCK_KEY = 7_240_028
+TASK_EVENT_COLUMNS = "id, task_id, actor_id, event_type, status, changes, created_at"
+
+logger = logging.getLogger(__name__)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _month_start(value: datetime, months_ahead: int = 0) -> datetime:
+    month_index = value.year * 12 + value.month - 1 + months_ahead
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "value"):
+        return value.value
+    return value
+
+
+def task_event_row(
+    task: Task,
+    event_type: TaskEventType,
+    actor_id: int | None,
+    changes: dict | None = None,
+    created_at: datetime | None = None,
+) -> dict:
+    return {
+        "task_id": task.id,
+        "actor_id": actor_id,
+        "event_type": event_type,
+        "status": task.status,
+        "changes": changes,
+        "created_at": created_at or _utcnow(),
+    }
+
+
+def record_task_event(
+    db: Session,
+    task: Task,
+    event_type: TaskEventType,
+    actor_id: int | None,
+    changes: dict | None = None,
+) -> None:
+    db.add(TaskEvent(**task_event_row(task, event_type, actor_id, changes)))
+
+
+def diff_changes(before: dict, after: dict) -> dict:
+    return {
+        field: [_json_value(before[field]), _json_value(after[field])]
+        for field in after
+        if before[field] != after[field]
+    }
+
+
+def create_postgres_task_events_table(connection: Connection) -> None:
+    connection.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS task_events (
+                id BIGSERIAL,
+                task_id INTEGER NOT NULL,
+                actor_id INTEGER NULL,
+                event_type VARCHAR(32) NOT NULL,
+                status VARCHAR(32) NOT NULL,
+                changes JSON NULL,
+                created_at TIMESTAMP NOT NULL,
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+            """
+        )
+    )
+    connection.execute(text("CREATE TABLE IF NOT EXISTS task_events_default PARTITION OF task_events DEFAULT"))
+    connection.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_task_events_task_created ON task_events (task_id, created_at)")
+    )
+    ensure_task_event_partitions(connection)
+
+
+def _create_month_partition(connection: Connection, start: datetime, end: datetime) -> None:
+    name = f"task_events_p{start:%Y_%m}"
+    if connection.scalar(text("SELECT to_regclass(:name)"), {"name": name}) is not None:
+        return
+
+    create = text(
+        f"CREATE TABLE {name} PARTITION OF task_events "
+        f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+    )
+    in_month = "created_at >= :start AND created_at < :end"
+    bounds = {"start": start, "end": end}
+    stranded = connection.scalar(
+        text(f"SELECT EXISTS (SELECT 1 FROM task_events_default WHERE {in_month})"), bounds
+    )
+    if not stranded:
+        connection.execute(create)
+        return
+
+    # Postgres refuses a new partition while the default partition holds rows
+    # for its range, so those rows are moved across with the default detached.
+    connection.execute(text("ALTER TABLE task_events DETACH PARTITION task_events_default"))
+    connection.execute(create)
+    connection.execute(
+        text(
+            f"INSERT INTO {name} ({TASK_EVENT_COLUMNS}) "
+            f"SELECT {TASK_EVENT_COLUMNS} FROM task_events_default WHERE {in_month}"
+        ),
+        bounds,
+    )
+    connection.execute(text(f"DELETE FROM task_events_default WHERE {in_month}"), bounds)
+    connection.execute(text("ALTER TABLE task_events ATTACH PARTITION task_events_default DEFAULT"))
+
+
+def ensure_task_event_partitions(connection: Connection, months_ahead: int = 3, now: datetime | None = None) -> None:
+    if connection.dialect.name != "postgresql":
+        return
+
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+    now = now or _utcnow()
+    for offset in range(months_ahead + 1):
+        _create_month_partition(connection, _month_start(now, offset), _month_start(now, offset + 1))
+
+
+def maintain_task_event_partitions(engine: Engine, months_ahead: int = 3) -> None:
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as connection:
+        ensure_task_event_partitions(connection, months_ahead)
+
+
+async def run_partition_maintenance_periodically(
+    engine: Engine,
+    interval_seconds: int,
+    leader: HostLeaderLock | None = None,
+) -> None:
+    # Keeps monthly partitions created ahead of time, so events stop landing
+    # in the default partition once the window set up at migration runs out.
+    while True:
+        if leader is None or leader.acquire():
+            try:
+                await asyncio.to_thread(maintain_task_event_partitions, engine)
+            except Exception:
+                logger.exception("Creating upcoming task event partitions failed.")
+        await asyncio.sleep(interval_seconds)
+
+
+def _drop_expired_partitions(connection: Connection, cutoff: datetime) -> int:
+    partition_names = connection.execute(
+        text(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = 'task_events'
+            """
+        )
+    ).scalars()
+
+    dropped = 0
+    for name in partition_names:
+        match = PARTITION_NAME_PATTERN.match(name)
+        if not match:
+            continue
+        partition_end = _month_start(datetime(int(match.group(1)), int(match.group(2)), 1), 1)
+        if partition_end <= cutoff:
+            connection.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped += 1
+    return dropped
+
+
+def prune_task_events(engine: Engine, retention_days: int, now: datetime | None = None) -> int:
+    now = now or _utcnow()
+    cutoff = now - timedelta(days=retention_days)
+
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as connection:
+            ensure_task_event_partitions(connection, now=now)
+            _drop_expired_partitions(connection, cutoff)
+
+    # Whatever is left (SQLite, the default partition, or a partially expired
+    # month) is removed in short batches so writers are never blocked for long.
+    deleted = 0
+    while True:
+        with engine.begin() as connection:
+            expired_ids = select(TaskEvent.id).where(TaskEvent.created_at < cutoff).limit(PRUNE_BATCH_SIZE)
+            result = connection.execute(delete(TaskEvent).where(TaskEvent.id.in_(expired_ids)))
+        deleted += result.rowcount
+        if result.rowcount < PRUNE_BATCH_SIZE:
+            return deleted
@@ -0,0 +1,113 @@
+from sqlalchemy import delete, func, insert, literal, or_, select, true, update
+from sqlalchemy.orm import Session
+
+from .models import Project, Task, TaskClosure, TaskDependency
+from .ranking import key_between
+
+CLOSURE_COLUMNS = ("ancestor_id", "descendant_id", "depth")
+
+
+def lock_project_positions(db: Session, project_id: int) -> None:
+    # A no-op UPDATE of the project row holds Postgres' row lock, or SQLite's
+    # write lock, until commit, so concurrent writers to one project never
+    # derive a rank key from the same neighbours.
+    db.execute(
+        update(Project)
+        .where(Project.id == project_id)
+        .values(id=Project.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def next_position_in_project(db: Session, project_id: int) -> str:
+    lock_project_positions(db, project_id)
+    last_position = db.scalar(select(func.max(Task.position)).where(Task.project_id == project_id))
+    return key_between(last_position or None, None)
+
+
+def subtree_ids(task_id: int):
+    return select(TaskClosure.descendant_id).where(TaskClosure.ancestor_id == task_id)
+
+
+def is_in_subtree(db: Session, root_id: int, task_id: int) -> bool:
+    return (
+        db.scalar(
+            select(TaskClosure.depth).where(TaskClosure.ancestor_id == root_id, TaskClosure.descendant_id == task_id)
+        )
+        is not None
+    )
+
+
+def link_task(db: Session, task_id: int, parent_id: int | None) -> None:
+    # A new leaf inherits every ancestor row of its parent, one level deeper.
+    db.execute(insert(TaskClosure).values(ancestor_id=task_id, descendant_id=task_id, depth=0))
+    if parent_id is not None:
+        db.execute(
+            insert(TaskClosure).from_select(
+                CLOSURE_COLUMNS,
+                select(TaskClosure.ancestor_id, literal(task_id), TaskClosure.depth + 1).where(
+                    TaskClosure.descendant_id == parent_id
+                ),
+            )
+        )
+
+
+def move_subtree(db: Session, task_id: int, new_parent_id: int | None) -> None:
+    # Callers must reject a new parent inside the moved subtree first.
+    old_ancestor_ids = db.scalars(
+        select(TaskClosure.ancestor_id).where(TaskClosure.descendant_id == task_id, TaskClosure.depth > 0)
+    ).all()
+    if old_ancestor_ids:
+        db.execute(
+            delete(TaskClosure).where(
+                TaskClosure.ancestor_id.in_(old_ancestor_ids),
+                TaskClosure.descendant_id.in_(subtree_ids(task_id)),
+            )
+        )
+
+    if new_parent_id is not None:
+        ancestors = select(TaskClosure.ancestor_id, TaskClosure.depth).where(
+            TaskClosure.descendant_id == new_parent_id
+        ).subquery()
+        descendants = select(TaskClosure.descendant_id, TaskClosure.depth).where(
+            TaskClosure.ancestor_id == task_id
+        ).subquery()
+        db.execute(
+            insert(TaskClosure).from_select(
+                CLOSURE_COLUMNS,
+                select(
+                    ancestors.c.ancestor_id,
+                    descendants.c.descendant_id,
+                    ancestors.c.depth + descendants.c.depth + 1,
+                )
+                .select_from(ancestors)
+                .join(descendants, true()),
+            )
+        )
+
+
+def creates_dependency_cycle(db: Session, task_id: int, blocked_by_id: int) -> bool:
+    # One recursive query walks everything `blocked_by_id` already waits on;
+    # reaching `task_id` means the new edge would close a loop.
+    reachable = (
+        select(TaskDependency.blocked_by_id.label("task_id"))
+        .where(TaskDependency.task_id == blocked_by_id)
+        .cte("reachable", recursive=True)
+    )
+    reachable = reachable.union(
+        select(TaskDependency.blocked_by_id).join(reachable, TaskDependency.task_id == reachable.c.task_id)
+    )
+    return db.scalar(select(reachable.c.task_id).where(reachable.c.task_id == task_id).limit(1)) is not None
+
+
+def forget_tasks(connection, task_ids: list[int]) -> None:
+    # Used before tasks leave the hot table; SQLite does not enforce the
+    # cascades on these foreign keys.
+    connection.execute(
+        delete(TaskClosure).where(or_(TaskClosure.ancestor_id.in_(task_ids), TaskClosure.descendant_id.in_(task_ids)))
+    )
+    connection.execute(
+        delete(TaskDependency).where(
+            or_(TaskDependency.task_id.in_(task_ids), TaskDependency.blocked_by_id.in_(task_ids))
+        )
+    )
@@ -0,0 +1,19 @@
+import inspect
+
+from fastapi.params import Depends, Query
+
+from app.routers.tasks import list_tasks
+
+
+def call_list_tasks(db, user, **filters) -> list[dict]:
+    # Calling the endpoint function directly skips FastAPI's parameter
+    # resolution, so unspecified query parameters get their declared defaults.
+    arguments = {}
+    for name, parameter in inspect.signature(list_tasks).parameters.items():
+        default = parameter.default
+        if isinstance(default, Query):
+            arguments[name] = default.default
+        elif not isinstance(default, Depends):
+            arguments[name] = default
+    arguments.update(filters, db=db, current_user=user)
+    return list_tasks(**arguments)
@@ -0,0 +1,98 @@
+"""Compare the CPU cost of each response encoding with the bytes it saves.
+
+Bodies are GET /tasks pages serialized exactly as the API does. For every
+available encoding and level the script prints the compressed size, the time
+to compress, and the transfer time saved on a slow link. brotli and zstd rows
+only appear when those optional packages are installed. Run from the backend
+directory:
+
+    python -m benchmarks.compression --tasks 50 500 2000 --link-mbps 1.5
+"""
+
+import argparse
+import random
+import time
+from datetime import UTC, datetime, timedelta
+
+from pydantic import TypeAdapter
+
+from app.compression import CODECS, CompressibleBody, ResponseCompressor
+from app.models import TaskRecurrence, TaskStatus
+from app.schemas import TaskRead
+
+LEVELS = {"gzip": (1, 6, 9), "br": (1, 4, 6, 11), "zstd": (1, 3, 9, 19)}
+WORDS = "open blinds water plants sort mail stretch call pharmacy breathe tidy desk inbox laundry walk".split()
+
+
+def _task_page(count: int) -> bytes:
+    rng = random.Random(7)
+    now = datetime.now(UTC).replace(tzinfo=None)
+    tasks = []
+    for index in range(count):
+        assignee_id = rng.choice((None, 1, 2, 3))
+        tasks.append(
+            {
+                "id": index + 1,
+                "title": " ".join(rng.choices(WORDS, k=rng.randint(2, 6))).capitalize(),
+                "description": " ".join(rng.choices(WORDS, k=rng.randint(0, 30))) or None,
+                "status": rng.choice(list(TaskStatus)),
+                "project_id": rng.randint(1, 5),
+                "assignee_id": assignee_id,
+                "parent_id": None,
+                "position": f"{index:06d}i",
+                "due_at": now + timedelta(hours=rng.randint(1, 300)) if rng.random() < 0.3 else None,
+                "recurrence": TaskRecurrence.DAILY if rng.random() < 0.05 else None,
+                "assignee": {"id": assignee_id, "email": f"user{assignee_id}@example.com", "name": f"User {assignee_id}"}
+                if assignee_id
+                else None,
+                "labels": rng.sample(WORDS, rng.randint(0, 2)),
+                "created_at": now - timedelta(minutes=rng.randint(0, 100_000)),
+                "updated_at": now - timedelta(minutes=rng.randint(0, 1_000)),
+            }
+        )
+    adapter = TypeAdapter(list[TaskRead])
+    return adapter.dump_json(adapter.validate_python(tasks))
+
+
+def _time(function, repeat: int) -> float:
+    function()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, nargs="+", default=[50, 500, 2000])
+    parser.add_argument("--link-mbps", type=float, default=1.5, help="Client bandwidth used to value saved bytes.")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    bytes_per_ms = args.link_mbps * 1_000_000 / 8 / 1000
+
+    print(f"encodings available: {', '.join(CODECS)}")
+    print(f"{'tasks':>6} {'encoding':>9} {'size':>10} {'ratio':>6} {'cpu ms':>8} {'saved ms':>9} {'MB/s':>7}")
+    for count in args.tasks:
+        body = _task_page(count)
+        print(f"{count:>6} {'identity':>9} {len(body):>10} {1:>6.2f} {0:>8.3f} {0:>9.1f} {'':>7}")
+        for encoding in CODECS:
+            for level in LEVELS[encoding]:
+                compressor = ResponseCompressor((encoding,), levels={encoding: level})
+                compressed = compressor.compress(body, encoding)
+                cpu = _time(lambda: compressor.compress(body, encoding), args.repeat)
+                saved_ms = (len(body) - len(compressed)) / bytes_per_ms
+                print(
+                    f"{count:>6} {f'{encoding}-{level}':>9} {len(compressed):>10} {len(body) / len(compressed):>6.2f} "
+                    f"{cpu * 1000:>8.3f} {saved_ms:>9.1f} {len(body) / cpu / 1e6:>7.1f}"
+                )
+
+        # A cached view pays for compression once; later hits are a dict lookup.
+        cached = CompressibleBody(body)
+        default = ResponseCompressor(("gzip",))
+        cached.variant(default, "gzip")
+        hit = _time(lambda: cached.variant(default, "gzip"), args.repeat * 100)
+        print(f"{count:>6} {'cached':>9} gzip variant reuse: {hit * 1e6:.2f} us per hit")
+
+
+if __name__ == "__main__":
+    main()
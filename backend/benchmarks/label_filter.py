@@ -0,0 +1,119 @@
+"""Time GET /tasks label filters (any/all) against a large labelled task set.
+
+Run from the backend directory:
+
+    python -m benchmarks.label_filter --tasks 1000000 --labels 50
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.orm import Session
+
+from app.migrations import run_migrations
+from app.models import Label, Project, ProjectMember, ProjectRole, Task, TaskLabel, User
+from benchmarks.common import call_list_tasks
+
+BATCH_SIZE = 50_000
+
+
+def _seed(engine, task_count: int, label_count: int, project_count: int) -> User:
+    rng = random.Random(7)
+    with Session(engine, expire_on_commit=False) as db:
+        user = User(email="bench@example.com", name="Bench User", hashed_password="not-a-real-hash")
+        db.add(user)
+        db.flush()
+
+        projects = [Project(name=f"Project {index}", owner_id=user.id) for index in range(project_count)]
+        db.add_all(projects)
+        db.flush()
+        db.execute(
+            insert(ProjectMember),
+            [{"user_id": user.id, "project_id": project.id, "role": ProjectRole.OWNER} for project in projects],
+        )
+        labels = [Label(owner_id=user.id, name=f"label-{index}") for index in range(label_count)]
+        db.add_all(labels)
+        db.flush()
+        label_ids = [label.id for label in labels]
+        project_ids = [project.id for project in projects]
+
+        next_task_id = 1
+        for start in range(0, task_count, BATCH_SIZE):
+            size = min(BATCH_SIZE, task_count - start)
+            db.execute(
+                insert(Task),
+                [
+                    {"id": next_task_id + offset, "title": f"Task {start + offset}", "project_id": rng.choice(project_ids)}
+                    for offset in range(size)
+                ],
+            )
+            # Roughly a third of tasks carry one or two labels.
+            links = []
+            for offset in range(size):
+                if rng.random() < 0.35:
+                    for label_id in rng.sample(label_ids, rng.choice((1, 1, 2))):
+                        links.append({"task_id": next_task_id + offset, "label_id": label_id})
+            db.execute(insert(TaskLabel), links)
+            next_task_id += size
+        db.commit()
+        db.expunge(user)
+
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+    return user
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--labels", type=int, default=50)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{Path(directory) / 'bench.db'}")
+        run_migrations(engine)
+        started = time.perf_counter()
+        user = _seed(engine, args.tasks, args.labels, args.projects)
+        print(f"seeded {args.tasks} tasks in {time.perf_counter() - started:.1f}s")
+
+        def run(labels: str, mode: str) -> int:
+            with Session(engine) as db:
+                return len(call_list_tasks(db, user, limit=args.limit, labels=labels, label_mode=mode))
+
+        for labels, mode in (("label-1", "any"), ("label-1,label-2", "any"), ("label-1,label-2", "all")):
+            run(labels, mode)
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                rows = run(labels, mode)
+            elapsed = (time.perf_counter() - started) / args.repeat
+            print(f"{mode:>4} {labels:<16}: {elapsed * 1000:8.2f} ms ({rows} rows)")
+
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", capture)
+        run("label-1,label-2", "all")
+        event.remove(engine, "before_cursor_execute", capture)
+
+        # statements: label id lookup, the filtered page, then the label attach.
+        filter_statement, filter_parameters = statements[1]
+        with engine.connect() as connection:
+            plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {filter_statement}", filter_parameters).all()
+        print("query plan (all):")
+        for row in plan:
+            print(f"  {row[-1]}")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Check that every GET /tasks filter/sort combination is served by an index.
+
+Runs EXPLAIN QUERY PLAN for the SQL `list_tasks` actually emits, fails if
+any plan scans a whole table, and reports the slowest combinations.
+
+Run from the backend directory:
+
+    python -m benchmarks.list_tasks_plans --projects 200 --tasks-per-project 500
+"""
+
+import argparse
+import itertools
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.orm import Session
+
+from app.migrations import run_migrations
+from app.models import Project, ProjectMember, ProjectRole, Task, TaskStatus, User
+from app.ranking import evenly_spaced_keys
+from benchmarks.common import call_list_tasks
+
+START = datetime(2025, 1, 1)
+
+
+def _seed(engine, project_count: int, tasks_per_project: int) -> tuple[User, int]:
+    rng = random.Random(7)
+    with Session(engine, expire_on_commit=False) as db:
+        users = [User(email=f"user{index}@example.com", name=f"User {index}", hashed_password="x") for index in range(20)]
+        db.add_all(users)
+        db.flush()
+        member = users[0]
+
+        projects = [Project(name=f"Project {index}", owner_id=users[index % len(users)].id) for index in range(project_count)]
+        db.add_all(projects)
+        db.flush()
+        db.execute(
+            insert(ProjectMember),
+            [
+                {"user_id": users[index % len(users)].id, "project_id": project.id, "role": ProjectRole.OWNER}
+                for index, project in enumerate(projects)
+            ]
+            + [
+                {"user_id": member.id, "project_id": project.id, "role": ProjectRole.VIEWER}
+                for index, project in enumerate(projects)
+                if index % len(users) != 0 and index % 3 == 0
+            ],
+        )
+
+        positions = evenly_spaced_keys(tasks_per_project)
+        statuses = list(TaskStatus)
+        for project in projects:
+            rows = []
+            for position in positions:
+                created_at = START + timedelta(minutes=rng.randrange(365 * 24 * 60))
+                rows.append(
+                    {
+                        "title": f"Task {rng.randrange(10**6)}",
+                        "project_id": project.id,
+                        "status": rng.choice(statuses),
+                        "assignee_id": rng.choice([None, None, *[user.id for user in users[:5]]]),
+                        "position": position,
+                        "created_at": created_at,
+                        "updated_at": created_at + timedelta(minutes=rng.randrange(60 * 24 * 30)),
+                    }
+                )
+            db.execute(insert(Task), rows)
+        db.commit()
+        db.expunge(member)
+        sample_project_id = projects[0].id
+
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+    return member, sample_project_id
+
+
+def _combinations(project_id: int, assignee_id: int):
+    window = (START + timedelta(days=120), START + timedelta(days=150))
+    return itertools.product(
+        (None, project_id),
+        (None, [TaskStatus.IN_PROGRESS], [TaskStatus.TODO, TaskStatus.IN_PROGRESS]),
+        (None, str(assignee_id), "unassigned"),
+        (None, window),
+        (None, window),
+        ("updated_at", "created_at", "position", "title"),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--tasks-per-project", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{Path(directory) / 'bench.db'}")
+        run_migrations(engine)
+        member, sample_project_id = _seed(engine, args.projects, args.tasks_per_project)
+
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", capture)
+        results = []
+        for project_id, statuses, assignee, created, updated, sort in _combinations(sample_project_id, member.id):
+            filters = dict(
+                project_id=project_id,
+                statuses=statuses,
+                assignee=assignee,
+                created_after=created[0] if created else None,
+                created_before=created[1] if created else None,
+                updated_after=updated[0] if updated else None,
+                updated_before=updated[1] if updated else None,
+                sort=sort,
+            )
+            with Session(engine) as db:
+                statements.clear()
+                started = time.perf_counter()
+                call_list_tasks(db, member, **filters, limit=args.limit)
+                elapsed = time.perf_counter() - started
+            statement, parameters = statements[0]
+            with engine.connect() as connection:
+                plan = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            label = ", ".join(
+                f"{key}={'set' if isinstance(value, tuple | list) else value}"
+                for key, value in filters.items()
+                if value is not None and not key.endswith("_before")
+            )
+            results.append((elapsed, label, plan))
+        event.remove(engine, "before_cursor_execute", capture)
+        engine.dispose()
+
+    # A SEARCH is an index lookup; "SCAN <table>" without an index is a
+    # full table scan.
+    full_scans = [
+        (label, line)
+        for _, label, plan in results
+        for line in plan
+        if line.startswith("SCAN ") and "USING" not in line
+    ]
+    print(f"{len(results)} combinations checked")
+    for elapsed, label, _ in sorted(results, reverse=True)[:5]:
+        print(f"  slowest {elapsed * 1000:7.2f} ms  {label}")
+    if full_scans:
+        for label, line in full_scans:
+            print(f"  FULL SCAN {line!r} for {label}")
+        sys.exit(1)
+    print("no full table scans")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Time the task scheduler's reload and firing against a large set of due dates.
+
+Most seeded tasks are already reminded or due far in the future, so the
+numbers show whether a reload scales with the outstanding window or with the
+table. Run from the backend directory:
+
+    python -m benchmarks.scheduler --tasks 1000000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.orm import Session
+
+from app.migrations import run_migrations
+from app.models import Project, ProjectMember, ProjectRole, Task, TaskRecurrence, User
+from app.scheduler import TaskScheduler
+
+BATCH_SIZE = 50_000
+
+
+def _seed(engine, task_count: int, now: datetime) -> None:
+    rng = random.Random(7)
+    with Session(engine) as db:
+        user = User(email="bench@example.com", name="Bench User", hashed_password="not-a-real-hash")
+        db.add(user)
+        db.flush()
+        project = Project(name="Routines", owner_id=user.id)
+        db.add(project)
+        db.flush()
+        db.execute(insert(ProjectMember).values(user_id=user.id, project_id=project.id, role=ProjectRole.OWNER))
+
+        for start in range(0, task_count, BATCH_SIZE):
+            rows = []
+            for index in range(start, min(start + BATCH_SIZE, task_count)):
+                # A year of history that already fired, and a year of future
+                # due dates; one task in ten repeats daily.
+                offset = timedelta(minutes=rng.randint(-525_600, 525_600))
+                rows.append(
+                    {
+                        "title": f"Task {index}",
+                        "project_id": project.id,
+                        "position": f"{index:08d}",
+                        "due_at": now + offset,
+                        "reminded_at": now + offset if offset.total_seconds() < 0 else None,
+                        "recurrence": TaskRecurrence.DAILY if index % 10 == 0 else None,
+                    }
+                )
+            db.execute(insert(Task), rows)
+        # The next few minutes carry a burst of due tasks to fire.
+        db.execute(
+            insert(Task),
+            [
+                {"title": f"Due {index}", "project_id": project.id, "position": f"z{index:06d}", "due_at": now}
+                for index in range(200)
+            ],
+        )
+        db.commit()
+
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--reload-seconds", type=float, default=30)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    now = datetime.now(UTC).replace(tzinfo=None)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{Path(directory) / 'bench.db'}")
+        run_migrations(engine)
+        started = time.perf_counter()
+        _seed(engine, args.tasks, now)
+        print(f"seeded {args.tasks} tasks in {time.perf_counter() - started:.1f}s")
+
+        scheduler = TaskScheduler(engine, reload_seconds=args.reload_seconds)
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", capture)
+        scheduler.load(now)
+        event.remove(engine, "before_cursor_execute", capture)
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            scheduler.load(now)
+        elapsed = (time.perf_counter() - started) / args.repeat
+        print(f"reload: {elapsed * 1000:8.2f} ms ({len(scheduler)} entries)")
+
+        started = time.perf_counter()
+        result = scheduler.run_due(now + timedelta(seconds=args.reload_seconds))
+        elapsed = time.perf_counter() - started
+        print(f"fire:   {elapsed * 1000:8.2f} ms ({result.reminders} reminders, {result.created} recurring instances)")
+
+        statement, parameters = statements[0]
+        with engine.connect() as connection:
+            plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        print("query plan (reload):")
+        for row in plan:
+            print(f"  {row[-1]}")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
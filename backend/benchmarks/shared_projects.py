@@ -0,0 +1,128 @@
+"""Measure GET /tasks and per-task access checks for a member of many shared projects.
+
+Run from the backend directory:
+
+    python -m benchmarks.shared_projects --projects 1000 --memberships 300 --tasks-per-project 20
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.dependencies import ProjectAccess
+from app.migrations import run_migrations
+from app.models import Project, ProjectMember, ProjectRole, Task, User
+from app.ranking import evenly_spaced_keys
+from benchmarks.common import call_list_tasks
+
+
+def _seed(engine, project_count: int, membership_count: int, tasks_per_project: int) -> tuple[User, list[int]]:
+    with Session(engine, expire_on_commit=False) as db:
+        owner = User(email="owner@example.com", name="Owner", hashed_password="not-a-real-hash")
+        member = User(email="member@example.com", name="Member", hashed_password="not-a-real-hash")
+        db.add_all([owner, member])
+        db.flush()
+
+        project_ids = [
+            db.execute(insert(Project).values(name=f"Shared {index}", owner_id=owner.id).returning(Project.id)).scalar_one()
+            for index in range(project_count)
+        ]
+        db.execute(
+            insert(ProjectMember),
+            [{"user_id": owner.id, "project_id": project_id, "role": ProjectRole.OWNER} for project_id in project_ids],
+        )
+        shared_ids = random.Random(7).sample(project_ids, membership_count)
+        db.execute(
+            insert(ProjectMember),
+            [{"user_id": member.id, "project_id": project_id, "role": ProjectRole.EDITOR} for project_id in shared_ids],
+        )
+
+        positions = evenly_spaced_keys(tasks_per_project)
+        db.execute(
+            insert(Task),
+            [
+                {"title": f"Task {index}", "project_id": project_id, "position": position}
+                for project_id in project_ids
+                for index, position in enumerate(positions)
+            ],
+        )
+        db.commit()
+        db.expunge(member)
+        return member, shared_ids
+
+
+def _time(label: str, repeat: int, operation) -> None:
+    operation()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = operation()
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"{label:>28}: {elapsed * 1000:8.2f} ms ({result} rows)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--projects", type=int, default=1000)
+    parser.add_argument("--memberships", type=int, default=300)
+    parser.add_argument("--tasks-per-project", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{Path(directory) / 'bench.db'}")
+        run_migrations(engine)
+        member, shared_ids = _seed(engine, args.projects, args.memberships, args.tasks_per_project)
+        # Without statistics SQLite walks ix_tasks_deleted_at (almost every
+        # row is NULL) instead of starting from the member's ACL rows.
+        with engine.begin() as connection:
+            connection.execute(text("ANALYZE"))
+
+        def list_page(limit):
+            with Session(engine) as db:
+                return len(call_list_tasks(db, member, limit=limit))
+
+        def access_checks():
+            # One request touching a task in every shared project: each check
+            # is a primary-key lookup, repeated checks hit the request cache.
+            with Session(engine) as db:
+                access = ProjectAccess(db, member)
+                first_position = evenly_spaced_keys(args.tasks_per_project)[0]
+                task_ids = db.scalars(
+                    select(Task.id).where(Task.project_id.in_(shared_ids), Task.position == first_position)
+                ).all()
+                for task_id in task_ids:
+                    access.get_task(task_id, ProjectRole.EDITOR)
+                for project_id in shared_ids:
+                    access.require(project_id, ProjectRole.EDITOR)
+                return len(task_ids)
+
+        _time("list_tasks first 100", args.repeat, lambda: list_page(100))
+        _time("list_tasks all accessible", args.repeat, lambda: list_page(None))
+        _time("access checks per request", args.repeat, access_checks)
+
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", capture)
+        list_page(100)
+        event.remove(engine, "before_cursor_execute", capture)
+
+        list_statement, list_parameters = statements[-1]
+        with engine.connect() as connection:
+            plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {list_statement}", list_parameters).all()
+        print("query plan:")
+        for row in plan:
+            print(f"  {row[-1]}")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
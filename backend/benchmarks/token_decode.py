@@ -0,0 +1,54 @@
+"""Compare the per-request cost of resolving a bearer token.
+
+Times a full verification with each available JWT backend (python-jose
+always, PyJWT when installed) against a hit in the verified-token cache that
+`decode_access_token` consults first. `--sessions` tokens are cycled, as a
+worker serving that many active users would see them. Run from the backend
+directory:
+
+    python -m benchmarks.token_decode --sessions 1 100 5000
+"""
+
+import argparse
+import time
+
+from app.auth import JWT_DECODERS, VerifiedTokenCache, create_access_token, verify_access_token
+
+
+def _per_call(function, tokens: list[str], repeat: int) -> float:
+    for token in tokens:
+        function(token)
+    calls = max(repeat, len(tokens))
+    started = time.perf_counter()
+    for index in range(calls):
+        function(tokens[index % len(tokens)])
+    return (time.perf_counter() - started) / calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 100, 5000])
+    parser.add_argument("--repeat", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"backends available: {', '.join(JWT_DECODERS)}")
+    print(f"{'sessions':>8} {'path':>12} {'us/call':>9} {'speedup':>8}")
+    for sessions in args.sessions:
+        tokens = [create_access_token(str(user_id)) for user_id in range(1, sessions + 1)]
+        baseline = _per_call(lambda token: verify_access_token(token, "jose"), tokens, args.repeat)
+        print(f"{sessions:>8} {'jose':>12} {baseline * 1e6:>9.2f} {1:>8.1f}")
+        for backend in JWT_DECODERS:
+            if backend == "jose":
+                continue
+            elapsed = _per_call(lambda token: verify_access_token(token, backend), tokens, args.repeat)
+            print(f"{sessions:>8} {backend:>12} {elapsed * 1e6:>9.2f} {baseline / elapsed:>8.1f}")
+
+        cache = VerifiedTokenCache(max_entries=max(sessions, 1))
+        for token in tokens:
+            cache.set(token, "1", expires_at=time.time() + 3600)
+        elapsed = _per_call(cache.get, tokens, args.repeat)
+        print(f"{sessions:>8} {'cache hit':>12} {elapsed * 1e6:>9.2f} {baseline / elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Production server settings: `gunicorn -c gunicorn.conf.py app.main:app`.
+#
+# Gunicorn supervises N uvicorn workers. On SIGTERM each worker stops
+# accepting connections, finishes in-flight requests within
+# `graceful_timeout`, then runs the app's shutdown, which disposes the
+# database engine. Rolling deploys should take a worker out of rotation via
+# /ready before sending SIGTERM.
+import os
+import tempfile
+
+# Read by app.config when the app is preloaded below. Workers skip the
+# startup migration `when_ready` already ran, and the worker holding the
+# lock file runs the periodic maintenance jobs for this server.
+os.environ["RUN_MIGRATIONS_ON_STARTUP"] = "false"
+os.environ.setdefault(
+    "MAINTENANCE_LOCK_PATH", os.path.join(tempfile.gettempdir(), f"focus-tracker-maintenance-{os.getpid()}.lock")
+)
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Behind a load balancer or reverse proxy every connection comes from the
+# proxy, so per-IP rate limits would put all clients in one bucket. Uvicorn
+# takes the client address from X-Forwarded-For (and the scheme from
+# X-Forwarded-Proto) only when the peer is listed here; list exactly the
+# proxy addresses, since any trusted peer can claim to be any client.
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1,::1")
+
+# One async worker per usable core; each runs its own threadpool for the
+# synchronous endpoints. sched_getaffinity honours CPU pinning in containers.
+workers = int(os.getenv("WEB_CONCURRENCY", "0")) or max(2, len(os.sched_getaffinity(0)))
+
+# Import the app once in the master so workers fork with it already loaded.
+preload_app = True
+
+# Recycle workers after a jittered number of requests to bound memory creep
+# without restarting them all at once.
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", str(max_requests // 10)))
+
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+accesslog = "-"
+errorlog = "-"
+
+
+def when_ready(server):
+    # Migrations run once in the master before any worker starts, so workers
+    # never race each other applying the same version.
+    from app.database import engine
+    from app.migrations import run_migrations
+
+    run_migrations(engine)
+    engine.dispose()
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared with children.
+    from app.database import engine
+
+    engine.dispose(close=False)
+
+
+def on_exit(server):
+    if os.environ["MAINTENANCE_LOCK_PATH"].startswith(tempfile.gettempdir()):
+        try:
+            os.unlink(os.environ["MAINTENANCE_LOCK_PATH"])
+        except FileNotFoundError:
+            pass
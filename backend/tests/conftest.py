@@ -9,19 +9,40 @@ from sqlalchemy.orm import sessionmaker
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
+from app.auth import token_cache
+from app.cache import dashboard_cache
 from app.database import Base, get_db
-from app.main import app
+from app.main import app, idempotency_store, rate_limit_store
 from app.migrations import run_migrations
 
 
 @pytest.fixture()
-def client(tmp_path):
+def db_engine(tmp_path):
     test_db_path = tmp_path / "test_task_tracking.db"
     engine = create_engine(f"sqlite:///{test_db_path}", connect_args={"check_same_thread": False})
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
     run_migrations(engine)
 
+    yield engine
+
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture()
+def db_session(db_engine):
+    # A session on the same database the client's requests use, for tests
+    # that set up or inspect rows the API cannot reach.
+    db = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture()
+def client(db_engine):
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
     def override_get_db():
         db = TestingSessionLocal()
         try:
@@ -36,11 +57,13 @@ def client(tmp_path):
     original_lifespan = app.router.lifespan_context
     app.router.lifespan_context = no_op_lifespan
     app.dependency_overrides[get_db] = override_get_db
+    rate_limit_store.reset()
+    idempotency_store.reset()
+    dashboard_cache.clear()
+    token_cache.clear()
 
     with TestClient(app) as test_client:
         yield test_client
 
     app.dependency_overrides.clear()
     app.router.lifespan_context = original_lifespan
-    Base.metadata.drop_all(bind=engine)
-    engine.dispose()
@@ -1,3 +1,7 @@
+import pytest
+from sqlalchemy import text
+
+
 def auth_headers(token):
     return {"Authorization": f"Bearer {token}"}
 
@@ -217,3 +221,978 @@ def test_cross_user_access_and_missing_resource_paths(client):
 
     missing_task_delete = client.delete("/tasks/999999", headers=owner_headers)
     assert missing_task_delete.status_code == 404
+
+
+def test_auth_routes_are_rate_limited_per_ip(client):
+    for _ in range(10):
+        response = client.post(
+            "/auth/login",
+            json={
+                "email": "nobody@example.com",
+                "password": "wrong-password",
+            },
+        )
+        assert response.status_code == 401
+
+    limited_response = client.post(
+        "/auth/login",
+        json={
+            "email": "nobody@example.com",
+            "password": "wrong-password",
+        },
+    )
+    assert limited_response.status_code == 429
+    assert int(limited_response.headers["Retry-After"]) >= 1
+
+    health_response = client.get("/health")
+    assert health_response.status_code == 200
+
+
+def test_credential_buckets_use_the_forwarded_client_only_behind_a_trusted_proxy():
+    import asyncio
+
+    from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+    from app.rate_limit import InMemoryRateLimitStore, RateLimitMiddleware
+
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    limiter = RateLimitMiddleware(
+        endpoint,
+        InMemoryRateLimitStore(),
+        user_capacity=10,
+        user_refill_per_second=1,
+        auth_capacity=1,
+        auth_refill_per_second=0.01,
+    )
+    # Mirrors gunicorn.conf.py: only the proxy's own address is trusted.
+    app = ProxyHeadersMiddleware(limiter, trusted_hosts="10.0.0.2")
+
+    def login(peer, forwarded_for):
+        statuses = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/auth/login",
+            "scheme": "http",
+            "client": (peer, 50000),
+            "headers": [(b"x-forwarded-for", forwarded_for.encode())],
+        }
+        asyncio.run(app(scope, receive, send))
+        return statuses[0]
+
+    assert login("10.0.0.2", "203.0.113.1") == 204
+    assert login("10.0.0.2", "203.0.113.1") == 429
+    assert login("10.0.0.2", "203.0.113.2") == 204
+
+    # An untrusted peer cannot pick a fresh bucket by forging the header.
+    assert login("198.51.100.9", "203.0.113.3") == 204
+    assert login("198.51.100.9", "203.0.113.4") == 429
+
+
+def test_auth_me_uses_the_per_user_bucket_not_the_login_limit(client):
+    registration = register_user(client)
+    headers = auth_headers(registration["token"]["access_token"])
+
+    responses = [client.get("/auth/me", headers=headers).status_code for _ in range(15)]
+    assert responses == [200] * 15
+
+    # /auth/me requests did not spend the per-IP login budget.
+    login = client.post("/auth/login", json={"email": "tester@example.com", "password": "safe-password-123"})
+    assert login.status_code == 200
+
+
+def test_in_memory_token_bucket_refills_over_time():
+    from app.rate_limit import InMemoryRateLimitStore
+
+    now = [0.0]
+    store = InMemoryRateLimitStore(clock=lambda: now[0])
+
+    assert store.consume("user:1", capacity=2, refill_per_second=1) == 0
+    assert store.consume("user:1", capacity=2, refill_per_second=1) == 0
+    assert store.consume("user:1", capacity=2, refill_per_second=1) == 1
+
+    now[0] = 1.0
+    assert store.consume("user:1", capacity=2, refill_per_second=1) == 0
+    assert store.consume("user:2", capacity=2, refill_per_second=1) == 0
+
+
+def test_manual_task_ordering_and_keyset_pagination(client, db_session):
+    registration = register_user(client, email="ordering@example.com", name="Ordering User")
+    headers = auth_headers(registration["token"]["access_token"])
+    project = create_project(client, headers, name="Ordered Project")
+
+    first = create_task(client, headers, project["id"], title="First step")
+    second = create_task(client, headers, project["id"], title="Second step")
+    third = create_task(client, headers, project["id"], title="Third step")
+
+    def ordered_ids(query=""):
+        response = client.get(f"/tasks?project_id={project['id']}&sort=position{query}", headers=headers)
+        assert response.status_code == 200
+        return [task["id"] for task in response.json()]
+
+    assert ordered_ids() == [first["id"], second["id"], third["id"]]
+
+    move_to_top = client.post(f"/tasks/{third['id']}/move", headers=headers, json={"before_task_id": first["id"]})
+    assert move_to_top.status_code == 200
+    assert ordered_ids() == [third["id"], first["id"], second["id"]]
+
+    move_between = client.post(
+        f"/tasks/{second['id']}/move",
+        headers=headers,
+        json={"after_task_id": third["id"], "before_task_id": first["id"]},
+    )
+    assert move_between.status_code == 200
+    assert ordered_ids() == [third["id"], second["id"], first["id"]]
+
+    first_page = client.get(f"/tasks?project_id={project['id']}&sort=position&limit=2", headers=headers).json()
+    assert [task["id"] for task in first_page] == [third["id"], second["id"]]
+    cursor = f"{first_page[-1]['position']}:{first_page[-1]['id']}"
+    assert ordered_ids(f"&limit=2&after={cursor}") == [first["id"]]
+
+    missing_neighbor = client.post(f"/tasks/{first['id']}/move", headers=headers, json={"after_task_id": 999999})
+    assert missing_neighbor.status_code == 404
+
+    empty_move = client.post(f"/tasks/{first['id']}/move", headers=headers, json={})
+    assert empty_move.status_code == 422
+
+    reversed_neighbors = client.post(
+        f"/tasks/{second['id']}/move",
+        headers=headers,
+        json={"after_task_id": first["id"], "before_task_id": third["id"]},
+    )
+    assert reversed_neighbors.status_code == 400
+    assert ordered_ids() == [third["id"], second["id"], first["id"]]
+
+    db_session.execute(
+        text("UPDATE tasks SET position = (SELECT position FROM tasks WHERE id = :third) WHERE id = :second"),
+        {"third": third["id"], "second": second["id"]},
+    )
+    db_session.commit()
+
+    # Tied keys list in id order; moving between them respaces the project.
+    assert ordered_ids() == [second["id"], third["id"], first["id"]]
+    between_duplicates = {"after_task_id": second["id"], "before_task_id": third["id"]}
+    duplicate_keys = client.post(f"/tasks/{first['id']}/move", headers=headers, json=between_duplicates)
+    assert duplicate_keys.status_code == 200
+    assert ordered_ids() == [second["id"], first["id"], third["id"]]
+
+
+def test_task_history_records_each_mutation_and_paginates(client):
+    owner = register_user(client, email="history@example.com", name="History User")
+    other = register_user(client, email="history-other@example.com", name="Other User")
+    headers = auth_headers(owner["token"]["access_token"])
+    project = create_project(client, headers, name="History Project")
+    task = create_task(client, headers, project["id"], title="Write notes")
+
+    client.patch(f"/tasks/{task['id']}", headers=headers, json={"status": "in_progress"})
+    client.patch(f"/tasks/{task['id']}", headers=headers, json={"title": "Write notes"})
+    client.patch(f"/tasks/{task['id']}", headers=headers, json={"status": "done"})
+    client.delete(f"/tasks/{task['id']}", headers=headers)
+    client.post(f"/tasks/{task['id']}/restore", headers=headers)
+
+    history_response = client.get(f"/tasks/{task['id']}/history", headers=headers)
+    assert history_response.status_code == 200
+    history = history_response.json()
+    assert [event["event_type"] for event in history["items"]] == [
+        "restored",
+        "deleted",
+        "updated",
+        "updated",
+        "created",
+    ]
+    assert history["items"][2]["changes"] == {"status": ["in_progress", "done"]}
+    assert history["next_cursor"] is None
+
+    first_page = client.get(f"/tasks/{task['id']}/history?limit=2", headers=headers).json()
+    assert len(first_page["items"]) == 2
+    second_page = client.get(
+        f"/tasks/{task['id']}/history",
+        headers=headers,
+        params={"limit": 10, "before": first_page["next_cursor"]},
+    ).json()
+    assert [event["id"] for event in first_page["items"] + second_page["items"]] == [
+        event["id"] for event in history["items"]
+    ]
+
+    other_headers = auth_headers(other["token"]["access_token"])
+    forbidden_history = client.get(f"/tasks/{task['id']}/history", headers=other_headers)
+    assert forbidden_history.status_code == 404
+
+
+def test_analytics_rollups_track_transitions_and_match_backfill(client, db_engine):
+    from app.analytics import backfill_task_rollups
+
+    registration = register_user(client, email="analytics@example.com", name="Analytics User")
+    headers = auth_headers(registration["token"]["access_token"])
+    project = create_project(client, headers, name="Analytics Project")
+    first = create_task(client, headers, project["id"], title="Plan the day")
+    second = create_task(client, headers, project["id"], title="Reply to email")
+    create_task(client, headers, project["id"], title="Stretch")
+
+    client.patch(f"/tasks/{first['id']}", headers=headers, json={"status": "in_progress"})
+    client.patch(f"/tasks/{second['id']}", headers=headers, json={"status": "in_progress"})
+    client.patch(f"/tasks/{first['id']}", headers=headers, json={"status": "done"})
+    client.delete(f"/tasks/{second['id']}", headers=headers)
+
+    def snapshot():
+        throughput = client.get("/analytics/throughput", headers=headers).json()
+        wip = client.get(f"/analytics/wip?project_id={project['id']}", headers=headers).json()
+        todo_wip = client.get("/analytics/wip?status=todo", headers=headers).json()
+        cycle_time = client.get("/analytics/cycle-time", headers=headers).json()
+        return throughput, wip, todo_wip, cycle_time
+
+    throughput, wip, todo_wip, cycle_time = snapshot()
+    assert len(throughput) == 30
+    assert throughput[-1]["count"] == 1
+    assert wip[-1]["count"] == 0
+    assert todo_wip[-1]["count"] == 1
+    cycle_by_status = {row["status"]: row for row in cycle_time}
+    assert cycle_by_status["todo"]["transitions"] == 2
+    assert cycle_by_status["in_progress"]["transitions"] == 1
+    assert cycle_by_status["done"]["average_seconds"] is None
+
+    backfill_task_rollups(db_engine)
+
+    rebuilt_throughput, rebuilt_wip, rebuilt_todo_wip, rebuilt_cycle_time = snapshot()
+    assert rebuilt_throughput == throughput
+    assert rebuilt_wip == wip
+    assert rebuilt_todo_wip == todo_wip
+    assert [row["transitions"] for row in rebuilt_cycle_time] == [row["transitions"] for row in cycle_time]
+    for rebuilt, live in zip(rebuilt_cycle_time, cycle_time):
+        assert rebuilt["average_seconds"] == pytest.approx(live["average_seconds"], abs=0.01)
+
+    invalid_range = client.get("/analytics/throughput?start=2024-02-01&end=2024-01-01", headers=headers)
+    assert invalid_range.status_code == 400
+
+
+def test_dashboard_bootstrap_and_cache_invalidation(client, monkeypatch):
+    from app.cache import dashboard_cache
+
+    monkeypatch.setattr(dashboard_cache, "ttl_seconds", 60)
+
+    registration = register_user(client, email="dashboard@example.com", name="Dashboard User")
+    headers = auth_headers(registration["token"]["access_token"])
+
+    empty_dashboard = client.get("/dashboard", headers=headers)
+    assert empty_dashboard.status_code == 200
+    assert empty_dashboard.json()["projects"] == []
+    assert empty_dashboard.json()["selected_project_id"] is None
+
+    older_project = create_project(client, headers, name="Older Project")
+    newer_project = create_project(client, headers, name="Newer Project")
+    task = create_task(client, headers, older_project["id"], title="Water plants")
+    client.patch(f"/tasks/{task['id']}", headers=headers, json={"status": "done"})
+    create_task(client, headers, older_project["id"], title="Sort mail")
+
+    dashboard = client.get(f"/dashboard?project_id={older_project['id']}", headers=headers).json()
+    assert dashboard["user"]["id"] == registration["user"]["id"]
+    assert [project["id"] for project in dashboard["projects"]] == [newer_project["id"], older_project["id"]]
+    assert dashboard["selected_project_id"] == older_project["id"]
+    assert len(dashboard["tasks"]) == 2
+    assert dashboard["status_counts"] == {"todo": 1, "in_progress": 0, "done": 1}
+
+    default_dashboard = client.get("/dashboard", headers=headers).json()
+    assert default_dashboard["selected_project_id"] == newer_project["id"]
+    assert default_dashboard["tasks"] == []
+
+    client.delete(f"/tasks/{task['id']}", headers=headers)
+    refreshed = client.get(f"/dashboard?project_id={older_project['id']}", headers=headers).json()
+    assert refreshed["status_counts"] == {"todo": 1, "in_progress": 0, "done": 0}
+
+
+def test_project_names_are_unique_among_active_projects_only(client):
+    registration = register_user(client, email="names@example.com", name="Names User")
+    headers = auth_headers(registration["token"]["access_token"])
+
+    original = create_project(client, headers, name="Evening Wind Down")
+    assert client.delete(f"/projects/{original['id']}", headers=headers).status_code == 204
+
+    replacement = create_project(client, headers, name="evening wind down")
+    assert replacement["id"] != original["id"]
+
+    restore_response = client.post(f"/projects/{original['id']}/restore", headers=headers)
+    assert restore_response.status_code == 409
+
+    assert client.delete(f"/projects/{replacement['id']}", headers=headers).status_code == 204
+    restore_response = client.post(f"/projects/{original['id']}/restore", headers=headers)
+    assert restore_response.status_code == 200
+    assert restore_response.json()["name"] == "Evening Wind Down"
+
+
+def test_archive_job_moves_expired_tombstones_and_admin_can_restore(client, db_engine, monkeypatch):
+    from datetime import UTC, datetime, timedelta
+
+    from app.archive import archive_tombstones
+
+    monkeypatch.setattr("app.dependencies.ADMIN_EMAILS", {"admin@example.com"})
+    admin = register_user(client, email="admin@example.com", name="Admin User")
+    owner = register_user(client, email="archive-owner@example.com", name="Archive Owner")
+    admin_headers = auth_headers(admin["token"]["access_token"])
+    headers = auth_headers(owner["token"]["access_token"])
+
+    project = create_project(client, headers, name="Spring Cleaning")
+    deleted_first = create_task(client, headers, project["id"], title="Old errand")
+    kept_task = create_task(client, headers, project["id"], title="Closet sweep")
+    client.delete(f"/tasks/{deleted_first['id']}", headers=headers)
+    client.delete(f"/projects/{project['id']}", headers=headers)
+
+    inside_window = archive_tombstones(db_engine, retention_days=30)
+    assert (inside_window.tasks, inside_window.projects) == (0, 0)
+
+    later = datetime.now(UTC).replace(tzinfo=None) + timedelta(days=31)
+    result = archive_tombstones(db_engine, retention_days=30, batch_size=1, now=later)
+    assert (result.tasks, result.projects) == (2, 1)
+
+    assert client.post(f"/projects/{project['id']}/restore", headers=headers).status_code == 404
+    assert client.get("/admin/archive/projects", headers=headers).status_code == 403
+
+    archived = client.get("/admin/archive/projects", headers=admin_headers)
+    assert archived.status_code == 200
+    assert [row["id"] for row in archived.json()] == [project["id"]]
+
+    restored = client.post(f"/admin/archive/projects/{project['id']}/restore", headers=admin_headers)
+    assert restored.status_code == 200
+
+    visible_tasks = client.get(f"/tasks?project_id={project['id']}", headers=headers).json()
+    assert [task["id"] for task in visible_tasks] == [kept_task["id"]]
+    assert client.post(f"/tasks/{deleted_first['id']}/restore", headers=headers).status_code == 200
+
+
+def test_archived_ids_are_not_reused_and_restore_reports_collisions(client, db_engine, db_session, monkeypatch):
+    from datetime import UTC, datetime, timedelta
+
+    from app.archive import archive_tombstones
+
+    monkeypatch.setattr("app.dependencies.ADMIN_EMAILS", {"admin@example.com"})
+    admin = register_user(client, email="admin@example.com", name="Admin User")
+    admin_headers = auth_headers(admin["token"]["access_token"])
+    headers = auth_headers(register_user(client)["token"]["access_token"])
+    project = create_project(client, headers)
+    create_task(client, headers, project["id"], title="Stays")
+    newest = create_task(client, headers, project["id"], title="Archived")
+    client.delete(f"/tasks/{newest['id']}", headers=headers)
+
+    later = datetime.now(UTC).replace(tzinfo=None) + timedelta(days=31)
+    assert archive_tombstones(db_engine, retention_days=30, now=later).tasks == 1
+
+    replacement = create_task(client, headers, project["id"], title="Replacement")
+    assert replacement["id"] > newest["id"]
+
+    # A database that reused the id before the AUTOINCREMENT migration.
+    db_session.execute(
+        text("UPDATE tasks SET id = :archived_id WHERE id = :replacement_id"),
+        {"archived_id": newest["id"], "replacement_id": replacement["id"]},
+    )
+    db_session.commit()
+
+    conflict = client.post(f"/admin/archive/tasks/{newest['id']}/restore", headers=admin_headers)
+    assert conflict.status_code == 409
+    assert conflict.json()["detail"] == "The archived task's id now belongs to another task."
+
+
+def test_shared_projects_grant_access_by_role(client):
+    owner_registration = register_user(client)
+    editor_registration = register_user(client, email="editor@example.com", name="Editor")
+    viewer_registration = register_user(client, email="viewer@example.com", name="Viewer")
+    owner_headers = auth_headers(owner_registration["token"]["access_token"])
+    editor_headers = auth_headers(editor_registration["token"]["access_token"])
+    viewer_headers = auth_headers(viewer_registration["token"]["access_token"])
+    editor_id = editor_registration["user"]["id"]
+    viewer_id = viewer_registration["user"]["id"]
+
+    project = create_project(client, owner_headers)
+    assert project["role"] == "owner"
+    owner_task = create_task(client, owner_headers, project["id"])
+
+    assert client.get(f"/projects/{project['id']}/members", headers=viewer_headers).status_code == 404
+    assert client.get("/tasks", headers=viewer_headers).json() == []
+
+    for email, role in (("editor@example.com", "editor"), ("viewer@example.com", "viewer")):
+        response = client.post(
+            f"/projects/{project['id']}/members",
+            headers=owner_headers,
+            json={"email": email, "role": role},
+        )
+        assert response.status_code == 201
+        assert response.json()["role"] == role
+
+    duplicate_response = client.post(
+        f"/projects/{project['id']}/members",
+        headers=owner_headers,
+        json={"email": "viewer@example.com", "role": "editor"},
+    )
+    assert duplicate_response.status_code == 409
+    assert client.post(
+        f"/projects/{project['id']}/members",
+        headers=editor_headers,
+        json={"email": "tester@example.com", "role": "viewer"},
+    ).status_code == 403
+
+    members = client.get(f"/projects/{project['id']}/members", headers=viewer_headers).json()
+    assert [member["role"] for member in members] == ["owner", "editor", "viewer"]
+
+    viewer_projects = client.get("/projects", headers=viewer_headers).json()
+    assert [(item["id"], item["role"]) for item in viewer_projects] == [(project["id"], "viewer")]
+    assert [task["id"] for task in client.get("/tasks", headers=viewer_headers).json()] == [owner_task["id"]]
+    assert client.get(f"/tasks/{owner_task['id']}/history", headers=viewer_headers).status_code == 200
+
+    viewer_create = client.post(
+        "/tasks",
+        headers=viewer_headers,
+        json={"title": "Read only", "project_id": project["id"]},
+    )
+    assert viewer_create.status_code == 403
+    assert client.patch(
+        f"/tasks/{owner_task['id']}", headers=viewer_headers, json={"status": "done"}
+    ).status_code == 403
+
+    editor_task = client.post(
+        "/tasks",
+        headers=editor_headers,
+        json={"title": "Shared step", "project_id": project["id"], "assignee_id": viewer_id},
+    )
+    assert editor_task.status_code == 201
+    assert editor_task.json()["assignee"]["id"] == viewer_id
+    assert client.delete(f"/projects/{project['id']}", headers=editor_headers).status_code == 403
+
+    outsider = register_user(client, email="outsider@example.com", name="Outsider")
+    outsider_assignment = client.patch(
+        f"/tasks/{owner_task['id']}",
+        headers=editor_headers,
+        json={"assignee_id": outsider["user"]["id"]},
+    )
+    assert outsider_assignment.status_code == 404
+
+    promote_response = client.patch(
+        f"/projects/{project['id']}/members/{viewer_id}",
+        headers=owner_headers,
+        json={"role": "editor"},
+    )
+    assert promote_response.json()["role"] == "editor"
+    assert client.patch(
+        f"/tasks/{owner_task['id']}", headers=viewer_headers, json={"status": "done"}
+    ).status_code == 200
+
+    assert client.delete(f"/projects/{project['id']}/members/{viewer_id}", headers=viewer_headers).status_code == 204
+    assert client.get("/projects", headers=viewer_headers).json() == []
+    assert client.get(f"/tasks/{owner_task['id']}/history", headers=viewer_headers).status_code == 404
+
+    assert client.delete(f"/projects/{project['id']}/members/{editor_id}", headers=owner_headers).status_code == 204
+    owner_id = owner_registration["user"]["id"]
+    assert client.delete(f"/projects/{project['id']}/members/{owner_id}", headers=owner_headers).status_code == 400
+    assert len(client.get("/tasks", headers=owner_headers).json()) == 2
+
+
+def test_idempotency_key_replays_the_first_response(client):
+    registration = register_user(client)
+    headers = auth_headers(registration["token"]["access_token"])
+    project = create_project(client, headers)
+    payload = {"title": "Retry safely", "project_id": project["id"]}
+
+    first = client.post("/tasks", headers={**headers, "Idempotency-Key": "create-1"}, json=payload)
+    retry = client.post("/tasks", headers={**headers, "Idempotency-Key": "create-1"}, json=payload)
+    assert first.status_code == retry.status_code == 201
+    assert retry.content == first.content
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert len(client.get("/tasks", headers=headers).json()) == 1
+
+    mismatched = client.post(
+        "/tasks",
+        headers={**headers, "Idempotency-Key": "create-1"},
+        json={**payload, "title": "Something else"},
+    )
+    assert mismatched.status_code == 422
+
+    other_user = register_user(client, email="other@example.com", name="Other User")
+    other_headers = auth_headers(other_user["token"]["access_token"])
+    other_project = client.post(
+        "/projects",
+        headers={**other_headers, "Idempotency-Key": "create-1"},
+        json={"name": "Separate key space"},
+    )
+    assert other_project.status_code == 201
+    assert "Idempotent-Replayed" not in other_project.headers
+
+
+def test_idempotency_middleware_collapses_concurrent_duplicates():
+    import asyncio
+
+    from app.auth import create_access_token
+    from app.idempotency import IdempotencyMiddleware, InMemoryIdempotencyStore
+
+    calls = []
+
+    async def slow_app(scope, receive, send):
+        calls.append((await receive())["body"])
+        await asyncio.sleep(0.05)
+        await send({"type": "http.response.start", "status": 201, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": f"created {len(calls)}".encode()})
+
+    middleware = IdempotencyMiddleware(slow_app, InMemoryIdempotencyStore(), ttl_seconds=60)
+    token = create_access_token("1")
+
+    async def request():
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/tasks",
+            "query_string": b"",
+            "headers": [(b"authorization", f"Bearer {token}".encode()), (b"idempotency-key", b"same")],
+        }
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": b'{"title": "x"}', "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        await middleware(scope, receive, send)
+        return sent
+
+    async def run_duplicates():
+        return await asyncio.gather(*(request() for _ in range(5)))
+
+    responses = asyncio.run(run_duplicates())
+    assert len(calls) == 1
+    assert {sent[1]["body"] for sent in responses} == {b"created 1"}
+    assert sum((b"idempotent-replayed", b"true") in sent[0]["headers"] for sent in responses) == 4
+
+
+def test_database_idempotency_store_keeps_the_first_response(tmp_path):
+    from datetime import datetime, timedelta
+
+    from sqlalchemy import create_engine
+
+    from app.idempotency import DatabaseIdempotencyStore, StoredResponse
+    from app.migrations import run_migrations
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'idempotency.db'}")
+    run_migrations(engine)
+    now = [datetime(2026, 1, 1)]
+    store = DatabaseIdempotencyStore(engine, clock=lambda: now[0])
+    first = StoredResponse("fingerprint", 201, ((b"content-type", b"application/json"),), b'{"id": 1}')
+    second = StoredResponse("fingerprint", 201, ((b"content-type", b"application/json"),), b'{"id": 2}')
+
+    store.put("worker-race", first, ttl_seconds=60)
+    store.put("worker-race", second, ttl_seconds=60)
+    assert store.get("worker-race").body == b'{"id": 1}'
+
+    now[0] += timedelta(seconds=61)
+    assert store.get("worker-race") is None
+    store.put("worker-race", second, ttl_seconds=60)
+    assert store.get("worker-race").body == b'{"id": 2}'
+    engine.dispose()
+
+
+def test_task_labels_filter_with_any_and_all_semantics(client):
+    registration = register_user(client)
+    headers = auth_headers(registration["token"]["access_token"])
+    project = create_project(client, headers)
+    calls = create_task(client, headers, project["id"], title="Call the dentist")
+    errand = create_task(client, headers, project["id"], title="Pick up groceries")
+    both = create_task(client, headers, project["id"], title="Call the pharmacy on the way")
+
+    def set_labels(task_id, labels):
+        response = client.put(f"/tasks/{task_id}/labels", headers=headers, json={"labels": labels})
+        assert response.status_code == 200
+        return response.json()
+
+    assert set_labels(calls["id"], ["Calls", "low-energy"])["labels"] == ["calls", "low-energy"]
+    set_labels(errand["id"], ["errands"])
+    set_labels(both["id"], ["calls", "errands"])
+
+    def filtered(labels, mode="any"):
+        response = client.get("/tasks", headers=headers, params={"labels": labels, "label_mode": mode})
+        assert response.status_code == 200
+        return {task["id"] for task in response.json()}
+
+    assert filtered("calls,errands") == {calls["id"], errand["id"], both["id"]}
+    assert filtered("calls,errands", "all") == {both["id"]}
+    assert filtered("calls,unknown", "all") == set()
+    assert filtered("unknown") == set()
+    everything = {calls["id"], errand["id"], both["id"]}
+    assert filtered("") == everything
+    assert filtered(" , ", "all") == everything
+
+    listed = {task["id"]: task["labels"] for task in client.get("/tasks", headers=headers).json()}
+    assert listed[both["id"]] == ["calls", "errands"]
+
+    other = register_user(client, email="other@example.com", name="Other User")
+    other_headers = auth_headers(other["token"]["access_token"])
+    client.post(
+        f"/projects/{project['id']}/members",
+        headers=headers,
+        json={"email": "other@example.com", "role": "viewer"},
+    )
+    other_view = client.put(f"/tasks/{both['id']}/labels", headers=other_headers, json={"labels": ["focus"]})
+    assert other_view.json()["labels"] == ["focus"]
+    assert client.get("/tasks", headers=other_headers, params={"labels": "calls"}).json() == []
+    assert set_labels(both["id"], ["calls", "errands"])["labels"] == ["calls", "errands"]
+
+    set_labels(calls["id"], ["calls"])
+    client.delete(f"/tasks/{errand['id']}", headers=headers)
+    counts = {label["name"]: label["task_count"] for label in client.get("/labels", headers=headers).json()}
+    assert counts == {"calls": 2, "errands": 1, "low-energy": 0}
+
+    duplicate = client.post("/labels", headers=headers, json={"name": " Calls "})
+    assert duplicate.status_code == 409
+    errands_id = next(label["id"] for label in client.get("/labels", headers=headers).json() if label["name"] == "errands")
+    assert client.delete(f"/labels/{errands_id}", headers=headers).status_code == 204
+    assert filtered("errands") == set()
+
+
+def test_subtasks_roll_up_progress_and_cascade_soft_delete(client):
+    registration = register_user(client)
+    headers = auth_headers(registration["token"]["access_token"])
+    project = create_project(client, headers)
+    root = create_task(client, headers, project["id"], title="Clean the kitchen")
+
+    def create_subtask(title, parent_id):
+        response = client.post(
+            "/tasks",
+            headers=headers,
+            json={"title": title, "project_id": project["id"], "parent_id": parent_id},
+        )
+        assert response.status_code == 201
+        return response.json()
+
+    dishes = create_subtask("Do the dishes", root["id"])
+    rinse = create_subtask("Rinse the plates", dishes["id"])
+    counters = create_subtask("Wipe the counters", root["id"])
+    assert rinse["parent_id"] == dishes["id"]
+
+    subtree = client.get(f"/tasks/{root['id']}/subtree", headers=headers).json()
+    assert [task["id"] for task in subtree] == [root["id"], dishes["id"], counters["id"], rinse["id"]]
+
+    client.patch(f"/tasks/{rinse['id']}", headers=headers, json={"status": "done"})
+    progress = client.get(f"/tasks/{root['id']}/progress", headers=headers).json()
+    assert progress == {"task_id": root["id"], "total": 3, "done": 1, "percent_done": 33.3}
+
+    cycle = client.patch(f"/tasks/{dishes['id']}", headers=headers, json={"parent_id": rinse["id"]})
+    assert cycle.status_code == 409
+    moved = client.patch(f"/tasks/{dishes['id']}", headers=headers, json={"parent_id": counters["id"]})
+    assert moved.status_code == 200
+    counters_subtree = client.get(f"/tasks/{counters['id']}/subtree", headers=headers).json()
+    assert [task["id"] for task in counters_subtree] == [counters["id"], dishes["id"], rinse["id"]]
+    assert client.get(f"/tasks/{root['id']}/progress", headers=headers).json()["total"] == 3
+
+    assert client.post(
+        f"/tasks/{counters['id']}/dependencies", headers=headers, json={"blocked_by_id": dishes["id"]}
+    ).status_code == 201
+    assert client.post(
+        f"/tasks/{dishes['id']}/dependencies", headers=headers, json={"blocked_by_id": rinse["id"]}
+    ).status_code == 201
+    looped = client.post(f"/tasks/{rinse['id']}/dependencies", headers=headers, json={"blocked_by_id": counters["id"]})
+    assert looped.status_code == 409
+    blockers = client.get(f"/tasks/{counters['id']}/dependencies", headers=headers).json()
+    assert [edge["blocked_by_id"] for edge in blockers] == [dishes["id"]]
+
+    client.delete(f"/tasks/{rinse['id']}", headers=headers)
+    assert client.delete(f"/tasks/{counters['id']}", headers=headers).status_code == 204
+    active_ids = {task["id"] for task in client.get("/tasks", headers=headers).json()}
+    assert active_ids == {root["id"]}
+
+    assert client.post(f"/tasks/{dishes['id']}/restore", headers=headers).status_code == 409
+    assert client.post(f"/tasks/{counters['id']}/restore", headers=headers).status_code == 200
+    active_ids = {task["id"] for task in client.get("/tasks", headers=headers).json()}
+    assert active_ids == {root["id"], counters["id"], dishes["id"]}
+
+
+def test_task_list_filters_by_statuses_assignee_dates_and_sorts(client):
+    registration = register_user(client)
+    headers = auth_headers(registration["token"]["access_token"])
+    user_id = registration["user"]["id"]
+    project = create_project(client, headers)
+    first = create_task(client, headers, project["id"], title="Alpha step")
+    second = create_task(client, headers, project["id"], title="Charlie step")
+    third = create_task(client, headers, project["id"], title="Bravo step")
+    client.patch(f"/tasks/{first['id']}", headers=headers, json={"status": "in_progress", "assignee_id": user_id})
+    client.patch(f"/tasks/{second['id']}", headers=headers, json={"status": "done"})
+
+    def listed(**params):
+        response = client.get("/tasks", headers=headers, params=params)
+        assert response.status_code == 200
+        return [task["id"] for task in response.json()]
+
+    assert set(listed(status=["todo", "in_progress"])) == {first["id"], third["id"]}
+    assert listed(assignee_id=user_id) == [first["id"]]
+    assert set(listed(assignee_id="unassigned")) == {second["id"], third["id"]}
+    assert listed(status="done", assignee_id="unassigned") == [second["id"]]
+
+    assert listed(sort="title") == [first["id"], third["id"], second["id"]]
+    assert listed(sort="title", order="desc") == [second["id"], third["id"], first["id"]]
+    assert listed(sort="created_at", order="asc") == [first["id"], second["id"], third["id"]]
+
+    cutoff = client.get(f"/tasks/{second['id']}/history", headers=headers).json()["items"][0]["created_at"]
+    assert set(listed(updated_after=cutoff)) == {second["id"]}
+    assert set(listed(updated_before=cutoff)) == {first["id"], third["id"]}
+    assert listed(created_after="2999-01-01T00:00:00Z") == []
+
+    assert client.get("/tasks", headers=headers, params={"sort": "description"}).status_code == 422
+    assert client.get("/tasks", headers=headers, params={"assignee_id": "someone"}).status_code == 422
+    assert client.get("/tasks", headers=headers, params={"sort": "title", "after": "a:1"}).status_code == 400
+
+
+def test_due_dates_upcoming_list_and_scheduler_claims_each_task_once(client, db_engine):
+    from datetime import UTC, datetime, timedelta
+
+    from app.models import TaskRecurrence
+    from app.scheduler import TaskScheduler, next_occurrence
+
+    registration = register_user(client)
+    headers = auth_headers(registration["token"]["access_token"])
+    project = create_project(client, headers)
+    now = datetime.now(UTC).replace(tzinfo=None, microsecond=0)
+
+    def create_due_task(title, due_at, **extra):
+        response = client.post(
+            "/tasks",
+            headers=headers,
+            json={"title": title, "project_id": project["id"], "due_at": due_at.isoformat(), **extra},
+        )
+        assert response.status_code == 201
+        return response.json()
+
+    routine = create_due_task("Morning Reset", now - timedelta(hours=1), recurrence="daily")
+    soon = create_due_task("Call the pharmacy", now + timedelta(hours=2))
+    create_due_task("Renew passport", now + timedelta(days=10))
+    assert routine["recurrence"] == "daily"
+
+    undated = {"title": "Stretch", "project_id": project["id"], "recurrence": "daily"}
+    assert client.post("/tasks", headers=headers, json=undated).status_code == 422
+
+    upcoming = client.get("/tasks/upcoming", headers=headers).json()
+    assert [task["id"] for task in upcoming] == [soon["id"]]
+    with_overdue = client.get("/tasks/upcoming?include_overdue=true", headers=headers).json()
+    assert [task["id"] for task in with_overdue] == [routine["id"], soon["id"]]
+
+    # Two workers load the same due entry; only the first claim succeeds.
+    workers = [TaskScheduler(db_engine, reload_seconds=60), TaskScheduler(db_engine, reload_seconds=60)]
+    for worker in workers:
+        worker.load(now)
+    results = [worker.run_due(now) for worker in workers]
+    assert [(result.reminders, result.created) for result in results] == [(1, 1), (0, 0)]
+    assert workers[0].tick(now).reminders == 0
+
+    listed = client.get("/tasks?sort=created_at&order=asc", headers=headers).json()
+    routines = [task for task in listed if task["title"] == "Morning Reset"]
+    assert [task["recurrence"] for task in routines] == [None, "daily"]
+    assert routines[1]["due_at"] == (now + timedelta(hours=23)).isoformat()
+
+    history = client.get(f"/tasks/{routine['id']}/history", headers=headers).json()["items"]
+    assert history[0]["event_type"] == "reminded"
+
+    friday = datetime(2026, 10, 16, 8, 0)
+    assert next_occurrence(friday, TaskRecurrence.WEEKDAYS, friday) == datetime(2026, 10, 19, 8, 0)
+    assert next_occurrence(datetime(2026, 1, 31), TaskRecurrence.MONTHLY, datetime(2026, 3, 1)) == datetime(2026, 3, 31)
+
+
+def test_large_responses_are_compressed_and_cached_views_reuse_their_variants(client, monkeypatch):
+    import asyncio
+
+    from app import compression
+    from app.cache import dashboard_cache
+    from app.compression import CompressibleBody, ResponseCompressor, response_compressor
+
+    monkeypatch.setattr(dashboard_cache, "ttl_seconds", 60)
+    registration = register_user(client)
+    headers = auth_headers(registration["token"]["access_token"])
+    project = create_project(client, headers)
+    description = "Breathe in, breathe out. " * 8
+    for index in range(30):
+        create_task(client, headers, project["id"], title=f"Routine step {index}", description=description)
+
+    gzip_headers = {**headers, "Accept-Encoding": "gzip"}
+    compressed = client.get("/tasks", headers=gzip_headers)
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["vary"]
+    assert len(compressed.json()) == 30
+
+    identity = client.get("/tasks", headers={**headers, "Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.json() == compressed.json()
+    assert "content-encoding" not in client.get("/auth/me", headers=gzip_headers).headers
+
+    calls = []
+    original_compress = response_compressor.compress
+
+    def counting_compress(body, encoding):
+        calls.append(encoding)
+        return original_compress(body, encoding)
+
+    monkeypatch.setattr(response_compressor, "compress", counting_compress)
+    first = client.get("/dashboard", headers=gzip_headers)
+    second = client.get("/dashboard", headers=gzip_headers)
+    assert first.headers["content-encoding"] == second.headers["content-encoding"] == "gzip"
+    assert first.json() == second.json()
+    assert calls == ["gzip"]
+
+    gzip_only = ResponseCompressor(("gzip",), minimum_size=10)
+    assert gzip_only.negotiate("br;q=1.0, gzip;q=0.5") == "gzip"
+    assert gzip_only.negotiate("*;q=0.2, gzip;q=0") is None
+    assert gzip_only.choose("gzip", 9) is None
+
+    offloaded = []
+
+    async def recording_threadpool(function, *args):
+        offloaded.append(len(args[0]))
+        return function(*args)
+
+    monkeypatch.setattr(compression, "run_in_threadpool", recording_threadpool)
+    monkeypatch.setattr(response_compressor, "threadpool_minimum_size", 4096)
+    large = client.get("/tasks", headers=gzip_headers)
+    assert large.headers["content-encoding"] == "gzip"
+    assert offloaded and offloaded[0] >= 4096
+    offloaded.clear()
+    client.get("/projects", headers=gzip_headers)
+    assert offloaded == []
+
+    gzip_only.threadpool_minimum_size = 100
+    cached = CompressibleBody(description.encode())
+    variant = asyncio.run(cached.variant_async(gzip_only, "gzip"))
+    assert offloaded == [len(description)]
+    assert asyncio.run(cached.variant_async(gzip_only, "gzip")) is variant
+    assert cached.variant(gzip_only, "gzip") is variant
+
+
+def test_readiness_probe_reports_database_and_pool_state(client, monkeypatch):
+    ready = client.get("/ready")
+    assert ready.status_code == 200
+    assert ready.json()["status"] == "ready"
+    assert ready.json()["pool"]["checked_out"] == 0
+
+    monkeypatch.setattr("app.main.READY_MAX_POOL_USAGE", 0)
+    saturated = client.get("/ready")
+    assert saturated.status_code == 503
+    assert saturated.json()["detail"] == "Database connection pool is saturated."
+    assert client.get("/health").json() == {"status": "ok"}
+
+
+def test_admin_backup_streams_a_restorable_sqlite_snapshot(client, monkeypatch, tmp_path):
+    import gzip
+    import sqlite3
+
+    from app.backup import restore_snapshot
+
+    registration = register_user(client)
+    headers = auth_headers(registration["token"]["access_token"])
+    project = create_project(client, headers)
+    for index in range(3):
+        create_task(client, headers, project["id"], title=f"Backup task {index}")
+
+    monkeypatch.setattr("app.dependencies.ADMIN_EMAILS", {"admin@example.com"})
+    admin = register_user(client, email="admin@example.com", name="Admin User")
+    assert client.get("/admin/backup", headers=headers).status_code == 403
+
+    response = client.get("/admin/backup", headers=auth_headers(admin["token"]["access_token"]))
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["content-disposition"].startswith('attachment; filename="focus-tracker-')
+    assert int(response.headers["x-backup-pages"]) > 0
+
+    snapshot = tmp_path / "snapshot.db.gz"
+    snapshot.write_bytes(response.content)
+    assert gzip.decompress(response.content).startswith(b"SQLite format 3\x00")
+
+    target = tmp_path / "restored.db"
+    restore_snapshot(snapshot, target)
+    restored = sqlite3.connect(target)
+    try:
+        assert restored.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 3
+        assert restored.execute("SELECT COUNT(*) FROM schema_migrations").fetchone()[0] > 0
+    finally:
+        restored.close()
+    assert not list(tmp_path.glob(".backup-*"))
+
+
+def test_verified_tokens_are_cached_until_they_expire(client, monkeypatch):
+    from app.auth import JWT_DECODERS, VerifiedTokenCache, create_access_token, decode_access_token, verify_access_token
+
+    now = [1_000.0]
+    cache = VerifiedTokenCache(max_entries=2, clock=lambda: now[0])
+    cache.set("a", "1", expires_at=1_010)
+    cache.set("b", "2", expires_at=1_100)
+    assert cache.get("a") == "1"
+    cache.set("c", "3", expires_at=1_100)
+    assert cache.get("b") is None
+    now[0] = 1_010
+    assert cache.get("a") is None
+    assert cache.get("c") == "3"
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 2
+
+    token = create_access_token("42")
+    for backend in JWT_DECODERS:
+        assert verify_access_token(token, backend)["sub"] == "42"
+        assert verify_access_token(token[:-2] + "xx", backend) is None
+    assert decode_access_token(token[:-2] + "xx") is None
+    assert decode_access_token(token) == "42"
+    assert decode_access_token(token) == "42"
+
+    monkeypatch.setattr("app.dependencies.ADMIN_EMAILS", {"admin@example.com"})
+    admin = register_user(client, email="admin@example.com", name="Admin User")
+    headers = auth_headers(admin["token"]["access_token"])
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    stats = client.get("/admin/token-cache", headers=headers).json()
+    assert stats["entries"] == 2
+    assert stats["hits"] >= 3
+    assert 0 < stats["hit_rate"] < 1
+
+
+def test_partition_creation_moves_rows_stranded_in_the_default_partition():
+    from datetime import datetime
+
+    from app.task_events import ensure_task_event_partitions
+
+    class RecordingConnection:
+        dialect = type("Dialect", (), {"name": "postgresql"})()
+
+        def __init__(self, existing, stranded):
+            self.existing, self.stranded, self.statements = existing, stranded, []
+
+        def execute(self, statement, parameters=None):
+            self.statements.append(" ".join(str(statement).split()))
+
+        def scalar(self, statement, parameters=None):
+            if "to_regclass" in str(statement):
+                return parameters["name"] if parameters["name"] in self.existing else None
+            return parameters["start"].month in self.stranded
+
+    connection = RecordingConnection(existing={"task_events_p2026_01"}, stranded={3})
+    ensure_task_event_partitions(connection, months_ahead=2, now=datetime(2026, 1, 15))
+
+    statements = connection.statements[1:]
+    assert statements[0].startswith("CREATE TABLE task_events_p2026_02 PARTITION OF task_events")
+    assert statements[1] == "ALTER TABLE task_events DETACH PARTITION task_events_default"
+    assert statements[2].startswith("CREATE TABLE task_events_p2026_03 PARTITION OF task_events")
+    assert statements[3].startswith("INSERT INTO task_events_p2026_03")
+    assert statements[4].startswith("DELETE FROM task_events_default")
+    assert statements[5] == "ALTER TABLE task_events ATTACH PARTITION task_events_default DEFAULT"
+    assert len(statements) == 6
+
+
+def test_one_process_holds_the_maintenance_lock_until_it_releases(tmp_path):
+    from app.leader import HostLeaderLock
+
+    path = str(tmp_path / "maintenance.lock")
+    first, second = HostLeaderLock(path), HostLeaderLock(path)
+    assert first.acquire()
+    assert first.acquire()
+    assert not second.acquire()
+
+    first.release()
+    assert second.acquire()
+    assert HostLeaderLock().acquire()
+    second.release()
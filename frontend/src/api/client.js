@@ -41,7 +41,9 @@ async function request(path, options = {}) {
   const data = await response.json().catch(() => ({}));
 
   if (!response.ok) {
-    throw new Error(data.detail || "Request failed.");
+    const error = new Error(data.detail || "Request failed.");
+    error.status = response.status;
+    throw error;
   }
 
   return data;
@@ -63,6 +65,20 @@ export const api = {
   me(token) {
     return request("/auth/me", { token });
   },
+  dashboard(token, params = {}) {
+    const query = new URLSearchParams();
+
+    if (params.projectId) {
+      query.set("project_id", params.projectId);
+    }
+
+    if (params.limit) {
+      query.set("limit", params.limit);
+    }
+
+    const suffix = query.toString() ? `?${query.toString()}` : "";
+    return request(`/dashboard${suffix}`, { token });
+  },
   listProjects(token) {
     return request("/projects", { token });
   },
@@ -92,13 +108,42 @@ export const api = {
       query.set("project_id", params.projectId);
     }
 
-    if (params.status) {
-      query.set("status", params.status);
+    for (const status of [].concat(params.status ?? [])) {
+      query.append("status", status);
+    }
+
+    if (params.assigneeId) {
+      query.set("assignee_id", params.assigneeId);
+    }
+
+    for (const key of ["created_after", "created_before", "updated_after", "updated_before", "sort", "order"]) {
+      const value = params[key.replace(/_(\w)/g, (_, letter) => letter.toUpperCase())];
+      if (value) {
+        query.set(key, value);
+      }
     }
 
     const suffix = query.toString() ? `?${query.toString()}` : "";
     return request(`/tasks${suffix}`, { token });
   },
+  listUpcomingTasks(token, params = {}) {
+    const query = new URLSearchParams();
+
+    if (params.projectId) {
+      query.set("project_id", params.projectId);
+    }
+
+    if (params.withinHours) {
+      query.set("within_hours", params.withinHours);
+    }
+
+    if (params.includeOverdue) {
+      query.set("include_overdue", "true");
+    }
+
+    const suffix = query.toString() ? `?${query.toString()}` : "";
+    return request(`/tasks/upcoming${suffix}`, { token });
+  },
   createTask(token, payload) {
     return request("/tasks", {
       method: "POST",
@@ -123,7 +123,9 @@ export function AuthProvider({ children }) {
   }, [token]);
 
   useEffect(() => {
-    if (!token) {
+    // With a stored profile the dashboard bootstrap validates the session
+    // and refreshes the user, so only a bare token needs /auth/me.
+    if (!token || user) {
       setIsLoading(false);
       return;
     }
@@ -172,6 +174,14 @@ export function AuthProvider({ children }) {
     setIsLoading(false);
   };
 
+  const updateUser = (profile) => {
+    if (typeof window !== "undefined") {
+      localStorage.setItem(USER_KEY, JSON.stringify(profile));
+    }
+
+    setUser(profile);
+  };
+
   const signIn = async (credentials) => {
     const response = await api.login(credentials);
     saveSession(response);
@@ -193,6 +203,7 @@ export function AuthProvider({ children }) {
         signIn,
         signUp,
         signOut: clearSession,
+        updateUser,
       }}
     >
       {children}
@@ -30,6 +30,7 @@ const completionSoundUrl = `${import.meta.env.BASE_URL}TaskCompleteSound.mp3`;
 const neutralSoundUrl = `${import.meta.env.BASE_URL}NeutralClick.mp3`;
 const warningSoundUrl = `${import.meta.env.BASE_URL}WarningSound.mp3`;
 const undoDisplayMs = 5000;
+const dashboardTaskLimit = 100;
 
 function getAssigneeLabel(task, user) {
   if (!task.assignee) {
@@ -54,7 +55,7 @@ function resolveSelectedProjectId(projects, preferredProjectId) {
 }
 
 export default function DashboardPage() {
-  const { token, user, signOut } = useAuth();
+  const { token, user, signOut, updateUser } = useAuth();
   const { isMuted, playSound, setIsMuted, setVolume, volume } = useSoundPreferences();
   const [projects, setProjects] = useState([]);
   const [tasks, setTasks] = useState([]);
@@ -74,6 +75,7 @@ export default function DashboardPage() {
   const [busyTaskId, setBusyTaskId] = useState(null);
 
   const deleteTriggerRef = useRef(null);
+  const bootstrappedTasksRef = useRef(null);
   const confirmDeleteButtonRef = useRef(null);
   const cancelDeleteButtonRef = useRef(null);
 
@@ -134,15 +136,24 @@ export default function DashboardPage() {
 
     async function bootstrap() {
       try {
-        const loadedProjects = await api.listProjects(token);
+        const dashboard = await api.dashboard(token, { limit: dashboardTaskLimit });
         if (!isMounted) {
           return;
         }
 
-        setProjects(loadedProjects);
-        setSelectedProjectId((current) => resolveSelectedProjectId(loadedProjects, current));
+        // A page shorter than the limit is the project's complete list, so
+        // the task effect can use it instead of fetching again.
+        bootstrappedTasksRef.current =
+          dashboard.selected_project_id && dashboard.tasks.length < dashboardTaskLimit
+            ? { projectId: String(dashboard.selected_project_id), tasks: dashboard.tasks }
+            : null;
+        updateUser(dashboard.user);
+        setProjects(dashboard.projects);
+        setSelectedProjectId((current) => resolveSelectedProjectId(dashboard.projects, current));
       } catch (loadError) {
-        if (isMounted) {
+        if (isMounted && loadError.status === 401) {
+          signOut();
+        } else if (isMounted) {
           setError(loadError.message);
         }
       } finally {
@@ -166,6 +177,13 @@ export default function DashboardPage() {
       return;
     }
 
+    const bootstrapped = bootstrappedTasksRef.current;
+    bootstrappedTasksRef.current = null;
+    if (bootstrapped?.projectId === selectedProjectId && !statusFilter) {
+      setTasks(bootstrapped.tasks);
+      return;
+    }
+
     let isMounted = true;
 
     api